@@ -0,0 +1 @@
+# Benchmarks e dublês de teste executáveis no Linux
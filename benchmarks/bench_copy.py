@@ -0,0 +1,204 @@
+"""Estratégias de cópia das pastas da rede comparadas em uma árvore sintética.
+
+Uso (Linux ou Windows):
+    python -m benchmarks.bench_copy [--files 3000] [--tiny 2000] [--large-files 2] [--large-mb 64]
+                                    [--depth 12] [--latency-ms 2] [--request-ms 0.3] [--mbps 0]
+                                    [--workers 8] [--json resultado.json]
+
+Estratégias:
+  copytree      caminho original: contagem prévia + rmtree + shutil.copytree com
+                barra de progresso por arquivo (uma cópia por vez)
+  sequencial    sync_tree com workers=1
+  thread pool   sync_tree com --workers cópias simultâneas
+  buffer 8 MB   thread pool lendo em blocos de staging.CHUNK_SIZE
+  pacote        fresh_pack + extract_pack (publicação medida à parte)
+  delta         nova sincronização após alterar --changed % dos arquivos,
+                comparada a refazer o copytree inteiro
+
+Rede simulada: --latency-ms por abertura de arquivo, --request-ms por leitura
+(um bloco do buffer) e --mbps de banda; com tudo em 0 mede só o disco local.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import make_tree, network_delays  # noqa: E402
+from config import VERSION  # noqa: E402
+from utils.filecopy import SyncStats, sync_tree  # noqa: E402
+from utils.packs import build_pack, extract_pack, fresh_pack  # noqa: E402
+from utils.staging import CHUNK_SIZE  # noqa: E402
+
+# Buffer de shutil.copyfileobj/copy2 no Windows (shutil.COPY_BUFSIZE)
+DEFAULT_BUFFER = 1024 * 1024
+
+
+def _copier(per_open, per_request, buffer_size: int):
+    """copy_file(src, dst) equivalente a copy2, pagando a rede simulada por abertura e por leitura."""
+    def copy(src: str, dst: str):
+        per_open()
+        with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+            while True:
+                chunk = fsrc.read(buffer_size)
+                if not chunk:
+                    break
+                per_request(len(chunk))
+                fdst.write(chunk)
+        shutil.copystat(src, dst)
+    return copy
+
+
+def _copytree(src: str, dst: str, copy_file) -> SyncStats:
+    """Reprodução do caminho original de copy_network_folders."""
+    started = time.perf_counter()
+    stats = SyncStats()
+    sum(len(files) for _, _, files in os.walk(src))  # _count_files, para o total da barra
+    if os.path.exists(dst):
+        shutil.rmtree(dst)
+
+    def _copy_with_progress(s, d):
+        file_start = time.perf_counter()
+        copy_file(s, d)
+        size = os.path.getsize(d)
+        stats.files_copied += 1
+        stats.bytes_copied += size
+        stats.record_latency(s, size, time.perf_counter() - file_start)
+
+    shutil.copytree(src, dst, copy_function=_copy_with_progress)
+    stats.elapsed = time.perf_counter() - started
+    return stats
+
+
+def _touch_some(root: str, percent: float, seed: int = 7) -> int:
+    """Reescreve percent% dos arquivos (novo conteúdo e mtime), como uma atualização do sistema."""
+    paths = [os.path.join(d, f) for d, _, files in os.walk(root) for f in files]
+    rng = random.Random(seed)
+    changed = rng.sample(sorted(paths), max(1, int(len(paths) * percent / 100)))
+    later = time.time() + 60
+    for path in changed:
+        with open(path, "ab") as f:
+            f.write(b"v2")
+        os.utime(path, (later, later))
+    return len(changed)
+
+
+def _row(strategy: str, stats: SyncStats, elapsed: float) -> dict:
+    return {
+        "strategy": strategy,
+        "elapsed_s": round(elapsed, 3),
+        "files": stats.files,
+        "files_copied": stats.files_copied,
+        "mb_copied": round(stats.bytes_copied / 1024 / 1024, 1),
+        "files_per_s": round(stats.files / elapsed, 1) if elapsed else 0.0,
+        "mb_per_s": round(stats.bytes_copied / 1024 / 1024 / elapsed, 1) if elapsed else 0.0,
+        "p95_ms": round(stats.percentile(95) * 1000, 1),
+    }
+
+
+def run(args) -> dict:
+    per_open, per_bytes = network_delays(args.latency_ms, args.mbps)
+
+    def per_request(n: int):
+        if args.request_ms:
+            time.sleep(args.request_ms / 1000)
+        per_bytes(n)
+
+    plain = _copier(per_open, per_request, DEFAULT_BUFFER)
+    large = _copier(per_open, per_request, CHUNK_SIZE)
+    work = tempfile.mkdtemp(prefix="bench_copy_")
+    try:
+        source = os.path.join(work, "client")
+        total = make_tree(source, files=args.files, tiny_files=args.tiny, large_files=args.large_files,
+                          large_kb=args.large_mb * 1024, depth=args.depth, seed=args.seed)
+        pack_dir = os.path.join(work, "packs")
+        start = time.perf_counter()
+        build_pack(source, pack_dir, args.format)
+        publish_s = time.perf_counter() - start
+
+        def _dst(label: str) -> str:
+            return os.path.join(work, "dst", label)
+
+        rows = []
+        stats = _copytree(source, _dst("copytree"), plain)
+        rows.append(_row("copytree", stats, stats.elapsed))
+        stats = sync_tree(source, _dst("seq"), workers=1, copy_file=plain)
+        rows.append(_row("sequencial", stats, stats.elapsed))
+        stats = sync_tree(source, _dst("pool"), workers=args.workers, copy_file=plain)
+        rows.append(_row(f"thread pool ({args.workers})", stats, stats.elapsed))
+        stats = sync_tree(source, _dst("large"), workers=args.workers, copy_file=large)
+        rows.append(_row(f"buffer {CHUNK_SIZE // 1024 // 1024} MB ({args.workers})", stats, stats.elapsed))
+
+        start = time.perf_counter()
+        manifest, _ = fresh_pack(source, pack_dir)
+        per_open()
+        stats = extract_pack(manifest, pack_dir, _dst("pack"), on_read=per_bytes)
+        rows.append(_row(f"pacote {args.format}", stats, time.perf_counter() - start))
+
+        changed = _touch_some(source, args.changed)
+        stats = _copytree(source, _dst("copytree"), plain)
+        rows.append(_row(f"copytree após {args.changed:g}%", stats, stats.elapsed))
+        stats = sync_tree(source, _dst("pool"), workers=args.workers, copy_file=plain)
+        rows.append(_row(f"delta após {args.changed:g}%", stats, stats.elapsed))
+
+        return {
+            "version": VERSION,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "platform": f"{platform.system()} {platform.release()} / Python {platform.python_version()}",
+            "params": vars(args),
+            "tree": {"files": args.files + args.tiny + args.large_files, "mb": round(total / 1024 / 1024, 1),
+                     "changed_files": changed, "publish_s": round(publish_s, 2),
+                     "pack_mb": round(os.path.getsize(os.path.join(pack_dir, manifest.archive)) / 1024 / 1024, 1)},
+            "results": rows,
+        }
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+def print_table(report: dict):
+    tree = report["tree"]
+    print(f"Árvore: {tree['files']} arquivos, {tree['mb']:.1f} MB; pacote {tree['pack_mb']:.1f} MB "
+          f"(publicação {tree['publish_s']:.1f}s); delta: {tree['changed_files']} arquivos alterados")
+    print(f"{'Estratégia':<26}{'s':>8}{'copiados':>10}{'arq/s':>9}{'MB/s':>8}{'p95 ms':>9}{'vs copytree':>13}")
+    baseline = report["results"][0]["elapsed_s"]
+    for row in report["results"]:
+        if row["strategy"].startswith("copytree após"):
+            baseline = row["elapsed_s"]  # o delta se compara com refazer a cópia inteira
+        speedup = baseline / row["elapsed_s"] if row["elapsed_s"] else 0
+        print(f"{row['strategy']:<26}{row['elapsed_s']:>8.2f}{row['files_copied']:>10}{row['files_per_s']:>9.0f}"
+              f"{row['mb_per_s']:>8.1f}{row['p95_ms']:>9.1f}{speedup:>12.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=3000, help="arquivos pequenos/médios (DLLs, XMLs...)")
+    parser.add_argument("--tiny", type=int, default=2000, help="arquivos de 0-1 KB")
+    parser.add_argument("--large-files", type=int, default=2)
+    parser.add_argument("--large-mb", type=int, default=64, help="tamanho de cada arquivo grande")
+    parser.add_argument("--depth", type=int, default=12, help="níveis extras de subpastas")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--latency-ms", type=float, default=2.0, help="atraso por abertura de arquivo")
+    parser.add_argument("--request-ms", type=float, default=0.3, help="atraso por leitura de um bloco")
+    parser.add_argument("--mbps", type=float, default=0, help="banda em Mbit/s (0 = sem limite)")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--changed", type=float, default=5.0, help="%% de arquivos alterados no delta")
+    parser.add_argument("--format", default="tar.gz", choices=["tar.xz", "tar.gz", "zip"])
+    parser.add_argument("--json", metavar="ARQUIVO", help="grava os resultados em JSON")
+    args = parser.parse_args()
+
+    report = run(args)
+    print_table(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"Resultados gravados em {args.json}")
+
+
+if __name__ == "__main__":
+    main()
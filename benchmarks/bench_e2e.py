@@ -0,0 +1,148 @@
+"""Instalação Completa + Diagnóstico de ponta a ponta com o backend simulado (roda no Linux).
+
+Uso:
+    python -m benchmarks.bench_e2e [--scenario benchmarks/scenarios/provisioning.json]
+                                   [--baseline base.json] [--save-baseline base.json]
+                                   [--threshold 0.2] [--verbose]
+
+Comandos externos (PowerShell, choco, instaladores) respondem com as latências
+e saídas do cenário (utils/executor.SimulatedExecutor); caminhos UNC e C:\\
+viram pastas em um diretório temporário, onde as pastas da rede são geradas
+por benchmarks/synthetic.py e copiadas de verdade.
+
+Com --baseline, sai com código 1 se o tempo total, o diagnóstico ou alguma etapa
+ficar mais de --threshold (fração) acima da referência — e também se alguma
+etapa falhar.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+DEFAULT_SCENARIO = os.path.join(ROOT_DIR, "benchmarks", "scenarios", "provisioning.json")
+
+
+def _touch(path: str, content: bytes = b""):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(content)
+
+
+def _prepare(root: str, scenario_path: str, scenario: dict):
+    """Aponta ambiente e CONFIG para root e cria as fixtures (pastas da rede, instaladores, choco)."""
+    # Antes de importar modules.install: CHOCO_EXE é calculado no import
+    os.environ["PROGRAMDATA"] = os.path.join(root, "c", "ProgramData")
+    os.environ["PUBLIC"] = os.path.join(root, "c", "Users", "Public")
+    os.environ["COMPUTERNAME"] = "BENCH-E2E"
+
+    from benchmarks.synthetic import make_tree
+    from config import CONFIG
+    from utils.executor import SimulatedExecutor, set_executor
+
+    executor = SimulatedExecutor.from_file(scenario_path, root)
+    executor.apply_paths(CONFIG)
+    set_executor(executor)
+
+    CONFIG.inventory_snapshot = os.path.join(root, "inventory.json")
+    with open(CONFIG.inventory_snapshot, "w", encoding="utf-8") as f:
+        json.dump({"choco": {}, "programs": {}}, f)
+
+    for i, cfg in enumerate(CONFIG.unc_folders_to_copy):
+        make_tree(cfg.source, files=scenario.get("folder_files", 500), seed=i + 1, large_files=1, large_kb=1024)
+        _touch(os.path.join(cfg.source, cfg.shortcut.target_exe if cfg.shortcut else "app.exe"), b"MZ")
+
+    for installer in (CONFIG.office_installer, CONFIG.office16_365_installer, CONFIG.sql_native_client_installer):
+        _touch(installer.path, b"MZ" + os.urandom(64 * 1024))
+    choco_bin = os.path.join(os.environ["PROGRAMDATA"], "chocolatey", "bin")
+    _touch(os.path.join(choco_bin, "choco.exe"), b"MZ")
+    _touch(os.path.join(choco_bin, "anydesk.exe"), b"MZ")
+    _touch(CONFIG.chrome_path, b"MZ")
+    _touch(CONFIG.anydesk_secret_file, b"senha-de-teste")
+    return executor
+
+
+def _run(scenario: dict) -> dict:
+    from modules.diagnostics import run_full_diagnostics
+    from modules.install import run_full_install
+    from utils.journal import get_journal
+
+    start = time.perf_counter()
+    run_full_install(skip_steps=[], office_version=scenario.get("office_version", ""))
+    install_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    run_full_diagnostics()
+    diagnostics_s = time.perf_counter() - start
+
+    session = get_journal().last_session()
+    steps = {key: {"elapsed_s": record.get("elapsed", 0.0), "status": record.get("status")}
+             for key, record in (session.results.items() if session else [])}
+    return {"install_s": round(install_s, 2), "diagnostics_s": round(diagnostics_s, 2), "steps": steps}
+
+
+def _compare(results: dict, baseline: dict, threshold: float, min_delta: float) -> list:
+    """[(métrica, atual, referência)] que pioraram além do limite."""
+    pairs = [("install_s", results["install_s"], baseline.get("install_s")),
+             ("diagnostics_s", results["diagnostics_s"], baseline.get("diagnostics_s"))]
+    for key, step in results["steps"].items():
+        base = baseline.get("steps", {}).get(key, {}).get("elapsed_s")
+        pairs.append((f"etapa {key}", step["elapsed_s"], base))
+    return [(name, current, base) for name, current, base in pairs
+            if base is not None and current > base * (1 + threshold) and current - base > min_delta]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenario", default=DEFAULT_SCENARIO)
+    parser.add_argument("--baseline", help="JSON de uma execução anterior (--save-baseline)")
+    parser.add_argument("--save-baseline", metavar="ARQUIVO")
+    parser.add_argument("--threshold", type=float, help="piora máxima aceita (fração; padrão do cenário)")
+    parser.add_argument("--root", help="pasta de trabalho (padrão: temporária)")
+    parser.add_argument("--verbose", action="store_true", help="mostra a saída da ferramenta")
+    args = parser.parse_args()
+
+    with open(args.scenario, "r", encoding="utf-8") as f:
+        scenario = json.load(f)
+    root = args.root or tempfile.mkdtemp(prefix="bench_e2e_")
+    executor = _prepare(root, args.scenario, scenario)
+
+    from utils.console import console
+    console.quiet = not args.verbose
+    results = _run(scenario)
+    console.quiet = False
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    print(f"Pasta de trabalho: {root} ({len(executor.calls)} comandos simulados)")
+    print(f"{'Etapa':<14}{'Status':>8}{'s':>9}{'ref. s':>9}")
+    for key, step in results["steps"].items():
+        base = baseline.get("steps", {}).get(key, {}).get("elapsed_s")
+        status = {True: "ok", False: "FALHA", None: "pulada"}.get(step["status"], str(step["status"]))
+        print(f"{key:<14}{status:>8}{step['elapsed_s']:>9.1f}{base if base is not None else '-':>9}")
+    print(f"{'instalação':<14}{'':>8}{results['install_s']:>9.1f}{baseline.get('install_s', '-'):>9}")
+    print(f"{'diagnóstico':<14}{'':>8}{results['diagnostics_s']:>9.1f}{baseline.get('diagnostics_s', '-'):>9}")
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    failed = [key for key, step in results["steps"].items() if step["status"] is not True]
+    threshold = args.threshold if args.threshold is not None else scenario.get("regression_threshold", 0.2)
+    regressions = _compare(results, baseline, threshold, scenario.get("min_regression_s", 0.25))
+    for name, current, base in regressions:
+        print(f"REGRESSÃO: {name} {current:.1f}s (referência {base:.1f}s, limite +{threshold:.0%})")
+    if failed:
+        print(f"FALHA nas etapas: {', '.join(failed)}")
+    sys.exit(1 if regressions or failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Mensagens/s do logger: gravação direta (abre/anexa/fecha por linha) vs fila em segundo plano.
+
+Uso (Linux ou Windows):
+    python -m benchmarks.bench_logger [--messages 20000] [--threads 4] [--console]
+
+Mede o tempo das chamadas (o que a etapa espera) e o tempo até tudo estar
+gravado e renderizado (close). --console inclui a renderização no console (na fila própria
+do console; redirecionada para a memória, sem custo de terminal); sem ela, só o arquivo (nível OUTPUT).
+No Windows com antivírus a diferença da gravação direta costuma ser maior.
+"""
+import argparse
+import io
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import logger as logger_module  # noqa: E402
+from utils.console import console  # noqa: E402
+
+
+def _measure(buffered: bool, messages: int, threads: int, with_console: bool, log_dir: str):
+    """(s nas chamadas, s até o close, linhas no arquivo)."""
+    logger = logger_module.Logger(log_dir, buffered=buffered)
+    logger_module._logger = logger
+    log = logger.info if with_console else logger.output
+    per_thread = messages // threads
+
+    def worker(n: int):
+        for i in range(per_thread):
+            log(f"thread {n}: Progress: Downloading pacote {i} 1.0.0... {i % 100}%")
+
+    start = time.perf_counter()
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    calls_s = time.perf_counter() - start
+    logger.close()
+    total_s = time.perf_counter() - start
+
+    with open(logger.log_file, encoding="utf-8") as f:
+        lines = sum(1 for _ in f)
+    os.remove(logger.log_file)
+    return calls_s, total_s, lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--console", action="store_true", help="inclui renderização no console")
+    args = parser.parse_args()
+
+    console.file = io.StringIO()
+    work = tempfile.mkdtemp(prefix="bench_logger_")
+    try:
+        results = []
+        for label, buffered in (("direto", False), ("fila", True)):
+            calls_s, total_s, lines = _measure(buffered, args.messages, args.threads, args.console, work)
+            console.file = io.StringIO()
+            results.append((label, calls_s, total_s, lines))
+    finally:
+        console.file = sys.stdout
+        shutil.rmtree(work, ignore_errors=True)
+
+    print(f"{args.messages} mensagens, {args.threads} threads"
+          f"{', com console' if args.console else ', só arquivo'}")
+    print(f"{'Modo':<10}{'chamadas msg/s':>16}{'até o fim msg/s':>18}{'linhas':>9}")
+    for label, calls_s, total_s, lines in results:
+        print(f"{label:<10}{lines / calls_s:>16.0f}{lines / total_s:>18.0f}{lines:>9}")
+    print(f"Ganho nas chamadas: {results[0][1] / results[1][1]:.1f}x; "
+          f"até o fim: {results[0][2] / results[1][2]:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
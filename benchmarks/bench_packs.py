@@ -0,0 +1,76 @@
+"""Cópia arquivo por arquivo (sync_tree) vs pacote compactado (extract_pack) em uma árvore sintética.
+
+Uso (Linux ou Windows):
+    python -m benchmarks.bench_packs [--files 3000] [--latency-ms 2] [--mbps 100] [--format tar.gz]
+
+--latency-ms simula o custo de abrir/fechar cada arquivo no SMB (pago uma vez
+por arquivo na cópia comum e uma única vez no pacote); --mbps limita a banda.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import make_tree, network_delays  # noqa: E402
+from utils.filecopy import sync_tree  # noqa: E402
+from utils.packs import build_pack, extract_pack, fresh_pack  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=3000)
+    parser.add_argument("--latency-ms", type=float, default=2.0)
+    parser.add_argument("--mbps", type=float, default=0, help="banda em Mbit/s (0 = sem limite)")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--format", default="tar.gz", choices=["tar.xz", "tar.gz", "zip"])
+    args = parser.parse_args()
+
+    per_open, per_bytes = network_delays(args.latency_ms, args.mbps)
+    work = tempfile.mkdtemp(prefix="bench_packs_")
+    try:
+        source = os.path.join(work, "client")
+        total = make_tree(source, files=args.files)
+        pack_dir = os.path.join(work, "packs")
+
+        start = time.perf_counter()
+        build_pack(source, pack_dir, args.format)
+        publish_s = time.perf_counter() - start
+
+        def slow_copy(src: str, dst: str):
+            per_open()
+            per_bytes(os.path.getsize(src))
+            shutil.copy2(src, dst)
+
+        results = []
+        for workers in sorted({1, args.workers}):
+            stats = sync_tree(source, os.path.join(work, f"files{workers}"), workers=workers, copy_file=slow_copy)
+            results.append((f"arquivos (workers={workers})", stats.elapsed, stats))
+
+        start = time.perf_counter()
+        manifest, _ = fresh_pack(source, pack_dir)
+        check_s = time.perf_counter() - start
+        per_open()
+        stats = extract_pack(manifest, pack_dir, os.path.join(work, "pack"), on_read=per_bytes)
+        results.append((f"pacote {args.format}", stats.elapsed + check_s, stats))
+
+        archive_mb = os.path.getsize(os.path.join(pack_dir, manifest.archive)) / 1024 / 1024
+        print(f"Árvore: {args.files} arquivos, {total / 1024 / 1024:.1f} MB; "
+              f"pacote {archive_mb:.1f} MB (publicação {publish_s:.1f}s, verificação {check_s * 1000:.0f} ms)")
+        print(f"{'Modo':<26}{'s':>8}{'arq/s':>10}{'MB/s':>8}{'p95 ms':>9}")
+        for label, elapsed, stats in results:
+            files_per_s = stats.files / elapsed if elapsed else 0
+            mb_per_s = stats.bytes_copied / 1024 / 1024 / elapsed if elapsed else 0
+            print(f"{label:<26}{elapsed:>8.2f}{files_per_s:>10.0f}{mb_per_s:>8.1f}"
+                  f"{stats.percentile(95) * 1000:>9.1f}")
+        print(f"Ganho do pacote sobre o melhor modo por arquivo: "
+              f"{min(r[1] for r in results[:-1]) / results[-1][1]:.1f}x")
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
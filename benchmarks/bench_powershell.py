@@ -0,0 +1,54 @@
+"""Latência por chamada de run_powershell: processo avulso vs host persistente.
+
+Uso (Linux ou Windows):
+    python -m benchmarks.bench_powershell [--calls 20] [--startup-ms 300] [--pool-size 1]
+
+Usa o dublê fake_powershell_host.py no lugar do powershell.exe; --startup-ms
+simula o custo de inicialização do runtime.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import powershell  # noqa: E402
+
+FAKE_HOST = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_powershell_host.py")
+
+
+def _measure(calls: int, func) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        rc, out, _ = func("echo ok")
+        assert rc == 0 and out.strip() == "ok", (rc, out)
+    return (time.perf_counter() - start) / calls * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=20)
+    parser.add_argument("--startup-ms", type=int, default=300)
+    parser.add_argument("--pool-size", type=int, default=1)
+    args = parser.parse_args()
+
+    powershell.POWERSHELL_ARGV = [sys.executable, FAKE_HOST, "--startup-ms", str(args.startup_ms)]
+
+    oneshot_ms = _measure(args.calls, powershell._run_oneshot)
+
+    pool = powershell.PowerShellPool(args.pool_size)
+    try:
+        pool.run("echo ok")  # aquecimento: sobe o host
+        pool_ms = _measure(args.calls, pool.run)
+    finally:
+        pool.close()
+
+    print(f"{'Modo':<12}{'ms/chamada':>12}")
+    print(f"{'avulso':<12}{oneshot_ms:>12.1f}")
+    print(f"{'pool':<12}{pool_ms:>12.1f}")
+    print(f"Ganho: {oneshot_ms / pool_ms:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Dublê do choco.exe para Linux: imprime a saída típica de um `choco install`.
+
+    fake_choco.py install <pacote> [pacote...] [-y] [--fail PACOTE] [--delay-ms N]
+
+Útil para exercitar utils/process.stream_process e o parser de lote do
+modules/install.py sem Windows.
+"""
+import sys
+import time
+
+
+def main():
+    args = sys.argv[1:]
+    packages, failed, delay = [], set(), 0.0
+    i = 1 if args and args[0] == "install" else 0
+    while i < len(args):
+        if args[i] == "--fail":
+            failed.add(args[i + 1])
+            i += 1
+        elif args[i] == "--delay-ms":
+            delay = int(args[i + 1]) / 1000
+            i += 1
+        elif not args[i].startswith("-"):
+            packages.append(args[i])
+        i += 1
+
+    print("Installing the following packages:", flush=True)
+    print(";".join(packages), flush=True)
+    for package in packages:
+        print(f"Progress: Downloading {package} 1.0.0... 100%", flush=True)
+        print(f"{package} v1.0.0 [Approved]", flush=True)
+        print(f"Downloading {package} 64 bit", flush=True)
+        for pct in (25, 50, 75, 100):
+            time.sleep(delay / 4)
+            print(f"Progress: {pct}% - Saving {pct / 10:.1f} MB of 10 MB", flush=True)
+        print(f"Installing {package}...", flush=True)
+        if package in failed:
+            print(f"ERROR: Running [\"{package}.exe\"] was not successful. Exit code was '1603'.", flush=True)
+        else:
+            print(f"The install of {package} was successful.", flush=True)
+
+    ok = len(packages) - len(failed & set(packages))
+    print(f"Chocolatey installed {ok}/{len(packages)} packages.", flush=True)
+    return 1 if failed & set(packages) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+"""Dublê do powershell.exe para Linux.
+
+Aceita a mesma linha de comando usada por utils/powershell.py:
+    fake_powershell_host.py [--startup-ms N] [flags...] -Command <script>
+
+Se o script for o HOST_SCRIPT (lê comandos do stdin), roda o loop do host
+persistente com o mesmo protocolo; se for um lote (linhas "Invoke-Framed"),
+executa cada comando e emite um frame por comando; senão executa uma vez.
+Os comandos são executados via /bin/sh.
+"""
+import base64
+import re
+import subprocess
+import sys
+import time
+
+FRAME_MARKER = "<<<PS-FRAME>>>"
+
+
+def _b64(text: str) -> str:
+    return base64.b64encode(text.encode("utf-8")).decode("ascii")
+
+
+def _parse_argv(argv: list) -> tuple:
+    startup_ms = 0
+    command = ""
+    i = 0
+    while i < len(argv):
+        if argv[i] == "--startup-ms":
+            startup_ms = int(argv[i + 1])
+            i += 1
+        elif argv[i] == "-Command":
+            command = argv[i + 1] if i + 1 < len(argv) else ""
+            i += 1
+        i += 1
+    return startup_ms, command
+
+
+def _framed(encoded: str):
+    command = base64.b64decode(encoded).decode("utf-8")
+    start = time.time()
+    result = subprocess.run(command, shell=True, capture_output=True, text=True)
+    elapsed_ms = int((time.time() - start) * 1000)
+    print(f"{FRAME_MARKER} {result.returncode} {_b64(result.stdout)} {_b64(result.stderr)} {elapsed_ms}", flush=True)
+
+
+def _host_loop():
+    print(f"{FRAME_MARKER} 0", flush=True)
+    for line in sys.stdin:
+        line = line.strip()
+        if line:
+            _framed(line)
+
+
+def main():
+    startup_ms, command = _parse_argv(sys.argv[1:])
+    # Simula o custo de carregar o runtime do PowerShell
+    time.sleep(startup_ms / 1000)
+
+    if "[Console]::In.ReadLine()" in command:
+        _host_loop()
+        return 0
+    batch = re.findall(r"^Invoke-Framed '([A-Za-z0-9+/=]*)'$", command, re.M)
+    if batch:
+        for encoded in batch:
+            _framed(encoded)
+        return 0
+    return subprocess.run(command, shell=True).returncode
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""Árvore sintética parecida com as pastas do NextSI: muitos arquivos pequenos, alguns grandes.
+
+Uso:
+    python -m benchmarks.synthetic DESTINO [--files 3000] [--dirs 60] [--tiny 0] [--depth 0] [--seed 1]
+"""
+import argparse
+import os
+import random
+import time
+
+WORDS = [b"Form", b"Report", b"Cliente", b"Pedido", b"Produto", b"=", b"\r\n", b"<item/>", b"0x1F"]
+
+
+def _random_bytes(rng: random.Random, n: int) -> bytes:
+    # Random.randbytes só existe a partir do Python 3.9
+    return rng.randbytes(n) if hasattr(rng, "randbytes") else os.urandom(n)
+
+
+def _content(rng: random.Random, size: int) -> bytes:
+    """Meio texto repetitivo, meio aleatório (compressão realista)."""
+    text = b" ".join(rng.choice(WORDS) for _ in range(size // 12 + 1))[: size // 2]
+    return text + _random_bytes(rng, size - len(text))
+
+
+def _write_large(rng: random.Random, path: str, size: int):
+    """Arquivo grande em blocos de 1 MB (sorteio palavra a palavra seria lento demais)."""
+    block = _content(rng, 1024 * 1024)
+    with open(path, "wb") as f:
+        written = 0
+        while written < size:
+            n = min(len(block), size - written)
+            # Metade aleatória renovada a cada bloco: não vira um arquivo de repetições
+            f.write(block[: n // 2] + _random_bytes(rng, n - n // 2))
+            written += n
+
+
+def make_tree(root: str, files: int = 3000, dirs: int = 60, large_files: int = 5,
+              large_kb: int = 4096, seed: int = 1, tiny_files: int = 0, depth: int = 0) -> int:
+    """Cria a árvore em root e retorna o total de bytes gerados.
+
+    Tamanhos dos arquivos pequenos seguem uma distribuição log-normal em torno de
+    ~8 KB (DLLs, XMLs, relatórios). tiny_files: arquivos de 0-1 KB (.ini, .lng);
+    depth: cadeia extra de subpastas aninhadas, que também recebe arquivos.
+    """
+    rng = random.Random(seed)
+    folders = [root]
+    for i in range(dirs):
+        parent = rng.choice(folders)
+        folders.append(os.path.join(parent, f"dir{i:03d}"))
+    for i in range(depth):
+        folders.append(os.path.join(folders[-1] if i else root, f"nivel{i:02d}"))
+    for folder in folders:
+        os.makedirs(folder, exist_ok=True)
+
+    total = 0
+    for i in range(files + large_files):
+        path = os.path.join(rng.choice(folders), f"file{i:05d}")
+        if i < files:
+            size = min(int(rng.lognormvariate(9, 1.2)), 512 * 1024)
+            ext = rng.choice([".dll", ".xml", ".ini", ".png", ".rpt", ".bpl"])
+            with open(path + ext, "wb") as f:
+                f.write(_content(rng, size))
+        else:
+            size = large_kb * 1024
+            _write_large(rng, path + ".dat", size)
+        total += size
+
+    for i in range(tiny_files):
+        size = rng.randint(0, 1024)
+        path = os.path.join(rng.choice(folders), f"tiny{i:05d}{rng.choice(['.ini', '.lng', '.cfg'])}")
+        with open(path, "wb") as f:
+            f.write(_content(rng, size))
+        total += size
+    return total
+
+
+def network_delays(latency_ms: float, mbps: float):
+    """(atraso por abertura, atraso por n bytes) simulando um compartilhamento SMB."""
+    bytes_per_s = mbps * 1024 * 1024 / 8 if mbps else 0
+
+    def per_open():
+        if latency_ms:
+            time.sleep(latency_ms / 1000)
+
+    def per_bytes(n: int):
+        if bytes_per_s:
+            time.sleep(n / bytes_per_s)
+
+    return per_open, per_bytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("destination")
+    parser.add_argument("--files", type=int, default=3000)
+    parser.add_argument("--dirs", type=int, default=60)
+    parser.add_argument("--tiny", type=int, default=0, help="arquivos de 0-1 KB")
+    parser.add_argument("--depth", type=int, default=0, help="níveis extras de subpastas")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    total = make_tree(args.destination, args.files, args.dirs, seed=args.seed,
+                      tiny_files=args.tiny, depth=args.depth)
+    print(f"{args.files} arquivos, {total / 1024 / 1024:.1f} MB em {args.destination}")
+
+
+if __name__ == "__main__":
+    main()
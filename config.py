@@ -1,6 +1,6 @@
 # Configuração global — altere conforme o ambiente da rede corporativa.
 from dataclasses import dataclass, field
-from typing import List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional
 
 VERSION = "3.0.1"
 
@@ -8,6 +8,10 @@ VERSION = "3.0.1"
 class InstallerConfig:
     path: str
     args: str = ""
+    # Cache local: "file" (só o instalador), "tree" (pasta inteira do instalador) ou "off"
+    cache: str = "file"
+    # Trecho do DisplayName no registro que indica que já está instalado ('|' separa alternativas)
+    detect: str = ""
 
 @dataclass
 class ShortcutConfig:
@@ -19,37 +23,65 @@ class FolderCopyConfig:
     source: str
     destination: str
     shortcut: Optional[ShortcutConfig] = None
+    # "sync": copia só arquivos novos/alterados e remove os que saíram da origem
+    # "mirror": apaga o destino e copia tudo de novo
+    mode: str = "sync"
+    # Compara também o conteúdo (SHA-256) além de tamanho e data — lê os dois lados
+    compare_hash: bool = False
+    # Cópias de arquivos simultâneas (1 = sequencial)
+    workers: int = 8
+    # Pasta com o pacote compactado desta origem (main.py --publish-packs); vazio = sempre arquivo por arquivo
+    pack_dir: str = ""
+
+    def __post_init__(self):
+        if self.mode not in ("sync", "mirror"):
+            raise ValueError(f"mode inválido para {self.source}: {self.mode}")
+        if self.workers < 1:
+            raise ValueError(f"workers deve ser >= 1 para {self.source}")
 
 @dataclass
 class AppConfig:
     default_domain: str = "ultradisplays.local"
     unc_installers: str = r"\\192.168.0.11\t.i\@Instaladores de Formatação\@PROGRAMAS E UTILITÁRIOS"
     log_dir: str = r"C:\ProvisioningLogs"
+    # Cache local de instaladores (pode apontar para o pendrive do técnico). Vazio desativa.
+    installer_cache_dir: str = r"C:\ProvisioningCache"
+    installer_cache_max_mb: int = 20480
+    # Arquivos a partir deste tamanho são copiados em blocos retomáveis
+    staging_min_mb: int = 32
+    staging_chunk_mb: int = 8
     anydesk_secret_file: str = r"\\192.168.0.11\T.I\@Provisionador\anydesk_pswrd.txt"
     # Pastas a copiar e seus atalhos
     unc_folders_to_copy: List[FolderCopyConfig] = field(default_factory=lambda: [
         FolderCopyConfig(
             source=r"\\192.168.0.8\nextone\client",
             destination=r"C:\NextUltraDisplays",
+            pack_dir=r"\\192.168.0.11\T.I\@Provisionador\packs",
             shortcut=ShortcutConfig(name="NextSI UltraDisplays", target_exe="NextSIClient.exe")
         ),
         FolderCopyConfig(
             source=r"\\192.168.0.8\nextone\MEGAPAPER\Client_Mega",
             destination=r"C:\NextUltraArt",
+            pack_dir=r"\\192.168.0.11\T.I\@Provisionador\packs",
             shortcut=ShortcutConfig(name="NextSI UltraArt", target_exe="NextSIClient.exe")
         ),
     ])
 
     office_installer: InstallerConfig = field(default_factory=lambda: InstallerConfig(
-        path=r"\\192.168.0.11\t.i\@Instaladores de Formatação\@PROGRAMAS E UTILITÁRIOS\Microsoft Office 2013 (Pacote Standard)\Microsoft Office 2013 (Standard SP.01)\Microsoft Office 2013 - x64\setup.exe"
+        path=r"\\192.168.0.11\t.i\@Instaladores de Formatação\@PROGRAMAS E UTILITÁRIOS\Microsoft Office 2013 (Pacote Standard)\Microsoft Office 2013 (Standard SP.01)\Microsoft Office 2013 - x64\setup.exe",
+        cache="tree",
+        detect="Microsoft Office Standard 2013"
     ))
 
     office16_365_installer: InstallerConfig = field(default_factory=lambda: InstallerConfig(
-        path=r"\\192.168.0.11\t.i\@Instaladores de Formatação\@PROGRAMAS E UTILITÁRIOS\Microsoft Office 2016 (Pacote 365)\Microsoft Office (Pacote365)\OfficeSetup.exe"
+        path=r"\\192.168.0.11\t.i\@Instaladores de Formatação\@PROGRAMAS E UTILITÁRIOS\Microsoft Office 2016 (Pacote 365)\Microsoft Office (Pacote365)\OfficeSetup.exe",
+        # Só as edições corporativas: o "Microsoft 365 - pt-br" de fábrica (OEM, Click-to-Run) não conta
+        detect="Microsoft 365 Apps for|Microsoft Office 365 ProPlus|Microsoft Office 365 Business"
     ))
 
     sql_native_client_installer: InstallerConfig = field(default_factory=lambda: InstallerConfig(
-        path=r"\\192.168.0.11\T.I\@Instaladores de Formatação\@PROGRAMAS E UTILITÁRIOS\@Instaladores Padrão x64\sqlncli_2012_x64.msi"
+        path=r"\\192.168.0.11\T.I\@Instaladores de Formatação\@PROGRAMAS E UTILITÁRIOS\@Instaladores Padrão x64\sqlncli_2012_x64.msi",
+        detect="SQL Server 2012 Native Client"
     ))
 
     # Chocolatey packages: (package_id, arguments)
@@ -60,6 +92,40 @@ class AppConfig:
         ("anydesk", "--params \"'/INSTALL'\""),
         ("microsoft-teams-new-install", ""),
     ])
+    # Instala pacotes com os mesmos argumentos em uma única chamada do choco
+    choco_batch_install: bool = True
+    # Snapshot JSON do inventário instalado (testes fora do Windows). Vazio = registro + pasta lib
+    inventory_snapshot: str = ""
+    # Espelho offline de .nupkg com instaladores internalizados (main.py --build-choco-mirror);
+    # usado antes do feed da comunidade
+    choco_mirror_dir: str = r"\\192.168.0.11\T.I\@Provisionador\choco-mirror"
+    # Compressão dos pacotes de pastas: "tar.gz" (extração mais rápida), "tar.xz" (menor) ou "zip"
+    pack_format: str = "tar.gz"
+
+    # Trace de cada execução (trace_*.json em log_dir; abre em chrome://tracing ou ui.perfetto.dev)
+    trace_enabled: bool = True
+
+    # Hosts PowerShell persistentes reaproveitados entre comandos (0 = um processo por comando)
+    powershell_pool_size: int = 2
+
+    # Etapas independentes da Instalação Completa rodam em paralelo até este limite
+    install_max_workers: int = 3
+
+    # Tempo máximo (s) de cada etapa da Instalação Completa; 0 ou ausente = sem limite.
+    # Etapa (ou comando dela) encerrada por tempo não inicia mais nenhum processo.
+    step_timeouts: Dict[str, int] = field(default_factory=lambda: {
+        "chocolatey": 3600,
+        "sqlncli": 900,
+        "folders": 0,
+        "office": 5400,
+        "power": 120,
+        "shortcut": 120,
+        "anydesk": 300,
+    })
+    # Tempo máximo (s) de um único comando externo (PowerShell, instalador, choco); 0 = sem limite
+    command_timeout: int = 3600
+    # Processo sem saída e sem uso de CPU por este tempo (s) é considerado travado; 0 desativa
+    hang_timeout: int = 600
 
     webapp_url: str = "http://192.168.0.15"
     webapp_name: str = "NextBP Sistema"
@@ -76,6 +142,12 @@ class AppConfig:
             raise ValueError("default_domain não pode ser vazio")
         if not self.log_dir:
             raise ValueError("log_dir não pode ser vazio")
+        if self.install_max_workers < 1:
+            raise ValueError("install_max_workers deve ser >= 1")
+        if self.command_timeout < 0 or self.hang_timeout < 0:
+            raise ValueError("command_timeout e hang_timeout devem ser >= 0")
+        if self.pack_format not in ("tar.xz", "tar.gz", "zip"):
+            raise ValueError(f"pack_format inválido: {self.pack_format}")
 
 # Instância global
 CONFIG = AppConfig()
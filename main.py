@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 """Provisionador Corporativo v2.0 — Automação pós-formatação Windows."""
+import atexit
 import os
 import sys
 import time
@@ -17,6 +18,7 @@ if sys.stderr.encoding.lower() != 'utf-8':
 
 from utils.common import is_admin, clear_screen, pause, get_terminal_width, smooth_transition
 from utils.logger import get_logger
+from utils.trace import get_tracer
 from utils.console import console, print_error, print_info, print_warning, ask_input
 from config import CONFIG, VERSION
 from rich.panel import Panel
@@ -32,9 +34,11 @@ from modules.install import (
     install_office,
     configure_power_plan,
     create_webapp_shortcut,
-    launch_anydesk
+    launch_anydesk,
+    prewarm_installer_cache
 )
 from modules.diagnostics import run_full_diagnostics, open_logs_folder
+from modules.profiles import validate_profile
 
 LOGO_LINES = [
     "██████╗ ██████╗  ██████╗ ██╗   ██╗██╗███████╗██╗ ██████╗ ███╗   ██╗ █████╗ ██████╗  ██████╗ ██████╗ ",
@@ -104,21 +108,22 @@ def _check_unc_available() -> bool:
 
 
 def _get_last_provisioning() -> str:
-    """Retorna info do último provisionamento ou None."""
-    from pathlib import Path
+    """Retorna info do último provisionamento ou None (consulta o histórico, sem varrer os logs)."""
     import datetime
+    from utils.history import get_history
 
-    log_dir = Path(CONFIG.log_dir)
-    if not log_dir.exists():
+    history = get_history()
+    last = history.last_run("install") if history else None
+    if not last:
         return None
 
-    logs = sorted(log_dir.glob("provisioning_*.log"), key=lambda p: p.stat().st_mtime, reverse=True)
-    if not logs:
-        return None
-
-    last = logs[0]
-    mtime = datetime.datetime.fromtimestamp(last.stat().st_mtime)
-    return mtime.strftime("%d/%m/%Y às %H:%M")
+    when = datetime.datetime.fromisoformat(last["ended_at"] or last["started_at"])
+    text = when.strftime("%d/%m/%Y às %H:%M")
+    if last["status"] is None and last["ended_at"] is None:
+        text += " (interrompido)"
+    elif last["failed"]:
+        text += f" ({last['failed']} falha(s))"
+    return text
 
 
 def get_system_info() -> dict:
@@ -214,6 +219,7 @@ def show_menu():
         ("", "📦  INSTALAÇÃO", ""),
         ("2", "Instalação Completa", f"Tudo automatizado  {status_line}"),
         ("3", "Instalações Avulsas", "Escolha individual"),
+        ("6", "Retomar Instalação", "Continua a última Instalação Completa"),
         ("", "", ""),
 
         # Utilidades
@@ -332,6 +338,17 @@ def main_menu():
                 print_error(f"Erro crítico: {e}")
             pause("Pressione ENTER para voltar ao menu...")
 
+        elif opcao == '6':
+            clear_screen()
+            try:
+                run_full_install(resume=True)
+            except KeyboardInterrupt:
+                print_warning("\nInstalação cancelada pelo usuário.")
+            except Exception as e:
+                logger.error(f"Erro na Etapa 2: {e}")
+                print_error(f"Erro crítico: {e}")
+            pause("Pressione ENTER para voltar ao menu...")
+
         elif opcao == '3':
             try:
                 submenu_avulso_loop()
@@ -403,26 +420,29 @@ def _load_profile(path: str) -> dict:
         print_error(f"JSON inválido: {e}")
         sys.exit(1)
 
-    required = ["hostname", "admin_user"]
-    missing = [k for k in required if not profile.get(k)]
-    if missing:
-        print_error(f"Campos obrigatórios ausentes no perfil: {', '.join(missing)}")
+    errors = validate_profile(profile)
+    if errors:
+        for error in errors:
+            print_error(f"Perfil {path}: {error}")
         sys.exit(1)
 
     return profile
 
 
-def run_unattended(profile: dict):
-    """Executa provisionamento completo sem interação."""
+def run_unattended(profile: dict, resume: bool = False):
+    """Executa provisionamento completo sem interação.
+
+    resume: pula a Etapa 1 e retoma a Etapa 2 a partir do diário.
+    """
     logger = get_logger()
-    logger.info(f"Modo automático: {profile.get('hostname')}")
+    logger.info(f"Modo automático: {profile.get('hostname')}" + (" (retomada)" if resume else ""))
 
     console.print(Panel(
         f"[bold]Modo Piloto Automático[/]\n\n"
         f"Hostname:  [primary]{profile['hostname']}[/]\n"
         f"Domínio:   [cyan]{profile.get('domain', CONFIG.default_domain)}[/]\n"
         f"Usuário:   [warning]{profile['admin_user']}[/]\n"
-        f"Office:    [info]{profile.get('install_office', 'pular')}[/]\n"
+        f"Office:    [info]{profile.get('install_office') or 'pular'}[/]\n"
         f"Pular:     [dim]{', '.join(profile.get('skip_steps', [])) or 'nenhuma'}[/]",
         title="[bold cyan]✈ UNATTENDED[/]",
         border_style="cyan",
@@ -430,6 +450,15 @@ def run_unattended(profile: dict):
     ))
     console.print()
 
+    if resume:
+        run_full_install(
+            skip_steps=profile.get("skip_steps", []),
+            office_version=profile.get("install_office") or "",
+            resume=True,
+        )
+        logger.success("Modo automático concluído.")
+        return
+
     # Etapa 1: Identidade
     ok = run_identity_setup(
         hostname=profile["hostname"],
@@ -448,7 +477,7 @@ def run_unattended(profile: dict):
     # Etapa 2: Instalação
     run_full_install(
         skip_steps=profile.get("skip_steps", []),
-        office_version=profile.get("install_office", ""),
+        office_version=profile.get("install_office") or "",
     )
 
     logger.success("Modo automático concluído.")
@@ -463,6 +492,41 @@ def parse_args():
         metavar="PERFIL",
         help="Executa em modo automático com o perfil JSON informado"
     )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Retoma a última Instalação Completa interrompida (pula as etapas já concluídas)"
+    )
+    parser.add_argument(
+        "--profiles-from-csv",
+        metavar="CSV",
+        help="Valida o CSV de inventário e gera um perfil JSON por máquina (veja --profiles-dir) e sai"
+    )
+    parser.add_argument(
+        "--profiles-dir",
+        metavar="PASTA",
+        default="profiles",
+        help="Pasta de saída de --profiles-from-csv (padrão: profiles)"
+    )
+    parser.add_argument(
+        "--build-choco-mirror",
+        metavar="PASTA",
+        nargs="?",
+        const="",
+        help="Atualiza o espelho offline do Chocolatey (padrão: choco_mirror_dir) e sai"
+    )
+    parser.add_argument(
+        "--publish-packs",
+        metavar="PASTA",
+        nargs="?",
+        const="",
+        help="Gera/atualiza os pacotes compactados das pastas da rede (padrão: pack_dir de cada pasta) e sai"
+    )
+    parser.add_argument(
+        "--prewarm-cache",
+        action="store_true",
+        help="Copia os instaladores da rede para o cache local e sai"
+    )
     return parser.parse_args()
 
 
@@ -483,11 +547,30 @@ def main():
             pass
 
     args = parse_args()
+    # Trace da execução em log_dir mesmo se ela terminar por erro ou Ctrl+C
+    atexit.register(get_tracer().save)
 
     try:
-        if args.auto:
+        if args.profiles_from_csv:
+            from modules.profiles import generate_profiles
+            ok = generate_profiles(args.profiles_from_csv, args.profiles_dir)
+            sys.exit(0 if ok else 1)
+        elif args.build_choco_mirror is not None:
+            from modules.choco_mirror import build_choco_mirror
+            ok = build_choco_mirror(args.build_choco_mirror or None)
+            sys.exit(0 if ok else 1)
+        elif args.publish_packs is not None:
+            from modules.folder_packs import publish_folder_packs
+            ok = publish_folder_packs(args.publish_packs or None)
+            sys.exit(0 if ok else 1)
+        elif args.prewarm_cache:
+            ok = prewarm_installer_cache()
+            sys.exit(0 if ok else 1)
+        elif args.auto:
             profile = _load_profile(args.auto)
-            run_unattended(profile)
+            run_unattended(profile, resume=args.resume)
+        elif args.resume:
+            run_full_install(resume=True)
         else:
             main_menu()
     except KeyboardInterrupt:
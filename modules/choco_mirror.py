@@ -0,0 +1,247 @@
+"""Espelho offline de pacotes Chocolatey (.nupkg) em pasta de rede ou local.
+
+Os pacotes da comunidade só trazem o script de instalação; o instalador em si
+é baixado do fabricante durante o `choco install`. Por isso o espelho também
+internaliza os instaladores: as URLs encontradas em tools/*.ps1 são baixadas
+para installers/<pacote>/<versão>/ e o script do .nupkg espelhado passa a
+apontar para esses arquivos (o Chocolatey copia caminhos locais/UNC em vez de baixar).
+"""
+import json
+import os
+import re
+import shutil
+import urllib.parse
+import urllib.request
+import xml.etree.ElementTree as ET
+import zipfile
+from typing import Dict, List, Optional
+
+from config import CONFIG
+from utils.console import print_step
+from utils.logger import get_logger
+
+COMMUNITY_FEED = "https://community.chocolatey.org/api/v2"
+INDEX_FILE = "mirror.json"
+INSTALLERS_DIR = "installers"
+
+# URLs de instaladores nos scripts dos pacotes (aspas simples, duplas ou sem aspas)
+_INSTALLER_URL_RE = re.compile(r"https?://[^\s'\"`<>]+\.(?:exe|msi|msix|msixbundle|msu|zip|7z)\b", re.I)
+
+_NS = {
+    "atom": "http://www.w3.org/2005/Atom",
+    "d": "http://schemas.microsoft.com/ado/2007/08/dataservices",
+    "m": "http://schemas.microsoft.com/ado/2007/08/dataservices/metadata",
+}
+
+
+def _http_get(url: str, timeout: int = 60) -> bytes:
+    request = urllib.request.Request(url, headers={"User-Agent": "Provisionador"})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return response.read()
+
+
+def _download(url: str, path: str, timeout: int = 600) -> int:
+    """Baixa url para path (via .tmp, sem carregar tudo em memória). Retorna o tamanho."""
+    request = urllib.request.Request(url, headers={"User-Agent": "Provisionador"})
+    with urllib.request.urlopen(request, timeout=timeout) as response, open(path + ".tmp", "wb") as f:
+        shutil.copyfileobj(response, f, 1024 * 1024)
+    os.replace(path + ".tmp", path)
+    return os.path.getsize(path)
+
+
+def latest_version(package_id: str, feed: str = COMMUNITY_FEED) -> Optional[str]:
+    """Versão mais recente publicada no feed (OData v2), ou None se o pacote não existir."""
+    query = urllib.parse.urlencode({"id": f"'{package_id}'", "$filter": "IsLatestVersion"})
+    root = ET.fromstring(_http_get(f"{feed}/FindPackagesById()?{query}"))
+    for entry in root.findall("atom:entry", _NS):
+        version = entry.find("m:properties/d:Version", _NS)
+        if version is not None and version.text:
+            return version.text
+    return None
+
+
+def nupkg_dependencies(path: str) -> List[str]:
+    """IDs das dependências declaradas no .nuspec de um .nupkg."""
+    with zipfile.ZipFile(path) as z:
+        nuspec = next((n for n in z.namelist() if n.endswith(".nuspec") and "/" not in n), None)
+        if nuspec is None:
+            return []
+        root = ET.fromstring(z.read(nuspec))
+    return [el.get("id") for el in root.iter() if el.tag.endswith("dependency") and el.get("id")]
+
+
+def nupkg_name(package_id: str, version: str) -> str:
+    """Nome de arquivo esperado pelo choco em uma fonte de pasta local."""
+    return f"{package_id.lower()}.{version}.nupkg"
+
+
+def _installer_name(url: str) -> str:
+    return os.path.basename(urllib.parse.unquote(urllib.parse.urlparse(url).path))
+
+
+def installer_urls(script: str) -> List[str]:
+    """URLs fixas de instaladores em um script de pacote (sem repetições, na ordem em que aparecem).
+
+    URLs montadas com variáveis do PowerShell ($versao etc.) não são resolvíveis
+    e ficam de fora — essas continuam sendo baixadas na instalação.
+    """
+    urls = []
+    for match in _INSTALLER_URL_RE.finditer(script):
+        url = match.group(0)
+        if "$" not in url and url not in urls:
+            urls.append(url)
+    return urls
+
+
+def internalize_nupkg(path: str, installers_dir: str) -> List[str]:
+    """Baixa os instaladores referenciados em tools/*.ps1 e reescreve o .nupkg para usá-los.
+
+    Os instaladores vão para installers_dir (caminho que as máquinas enxergam,
+    ex: a pasta UNC do espelho); as URLs no script viram esse caminho. Assinatura
+    do pacote (.signature.p7s), se houver, é descartada — o conteúdo mudou.
+    Retorna os nomes dos instaladores internalizados (vazio = nada a fazer).
+    """
+    logger = get_logger()
+    with zipfile.ZipFile(path) as z:
+        entries = [(info, z.read(info)) for info in z.infolist()]
+
+    replacements = {}
+    for info, data in entries:
+        name = info.filename.lower()
+        if not (name.startswith("tools/") and name.endswith(".ps1")):
+            continue
+        script = data.decode("utf-8-sig", errors="replace")
+        for url in installer_urls(script):
+            if url not in replacements:
+                name = _installer_name(url)
+                # Mesmo nome de arquivo em URLs diferentes (ex: 32/64 bits em pastas distintas)
+                if name in {os.path.basename(t) for t in replacements.values()}:
+                    name = f"{len(replacements)}-{name}"
+                replacements[url] = os.path.join(installers_dir, name)
+        if re.search(r"https?://[^\s'\"]*\$", script):
+            logger.warning(f"Espelho: {os.path.basename(path)} monta URLs com variáveis em "
+                           f"{info.filename}; essas continuam baixando do fabricante.")
+
+    if not replacements:
+        return []
+
+    os.makedirs(installers_dir, exist_ok=True)
+    for url, target in replacements.items():
+        if not os.path.exists(target):
+            size = _download(url, target)
+            logger.info(f"Espelho: instalador {os.path.basename(target)} ({size / 1024 / 1024:.1f} MB)")
+
+    with zipfile.ZipFile(path + ".tmp", "w", zipfile.ZIP_DEFLATED) as z:
+        for info, data in entries:
+            name = info.filename.lower()
+            if name == ".signature.p7s":
+                continue
+            if name.startswith("tools/") and name.endswith(".ps1"):
+                script = data.decode("utf-8-sig", errors="replace")
+                for url, target in replacements.items():
+                    script = script.replace(url, target)
+                data = script.encode("utf-8-sig")
+            z.writestr(info, data)
+    os.replace(path + ".tmp", path)
+    return [os.path.basename(target) for target in replacements.values()]
+
+
+def _load_index(mirror_dir: str) -> Dict[str, dict]:
+    try:
+        with open(os.path.join(mirror_dir, INDEX_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def _save_index(mirror_dir: str, index: Dict[str, dict]):
+    path = os.path.join(mirror_dir, INDEX_FILE)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=2, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+
+def _mirror_package(package_id: str, mirror_dir: str, index: Dict[str, dict]) -> Optional[str]:
+    """Atualiza um pacote no espelho se a versão mudou. Retorna o caminho do .nupkg."""
+    logger = get_logger()
+    key = package_id.lower()
+    version = latest_version(package_id)
+    if not version:
+        logger.warning(f"Espelho: {package_id} não encontrado no feed.")
+        return None
+
+    path = os.path.join(mirror_dir, nupkg_name(package_id, version))
+    entry = index.get(key)
+    # Índices antigos guardavam só a versão (pacote sem instaladores internalizados)
+    if isinstance(entry, dict) and entry.get("version") == version and os.path.exists(path):
+        logger.info(f"Espelho: {package_id} v{version} já atualizado.")
+        return path
+
+    size = _download(f"{COMMUNITY_FEED}/package/{package_id}/{version}", path)
+    installers = internalize_nupkg(path, os.path.join(mirror_dir, INSTALLERS_DIR, key, version))
+
+    # Remove a versão anterior do mesmo pacote (e os instaladores dela)
+    old = entry.get("version") if isinstance(entry, dict) else entry
+    if old and old != version:
+        try:
+            os.remove(os.path.join(mirror_dir, nupkg_name(package_id, old)))
+        except OSError:
+            pass
+        shutil.rmtree(os.path.join(mirror_dir, INSTALLERS_DIR, key, old), ignore_errors=True)
+
+    index[key] = {"version": version, "installers": installers}
+    detail = f", {len(installers)} instalador(es) internalizado(s)" if installers else ""
+    logger.success(f"Espelho: {package_id} v{version} ({size / 1024 / 1024:.1f} MB{detail})")
+    return path
+
+
+def build_choco_mirror(mirror_dir: str = None) -> bool:
+    """Baixa os .nupkg de CONFIG.choco_packages (e dependências) para o espelho.
+
+    Incremental: só baixa pacotes cuja versão publicada mudou desde a última execução.
+    Os instaladores são internalizados com caminhos sob mirror_dir, então use o
+    mesmo caminho pelo qual as máquinas acessam o espelho (padrão: choco_mirror_dir).
+    """
+    logger = get_logger()
+    mirror_dir = mirror_dir or CONFIG.choco_mirror_dir
+    print_step(f"Atualizando espelho Chocolatey em {mirror_dir}...")
+
+    try:
+        os.makedirs(mirror_dir, exist_ok=True)
+    except OSError as e:
+        logger.error(f"Espelho inacessível: {e}")
+        return False
+
+    index = _load_index(mirror_dir)
+    pending = [entry[0] if isinstance(entry, (list, tuple)) else entry for entry in CONFIG.choco_packages]
+    done = set()
+    all_ok = True
+
+    while pending:
+        package_id = pending.pop(0)
+        if package_id.lower() in done:
+            continue
+        done.add(package_id.lower())
+
+        try:
+            path = _mirror_package(package_id, mirror_dir, index)
+        except Exception as e:
+            logger.error(f"Espelho: falha em {package_id}: {e}")
+            all_ok = False
+            continue
+
+        if path:
+            pending.extend(dep for dep in nupkg_dependencies(path) if dep.lower() not in done)
+        else:
+            all_ok = False
+
+    _save_index(mirror_dir, index)
+    return all_ok
+
+
+def mirror_source() -> Optional[str]:
+    """Pasta do espelho se estiver acessível e populada; senão None."""
+    mirror_dir = getattr(CONFIG, "choco_mirror_dir", "")
+    if not mirror_dir or not os.path.exists(os.path.join(mirror_dir, INDEX_FILE)):
+        return None
+    return mirror_dir
@@ -1,12 +1,19 @@
 """Diagnósticos do sistema: chocolatey, rede, caminhos UNC."""
+import asyncio
+import datetime
+import functools
 import os
-import subprocess
-from utils.console import console, print_header, print_step, print_success, print_error, print_warning, print_info
+import time
+from utils.console import console, print_header, print_step, print_success, print_error, print_warning, print_info, status
 from rich.table import Table
 from rich.panel import Panel
 from config import CONFIG
 from utils.logger import get_logger
-from utils.powershell import run_powershell
+from utils.aio import run_sync, run_process_async, run_powershell_async, to_thread
+from utils.process import TIMEOUT_RC
+from utils.trace import get_tracer, span
+from utils.history import get_history
+from utils import events
 
 
 DIAGNOSTIC_LABELS = {
@@ -23,24 +30,32 @@ def run_full_diagnostics():
 
     print_header("DIAGNÓSTICO DO SISTEMA")
     console.print("[dim]Executando verificações...[/]\n")
+    events.emit(events.RUN_START, kind="diagnostics")
+    start = time.time()
+
+    # Sondagens em paralelo (a espera por caminhos UNC fora do ar domina o tempo); relatório em ordem
+    with status("[primary]Verificando chocolatey, rede e caminhos UNC...[/]"), span("Diagnóstico", "diagnostico"):
+        probes = run_sync(_probe_all())
 
     results = {
-        "chocolatey": check_chocolatey(),
-        "network": check_network(),
-        "unc_paths": check_unc_paths(),
+        "chocolatey": report_chocolatey(probes["chocolatey"]),
+        "network": report_network(probes["network"]),
+        "unc_paths": report_unc_paths(probes["unc_paths"]),
     }
 
     passed = sum(1 for v in results.values() if v)
     total = len(results)
+    for name, ok in results.items():
+        events.emit(events.DIAGNOSTIC, step=name, duration=_probe_elapsed.pop(name, None), check=name, ok=ok)
 
     # Diagnostic Table
     table = Table(box=None, padding=(0, 2), expand=True)
     table.add_column("Item", style="bold")
     table.add_column("Status", justify="right")
 
-    for name, status in results.items():
+    for name, ok in results.items():
         label = DIAGNOSTIC_LABELS.get(name, name.upper())
-        status_text = "[success]✓ OK[/]" if status else "[error]✗ FALHA[/]"
+        status_text = "[success]✓ OK[/]" if ok else "[error]✗ FALHA[/]"
         table.add_row(label, status_text)
 
     # Health Bar (Visual)
@@ -59,6 +74,7 @@ def run_full_diagnostics():
         padding=(1, 2)
     ))
     console.print()
+    _report_last_install()
 
     if passed == total:
         print_success(f"Todos os {total} testes passaram!")
@@ -67,90 +83,160 @@ def run_full_diagnostics():
         print_warning(f"{passed}/{total} testes passaram.")
         logger.warning(f"Diagnóstico: {passed}/{total} testes passaram.")
 
+    events.emit(events.RUN_END, kind="diagnostics", duration=time.time() - start, passed=passed, total=total)
+    get_tracer().save()
     return passed == total
 
 
-def check_chocolatey() -> bool:
-    """Verifica se o Chocolatey está disponível."""
-    print_step("Verificando Chocolatey...")
+def _report_last_install():
+    """Resumo da última Instalação Completa registrada no histórico (etapas com falha)."""
+    history = get_history()
+    last = history.last_run("install") if history else None
+    if not last:
+        return
+    when = datetime.datetime.fromisoformat(last["ended_at"] or last["started_at"]).strftime("%d/%m/%Y %H:%M")
+    failed = [s["step"] for s in history.steps(last["id"]) if s["status"] == "fail"]
+    if last["ended_at"] is None:
+        print_warning(f"Última instalação ({when}) foi interrompida.")
+    elif failed:
+        print_warning(f"Última instalação ({when}) com falha em: {', '.join(failed)}")
+    else:
+        print_info(f"Última instalação: {when} ({last['duration_s'] or 0:.0f}s)")
+
+
+# Duração (s) da última execução de cada sondagem, para os eventos "diagnostic"
+_probe_elapsed = {}
+
+
+def _traced(name: str):
+    """Span de uma sondagem async, em linha do tempo própria (as sondagens rodam juntas no loop)."""
+    def decorator(probe):
+        @functools.wraps(probe)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            with span(DIAGNOSTIC_LABELS[name], "diagnostico", lane=f"diagnóstico: {name}") as trace_args:
+                result = await probe(*args, **kwargs)
+                trace_args["result"] = repr(result)
+            _probe_elapsed[name] = time.perf_counter() - start
+            return result
+        return wrapper
+    return decorator
 
-    choco_exe = os.path.join(
+
+async def _probe_all() -> dict:
+    chocolatey, network, unc_paths = await asyncio.gather(
+        probe_chocolatey(), probe_network(), probe_unc_paths()
+    )
+    return {"chocolatey": chocolatey, "network": network, "unc_paths": unc_paths}
+
+
+def _choco_exe() -> str:
+    return os.path.join(
         os.environ.get("PROGRAMDATA", r"C:\ProgramData"), "chocolatey", "bin", "choco.exe"
     )
 
+
+@_traced("chocolatey")
+async def probe_chocolatey() -> tuple:
+    """(código, versão ou erro); código None se o choco.exe não existir."""
+    choco_exe = _choco_exe()
     if not os.path.exists(choco_exe):
+        return None, ""
+    try:
+        return_code, stdout, stderr = await run_process_async([choco_exe, "--version"], timeout=15)
+    except Exception as e:
+        return -1, str(e)
+    return return_code, stdout.strip() if return_code == 0 else stderr.strip()
+
+
+def report_chocolatey(probe: tuple) -> bool:
+    print_step("Verificando Chocolatey...")
+    return_code, text = probe
+
+    if return_code is None:
         print_error("Chocolatey não encontrado no sistema.")
         print_info("Será instalado automaticamente na primeira instalação.")
         return False
-
-    try:
-        result = subprocess.run(
-            [choco_exe, "--version"],
-            capture_output=True, text=True, timeout=15
-        )
-        if result.returncode == 0:
-            print_success(f"Chocolatey encontrado: v{result.stdout.strip()}")
-            return True
-        else:
-            print_error("Chocolatey não está funcionando corretamente.")
-            return False
-    except subprocess.TimeoutExpired:
+    if return_code == 0:
+        print_success(f"Chocolatey encontrado: v{text}")
+        return True
+    if return_code == TIMEOUT_RC:
         print_error("Timeout ao verificar Chocolatey.")
-        return False
-    except Exception as e:
-        print_error(f"Erro ao verificar Chocolatey: {e}")
-        return False
+    elif return_code == -1:
+        print_error(f"Erro ao verificar Chocolatey: {text}")
+    else:
+        print_error("Chocolatey não está funcionando corretamente.")
+    return False
 
 
-def check_network() -> bool:
-    """Verifica conectividade de rede."""
-    print_step("Verificando conectividade de rede...")
+def check_chocolatey() -> bool:
+    """Verifica se o Chocolatey está disponível."""
+    return report_chocolatey(run_sync(probe_chocolatey()))
+
 
-    return_code, stdout, _ = run_powershell(
-        "Test-Connection -ComputerName 8.8.8.8 -Count 1 -Quiet"
+@_traced("network")
+async def probe_network() -> bool:
+    return_code, stdout, _ = await run_powershell_async(
+        "Test-Connection -ComputerName 8.8.8.8 -Count 1 -Quiet", timeout=30
     )
+    return return_code == 0 and "True" in stdout
 
-    if return_code == 0 and "True" in stdout:
+
+def report_network(online: bool) -> bool:
+    print_step("Verificando conectividade de rede...")
+    if online:
         print_success("Conectividade de rede OK.")
-        return True
     else:
         print_warning("Sem acesso à Internet (pode funcionar na rede local).")
-        return True  # Não é crítico para rede local
+    return True  # Não é crítico para rede local
 
 
-def check_unc_paths() -> bool:
-    """Verifica acesso aos caminhos UNC configurados."""
-    print_step("Verificando caminhos de rede (UNC)...")
-
-    folders = CONFIG.unc_folders_to_copy
-
-    if not folders:
-        print_info("Nenhuma pasta UNC configurada.")
-        return True
-
-    all_ok = True
+def check_network() -> bool:
+    """Verifica conectividade de rede."""
+    return report_network(run_sync(probe_network()))
 
-    for cfg in folders:
-        if os.path.exists(cfg.source):
-            print_success(f"{cfg.source}")
-        else:
-            print_error(f"{cfg.source} — [dim]Inacessível[/]")
-            all_ok = False
 
+def _unc_targets() -> list:
+    targets = [(cfg.source, cfg.source) for cfg in CONFIG.unc_folders_to_copy]
     # Verifica instaladores do Office
     office_configs = [
         ("Office 2013", CONFIG.office_installer),
         ("Office 365", CONFIG.office16_365_installer)
     ]
+    targets += [(f"{label} installer", cfg.path) for label, cfg in office_configs if cfg.path]
+    return targets
+
 
-    for label, cfg in office_configs:
-        office_path = cfg.path
-        if office_path:
-            if os.path.exists(office_path):
-                print_success(f"{label} installer")
-            else:
-                print_error(f"{label} — [dim]Caminho inacessível[/]")
-                all_ok = False
+def _path_exists(path: str) -> bool:
+    with span(path, "diagnostico"):
+        return os.path.exists(path)
+
+
+@_traced("unc_paths")
+async def probe_unc_paths() -> list:
+    """[(rótulo, caminho, acessível)] — cada os.path.exists em sua própria thread."""
+    targets = _unc_targets()
+    found = await asyncio.gather(*(to_thread(_path_exists, path) for _, path in targets))
+    return [(label, path, ok) for (label, path), ok in zip(targets, found)]
+
+
+def report_unc_paths(probe: list) -> bool:
+    print_step("Verificando caminhos de rede (UNC)...")
+
+    if not CONFIG.unc_folders_to_copy:
+        print_info("Nenhuma pasta UNC configurada.")
+        return True
+
+    all_ok = True
+    for label, path, ok in probe:
+        if ok:
+            print_success(label)
+        elif label == path:
+            print_error(f"{path} — [dim]Inacessível[/]")
+            all_ok = False
+        else:
+            print_error(f"{label.replace(' installer', '')} — [dim]Caminho inacessível[/]")
+            all_ok = False
 
     if all_ok:
         print_success("Todos os caminhos de rede acessíveis.")
@@ -160,6 +246,11 @@ def check_unc_paths() -> bool:
     return all_ok
 
 
+def check_unc_paths() -> bool:
+    """Verifica acesso aos caminhos UNC configurados."""
+    return report_unc_paths(run_sync(probe_unc_paths()))
+
+
 def open_logs_folder():
     """Abre a pasta de logs no Explorer."""
     logger = get_logger()
@@ -0,0 +1,40 @@
+"""Publicação dos pacotes compactados das pastas da rede (main.py --publish-packs)."""
+import os
+
+from config import CONFIG
+from utils.console import print_step
+from utils.logger import get_logger
+from utils.packs import build_pack
+
+
+def publish_folder_packs(pack_dir: str = None) -> bool:
+    """Gera ou atualiza o pacote de cada pasta de CONFIG.unc_folders_to_copy.
+
+    pack_dir: sobrescreve FolderCopyConfig.pack_dir de todas as pastas.
+    Pastas sem pack_dir (e sem override) são ignoradas.
+    """
+    logger = get_logger()
+    all_ok = True
+
+    for cfg in CONFIG.unc_folders_to_copy:
+        target_dir = pack_dir or cfg.pack_dir
+        if not target_dir:
+            logger.info(f"Pacote: {cfg.source} sem pack_dir configurado — ignorada.")
+            continue
+
+        print_step(f"Empacotando {cfg.source} → {target_dir}...")
+        try:
+            manifest, rebuilt = build_pack(cfg.source, target_dir, CONFIG.pack_format)
+        except Exception as e:
+            logger.error(f"Pacote: falha em {cfg.source}: {e}")
+            all_ok = False
+            continue
+
+        size_mb = os.path.getsize(os.path.join(target_dir, manifest.archive)) / 1024 / 1024
+        if rebuilt:
+            logger.success(f"Pacote: {manifest.archive} ({manifest.files} arquivos, "
+                           f"{manifest.bytes / 1024 / 1024:.1f} MB → {size_mb:.1f} MB)")
+        else:
+            logger.info(f"Pacote: {manifest.archive} já atualizado.")
+
+    return all_ok
@@ -4,6 +4,7 @@ import time
 from config import CONFIG
 from utils.powershell import run_powershell
 from utils.logger import get_logger
+from utils import events
 from utils.console import console, print_header, print_step, print_info, print_error, print_warning, ask_input, confirm_action
 from rich.table import Table
 from rich.panel import Panel
@@ -11,21 +12,29 @@ from rich.live import Live
 from rich.text import Text
 
 
+# Compilados uma vez: a geração em lote (modules/profiles.py) valida centenas de linhas
+_HOSTNAME_RE = re.compile(r'^[A-Za-z0-9](?:[A-Za-z0-9\-]{0,13}[A-Za-z0-9])?$')
+_DOMAIN_RE = re.compile(r'^[A-Za-z0-9](?:[A-Za-z0-9\-]*[A-Za-z0-9])?(?:\.[A-Za-z0-9](?:[A-Za-z0-9\-]*[A-Za-z0-9])?)+$')
+_ADMIN_USER_RES = (
+    re.compile(r'^[A-Za-z0-9\.\-_]+\\[A-Za-z0-9\.\-_]+$'),
+    re.compile(r'^[A-Za-z0-9\.\-_]+@[A-Za-z0-9\.\-]+$'),
+    re.compile(r'^[A-Za-z0-9\.\-_]+$'),
+)
+
+
 def _validate_hostname(name: str) -> bool:
     """Valida nome NetBIOS: 1-15 chars, alfanumérico + hífen, sem hífen nas extremidades."""
-    return bool(re.match(r'^[A-Za-z0-9](?:[A-Za-z0-9\-]{0,13}[A-Za-z0-9])?$', name))
+    return bool(_HOSTNAME_RE.match(name))
 
 
 def _validate_domain(domain: str) -> bool:
     """Valida formato FQDN (ex: empresa.local)."""
-    return bool(re.match(r'^[A-Za-z0-9](?:[A-Za-z0-9\-]*[A-Za-z0-9])?(?:\.[A-Za-z0-9](?:[A-Za-z0-9\-]*[A-Za-z0-9])?)+$', domain))
+    return bool(_DOMAIN_RE.match(domain))
 
 
 def _validate_admin_user(user: str) -> bool:
     """Valida formato usuario, DOMINIO\\usuario ou usuario@dominio."""
-    return bool(re.match(r'^[A-Za-z0-9\.\-_]+\\[A-Za-z0-9\.\-_]+$', user) or
-                re.match(r'^[A-Za-z0-9\.\-_]+@[A-Za-z0-9\.\-]+$', user) or
-                re.match(r'^[A-Za-z0-9\.\-_]+$', user))
+    return any(pattern.match(user) for pattern in _ADMIN_USER_RES)
 
 
 def _ask_validated(prompt: str, validator, error_msg: str, allow_empty: bool = False, default: str = None) -> str:
@@ -83,6 +92,7 @@ def run_identity_setup(hostname: str = None, domain: str = None,
         novo_nome = hostname
         if not _validate_hostname(novo_nome):
             print_error(f"Hostname '{novo_nome}' inválido no perfil.")
+            events.emit(events.IDENTITY, error="InvalidHostname", action="join", new_hostname=novo_nome)
             return False
     else:
         novo_nome = _ask_validated(
@@ -103,6 +113,7 @@ def run_identity_setup(hostname: str = None, domain: str = None,
 
     if not _validate_domain(dominio):
         print_error(f"Domínio '{dominio}' inválido. Formato esperado: empresa.local")
+        events.emit(events.IDENTITY, error="InvalidDomain", action="join", new_hostname=novo_nome, domain=dominio)
         return False
 
     # Usuário admin
@@ -110,6 +121,8 @@ def run_identity_setup(hostname: str = None, domain: str = None,
         usuario_admin = admin_user
         if not _validate_admin_user(usuario_admin):
             print_error(f"Usuário '{usuario_admin}' inválido no perfil.")
+            events.emit(events.IDENTITY, error="InvalidAdminUser", action="join", new_hostname=novo_nome,
+                        domain=dominio)
             return False
     else:
         usuario_admin = _ask_validated(
@@ -154,8 +167,12 @@ Write-Host "=========================================="
     print_step("Executando comandos PowerShell...")
     print_info("Uma janela de credenciais será exibida")
 
+    start = time.time()
     with console.status("[primary]Configurando identidade...[/]", spinner="dots"):
         return_code, stdout, stderr = run_powershell(ps_script, capture_output=False)
+    events.emit(events.IDENTITY, duration=time.time() - start, rc=return_code,
+                error="NonZeroExit" if return_code != 0 else None, action="join", new_hostname=novo_nome,
+                domain=dominio, unattended=unattended)
 
     if return_code != 0:
         logger.error(f"Falha na configuração. Código: {return_code}")
@@ -170,6 +187,7 @@ Write-Host "=========================================="
 
     if should_reboot:
         logger.info("Reinicialização solicitada.")
+        events.emit(events.IDENTITY, action="reboot", new_hostname=novo_nome, domain=dominio)
         with Live(refresh_per_second=4, console=console) as live:
             for i in range(5, 0, -1):
                 bar = "█" * i + "░" * (5 - i)
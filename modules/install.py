@@ -1,24 +1,49 @@
 """Etapa 2: Softwares e configurações pós-login AD."""
+import asyncio
 import os
+import re
+import shlex
 import shutil
-import subprocess
 import time
+from typing import List, Optional, Tuple
 
-from config import CONFIG
+from config import CONFIG, FolderCopyConfig
 from utils.console import console, print_header, print_step, print_success, print_error, print_warning, print_info, ask_input, confirm_action
-from utils.powershell import run_powershell
+from utils.console import shared_progress, progress_bar, status
+from utils.powershell import run_powershell, run_powershell_batch
 from utils.logger import get_logger
-from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TimeElapsedColumn
+from utils.process import (TIMEOUT_RC, StepExpired, check_step, run_process, spawn, stream_process,
+                           choco_progress, command_limits, last_line)
+from utils.scheduler import Step, run_steps
+from utils.aio import run_sync, stream_process_async, sync_tree_async, to_thread
+from utils.journal import JournalSession, get_journal
+from utils.trace import get_tracer, span
+from utils import events
+from utils.filecopy import default_copy_file, CopyError, SyncStats
+from utils.packs import extract_pack, fresh_pack, verify_extracted
+from utils.installer_cache import get_installer_cache
+from utils.staging import stage_file
+from utils.shelllink import ShortcutSpec, create_shortcuts
+from utils.inventory import get_installed_index, invalidate_installed_index
+from modules.choco_mirror import mirror_source
+from rich.console import Group
+from rich.markup import escape
 from rich.panel import Panel
 from rich.table import Table
 
 
 def _retry(func, max_attempts: int = 3, label: str = "operação"):
-    """Executa func com retry progressivo. Retorna o resultado ou levanta a última exceção."""
+    """Executa func com retry progressivo. Retorna o resultado ou levanta a última exceção.
+
+    Etapa encerrada por tempo (StepExpired) não é retentada.
+    """
     logger = get_logger()
     for attempt in range(1, max_attempts + 1):
+        check_step()
         try:
             return func()
+        except StepExpired:
+            raise
         except Exception as e:
             if attempt == max_attempts:
                 raise
@@ -27,6 +52,23 @@ def _retry(func, max_attempts: int = 3, label: str = "operação"):
             time.sleep(wait)
 
 
+async def _retry_async(func, max_attempts: int = 3, label: str = "operação"):
+    """Versão async de _retry: func é uma função que retorna a corrotina de cada tentativa."""
+    logger = get_logger()
+    for attempt in range(1, max_attempts + 1):
+        check_step()
+        try:
+            return await func()
+        except StepExpired:
+            raise
+        except Exception as e:
+            if attempt == max_attempts:
+                raise
+            wait = attempt * 2
+            logger.warning(f"{label}: tentativa {attempt}/{max_attempts} falhou — retry em {wait}s...")
+            await asyncio.sleep(wait)
+
+
 def _pre_flight_check() -> bool:
     """Verifica acessibilidade dos caminhos UNC antes de iniciar."""
     logger = get_logger()
@@ -55,64 +97,117 @@ STEP_KEYS = {
     "sqlncli": "SQL Native Client",
     "folders": "Pastas da Rede",
     "office": "Office",
+    "power": "Plano de Energia",
     "shortcut": "Atalho NextBP",
     "anydesk": "AnyDesk",
 }
 
 
-def run_full_install(skip_steps: list = None, office_version: str = None):
+def run_full_install(skip_steps: list = None, office_version: str = None, resume: bool = False):
     """Instalação completa pós-login no domínio.
 
-    skip_steps: lista de chaves a pular (chocolatey, folders, office, shortcut, anydesk).
+    skip_steps: lista de chaves a pular (chaves de STEP_KEYS).
     office_version: '2013', '365' ou '' para pular (modo automático).
+    resume: retoma a última instalação do diário, pulando as etapas já concluídas
+    e refazendo as interrompidas ou com falha.
     """
     logger = get_logger()
     start_time = time.time()
+    journal = get_journal()
+
+    previous = journal.last_session() if resume else None
+    if resume and previous is None:
+        print_info("Nenhuma instalação anterior encontrada no diário. Iniciando do zero.")
+    if previous is not None:
+        # Retomada reaproveita as opções da execução original
+        if skip_steps is None:
+            skip_steps = previous.options.get("skip", [])
+        if office_version is None:
+            office_version = previous.options.get("office_version")
+
     skip = set(skip_steps or [])
 
-    print_header("ETAPA 2: INSTALAÇÃO DE SOFTWARES")
+    print_header("ETAPA 2: INSTALAÇÃO DE SOFTWARES" + (" (RETOMADA)" if previous else ""))
 
     if not _pre_flight_check():
         print_warning("Instalação cancelada pelo usuário.")
         return False
 
+    done = {key for key in previous.results if previous.completed(key)} if previous else set()
+
+    # Seleção interativa acontece antes do agendador: etapas paralelas não podem pedir input
+    if "office" not in skip and "office" not in done and office_version is None:
+        office_version = _select_office_version()
+
+    # "msi": Windows Installer só aceita uma instalação por vez (erro 1618)
     all_steps = [
-        ("chocolatey", "Softwares (Chocolatey)", lambda: install_choco_packages(), "Chrome, WinRAR, Teams, AnyDesk"),
-        ("sqlncli", "SQL Native Client", lambda: install_sql_native_client(), "SQL Server Native Client 2012"),
-        ("folders", "Pastas da Rede", lambda: copy_network_folders(), "UNC → C:\\"),
-        ("office", "Office", lambda: install_office(office_version=office_version), "Instalação Opcional"),
-        ("power", "Plano de Energia", lambda: configure_power_plan(), "Anti-hibernação (High Performance)"),
-        ("shortcut", "Atalho NextBP", lambda: create_webapp_shortcut(), ""),
-        ("anydesk", "AnyDesk", lambda: launch_anydesk(), "Acesso não supervisionado"),
+        Step("chocolatey", "Softwares (Chocolatey)", lambda: install_choco_packages(),
+             "Chrome, WinRAR, Teams, AnyDesk", resources=["msi"]),
+        Step("sqlncli", "SQL Native Client", lambda: install_sql_native_client(),
+             "SQL Server Native Client 2012", resources=["msi"]),
+        Step("folders", "Pastas da Rede", lambda: copy_network_folders(), "UNC → C:\\"),
+        Step("office", "Office", lambda: install_office(office_version=office_version),
+             "Instalação Opcional", resources=["msi"]),
+        Step("power", "Plano de Energia", lambda: configure_power_plan(),
+             "Anti-hibernação (High Performance)"),
+        Step("shortcut", "Atalho NextBP", lambda: create_webapp_shortcut(), "Chrome --app",
+             depends_on=["chocolatey"]),
+        Step("anydesk", "AnyDesk", lambda: launch_anydesk(), "Acesso não supervisionado",
+             depends_on=["chocolatey"]),
     ]
 
-    steps = [(key, label, func, detail) for key, label, func, detail in all_steps if key not in skip]
+    planned = [step for step in all_steps if step.key not in skip]
+    steps = [step for step in planned if step.key not in done]
+    for step in steps:
+        step.timeout = CONFIG.step_timeouts.get(step.key) or None
 
     if skip:
         skipped_labels = [STEP_KEYS[s] for s in skip if s in STEP_KEYS]
         if skipped_labels:
             print_info(f"Pulando: {', '.join(skipped_labels)}")
+    if previous is not None:
+        if done:
+            print_info(f"Já concluídas: {', '.join(s.label for s in planned if s.key in done)}")
+        for key in previous.interrupted:
+            logger.warning(f"Etapa interrompida na execução anterior será refeita: {STEP_KEYS.get(key, key)}")
 
     console.print("[dim]Esta etapa irá:[/]")
-    for _, label, _, detail in steps:
-        if detail:
-            console.print(f"    [blue]•[/] {label} ([dim]{detail}[/])")
+    for step in steps:
+        if step.detail:
+            console.print(f"    [blue]•[/] {step.label} ([dim]{step.detail}[/])")
         else:
-            console.print(f"    [blue]•[/] {label}")
+            console.print(f"    [blue]•[/] {step.label}")
     console.print()
 
-    results = []
+    journal.begin({"skip": sorted(skip), "office_version": office_version}, resume=previous)
+    events.emit(events.RUN_START, kind="install", skip=sorted(skip), office_version=office_version,
+                resume=previous is not None, steps=[step.key for step in steps])
 
-    for _, label, func, detail in steps:
-        try:
-            ok = func()
-            results.append((label, ok, detail))
-        except Exception as e:
-            logger.error(f"Erro em {label}: {e}")
-            results.append((label, False, f"Erro: {e}"))
+    def _on_start(step):
+        journal.step_started(step)
+        events.emit(events.STEP_START, step=step.key)
+
+    def _on_finish(step, result):
+        journal.step_finished(step, result)
+        events.emit(events.STEP_END, step=step.key, duration=result.elapsed, error=result.error_class,
+                    status=result.status, timed_out=result.timed_out)
+
+    max_workers = getattr(CONFIG, "install_max_workers", 1)
+    with shared_progress(), span("Instalação completa", "instalacao", steps=len(steps),
+                                 resume=previous is not None):
+        run_steps(steps, max_workers=max_workers, on_start=_on_start, on_finish=_on_finish)
+
+    journal.end()
+
+    # Resumo reconstruído do diário: inclui etapas concluídas em execuções anteriores
+    results = _journal_summary(journal.last_session(), planned)
 
     elapsed = time.time() - start_time
     logger.success(f"Etapa 2 concluída em {elapsed:.0f}s!")
+    events.emit(events.RUN_END, kind="install", duration=elapsed,
+                ok=sum(1 for _, s, _ in results if s is True),
+                failed=sum(1 for _, s, _ in results if s is False or s == "timeout"),
+                skipped=sum(1 for _, s, _ in results if s is None))
 
     # Summary Table
     table = Table(box=None, padding=(0, 2), expand=True)
@@ -120,28 +215,82 @@ def run_full_install(skip_steps: list = None, office_version: str = None):
     table.add_column("Status", justify="right")
     table.add_column("Detalhes", style="dim white")
 
-    for label, status, detail in results:
-        if status is True:
+    for label, step_status, detail in results:
+        if step_status is True:
             status_text = "[success]✅ Sucesso[/]"
-        elif status is False:
+        elif step_status is False:
             status_text = "[error]❌ Falha[/]"
+        elif step_status == "timeout":
+            status_text = "[warning]⏱ Tempo esgotado[/]"
         else:
             status_text = "[warning]⏭ Pulado[/]"
 
         table.add_row(label, status_text, detail)
 
+    summary = table
+    if "folders" in {step.key for step in steps} and _copy_metrics:
+        summary = Group(table, "", _copy_metrics_table(_copy_metrics))
+
+    logger.flush()
     console.print()
     console.print(Panel(
-        table,
+        summary,
         title="[bold]INSTALAÇÃO CONCLUÍDA[/]",
         subtitle=f"[dim]Tempo total: {elapsed:.0f}s[/]",
         border_style="green",
         padding=(1, 2)
     ))
     console.print()
+    get_tracer().save()
 
     return True
 
+
+def _journal_summary(session: Optional[JournalSession], planned: List[Step]) -> List[Tuple[str, object, str]]:
+    """(rótulo, status, detalhe) de cada etapa planejada segundo o diário.
+
+    status: True/False, "timeout" ou None (não executada em nenhuma execução da sessão).
+    """
+    results = []
+    for step in planned:
+        record = session.results.get(step.key) if session else None
+        if record is None:
+            results.append((step.label, None, step.detail))
+        else:
+            results.append((record["label"], "timeout" if record.get("timed_out") else record["status"],
+                            record.get("detail", "")))
+    return results
+
+
+def _copy_metrics_table(metrics: list) -> Table:
+    """Tabela de vazão por pasta copiada (arquivos/s, MB/s, latência e arquivo mais lento)."""
+    table = Table(title="[dim]Cópia de pastas[/]", box=None, padding=(0, 2), expand=True)
+    table.add_column("Pasta", style="bold")
+    table.add_column("Arquivos", justify="right")
+    table.add_column("Pastas", justify="right")
+    table.add_column("MB", justify="right")
+    table.add_column("Arq/s", justify="right")
+    table.add_column("MB/s", justify="right")
+    table.add_column("p50/p95/p99 (ms)", justify="right")
+    table.add_column("Mais lento", style="dim white")
+
+    for m in metrics:
+        latency = m["latency_ms"]
+        slowest = m["slowest"][0] if m["slowest"] else None
+        slowest_text = f"{os.path.basename(slowest['path'])} ({slowest['ms']:.0f} ms)" if slowest else "-"
+        table.add_row(
+            m["folder"],
+            f"{m['files']} ({m['files_copied']} novos)",
+            str(m["dirs"]),
+            f"{m['bytes'] / (1024 * 1024):.1f}",
+            f"{m['files_per_s']:.0f}",
+            f"{m['mb_per_s']:.1f}",
+            f"{latency['p50']:.1f}/{latency['p95']:.1f}/{latency['p99']:.1f}",
+            escape(slowest_text),
+        )
+    return table
+
+
 CHOCO_BIN_DIR = os.path.join(
     os.environ.get("PROGRAMDATA", r"C:\ProgramData"), "chocolatey", "bin"
 )
@@ -151,7 +300,7 @@ CHOCO_EXE = os.path.join(CHOCO_BIN_DIR, "choco.exe")
 def _get_choco_cmd() -> str:
     """Retorna o caminho do choco.exe, preferindo o caminho completo."""
     if os.path.exists(CHOCO_EXE):
-        return f'"{CHOCO_EXE}"'
+        return CHOCO_EXE
     return "choco"
 
 
@@ -168,10 +317,11 @@ def ensure_chocolatey() -> bool:
 
     _refresh_path()
 
+    probe = ("Versão do Chocolatey", f'& "{CHOCO_EXE}" --version')
     if os.path.exists(CHOCO_EXE):
-        return_code, stdout, _ = run_powershell(f'"{CHOCO_EXE}" --version', capture_output=True)
-        if return_code == 0 and stdout.strip():
-            logger.info(f"Chocolatey já instalado: v{stdout.strip()}")
+        version = run_powershell_batch([probe])[0]
+        if version.ok and version.stdout.strip():
+            logger.info(f"Chocolatey já instalado: v{version.stdout.strip()}")
             return True
 
     logger.info("Chocolatey não encontrado. Instalando...")
@@ -184,18 +334,210 @@ def ensure_chocolatey() -> bool:
         "'https://community.chocolatey.org/install.ps1'))"
     )
 
-    with console.status("[primary]Instalando Chocolatey...[/]"):
-        return_code, _, stderr = run_powershell(install_cmd, capture_output=True)
+    # Instalação e conferência da versão no mesmo processo PowerShell
+    with status("[primary]Instalando Chocolatey...[/]"):
+        install, version = run_powershell_batch([("Instalação do Chocolatey", install_cmd), probe])
 
-    if return_code == 0:
+    if install.ok:
         _refresh_path()
-        logger.success("Chocolatey instalado com sucesso.")
+        detail = f" (v{version.stdout.strip()})" if version.ok and version.stdout.strip() else ""
+        logger.success(f"Chocolatey instalado com sucesso{detail}.")
         return True
     else:
-        logger.error(f"Falha ao instalar Chocolatey: {stderr}")
+        logger.error(f"Falha ao instalar Chocolatey: {install.stderr}")
         return False
 
 
+def _split_choco_entry(entry) -> tuple:
+    """Normaliza uma entrada de CONFIG.choco_packages em (package_id, extra_args)."""
+    if isinstance(entry, (list, tuple)):
+        return entry[0], entry[1]
+    return entry, ""
+
+
+def _choco_install_argv(choco: str, package_ids: list, extra_args: str = "", source: str = None) -> list:
+    """Monta a linha de comando do `choco install` para um ou mais pacotes.
+
+    source: fonte única (ex: pasta do espelho offline); None usa as fontes padrão.
+    Sem --no-progress: as linhas "Progress: x%" alimentam a barra de progresso.
+    """
+    argv = [choco, "install"] + list(package_ids) + ["-y", "--ignore-checksums"]
+    if source:
+        argv += ["--source", source]
+    if extra_args:
+        argv += shlex.split(extra_args)
+    return argv
+
+
+# Linhas da saída do choco usadas por _parse_choco_batch_output (retidas além da cauda)
+_CHOCO_RESULT_LINE = re.compile(r"successful|already installed|exit code|requiring reboot|^\s*- ", re.I)
+
+
+def _choco_progress_callback(progress, task, done: int):
+    """Converte o andamento do choco em atualizações da barra (fração do pacote atual)."""
+    def update(description, percent):
+        fields = {}
+        if description:
+            fields["description"] = f"[cyan]{escape(description)}...[/]"
+        if percent is not None:
+            fields["completed"] = done + min(percent, 100) / 100
+        progress.update(task, **fields)
+    return update
+
+
+class _ChocoPackageSpans:
+    """Parser de linha que abre um span por pacote na saída do choco (sem atualizar progresso).
+
+    O pacote corrente é o último citado; o span fecha na linha de resultado dele,
+    quando outro pacote passa a ser citado ou ao fim do processo (close()).
+    """
+    _RESULT = re.compile(r"was successful|already installed|not installed|failed|exit code", re.I)
+
+    def __init__(self, package_ids: list):
+        self.tracer = get_tracer()
+        self.patterns = [(pid, re.compile(rf"(?<![\w.-]){re.escape(pid)}(?![\w.-])", re.I))
+                         for pid in package_ids]
+        self.current = None
+        self.start = 0.0
+        self.done = set()
+
+    def __call__(self, line: str):
+        for package_id, pattern in self.patterns:
+            if package_id in self.done or not pattern.search(line):
+                continue
+            if package_id != self.current:
+                self.close()
+                self.current, self.start = package_id, self.tracer.now()
+            if self._RESULT.search(line):
+                self.close(result=line.strip()[:120])
+            break
+        return None
+
+    def close(self, **args):
+        if self.current is None:
+            return
+        end = self.tracer.now()
+        self.tracer.complete(f"choco {self.current}", "choco", self.start, end, package=self.current, **args)
+        _choco_durations[self.current] = end - self.start
+        self.done.add(self.current)
+        self.current = None
+
+
+# Duração de cada pacote na última chamada do choco que o citou (eventos "package")
+_choco_durations = {}
+
+
+def _run_choco(argv: list, on_progress=None, package_ids: list = ()):
+    """Executa o choco com saída em tempo real no log. Retorna (código, saída relevante).
+
+    package_ids: pacotes da chamada — cada um vira um span no trace.
+    """
+    timeout, idle_timeout = command_limits()
+    spans = _ChocoPackageSpans(package_ids)
+    result = stream_process(argv, parsers=[spans, choco_progress], on_progress=on_progress,
+                            keep=_CHOCO_RESULT_LINE.search, log_label="choco",
+                            timeout=timeout, idle_timeout=idle_timeout)
+    spans.close()
+    return result.returncode, result.output
+
+
+def _group_choco_packages(packages: list) -> list:
+    """Agrupa pacotes com argumentos idênticos (o choco aplica --params a todos os pacotes da chamada).
+
+    Retorna [(extra_args, [package_id, ...]), ...] na ordem da configuração.
+    """
+    groups = {}
+    for entry in packages:
+        package_id, extra_args = _split_choco_entry(entry)
+        groups.setdefault(extra_args, []).append(package_id)
+    return list(groups.items())
+
+
+def _classify_choco_result(rc: int, out: str) -> str:
+    """Resultado de um `choco install` de pacote único: ok, reboot, skip ou fail."""
+    if rc == 0:
+        return "ok"
+    if rc in (1641, 3010):
+        return "reboot"
+    out_lower = out.lower() if out else ""
+    if "already installed" in out_lower or "nothing to do" in out_lower:
+        return "skip"
+    return "fail"
+
+
+def _parse_choco_batch_output(out: str, package_ids: list) -> dict:
+    """Extrai o resultado de cada pacote da saída combinada de um `choco install a b c`.
+
+    Retorna {package_id: "ok" | "reboot" | "skip" | "fail"}. Pacotes não
+    mencionados na saída são considerados falha (serão retentados).
+    """
+    lines = (out or "").lower().splitlines()
+    results = {}
+    reboot = set()
+
+    # Seção "Packages requiring reboot:" lista " - pacote (exit code 3010)"
+    in_reboot_section = False
+    for line in lines:
+        stripped = line.strip()
+        if stripped.startswith("packages requiring reboot"):
+            in_reboot_section = True
+            continue
+        if in_reboot_section:
+            if not stripped.startswith("- "):
+                in_reboot_section = False
+                continue
+            reboot.add(stripped[2:].split()[0])
+
+    text = "\n".join(lines)
+    for package_id in package_ids:
+        # Delimitadores evitam que "teams" case com "microsoft-teams-new-install"
+        pid = rf"(?<![\w.-]){re.escape(package_id.lower())}(?![\w.-])"
+        if package_id.lower() in reboot or re.search(rf"{pid}.*exit code (1641|3010)", text):
+            results[package_id] = "reboot"
+        elif re.search(rf"the install of {pid} was successful", text):
+            results[package_id] = "ok"
+        elif re.search(rf"{pid} v\S+ already installed", text):
+            results[package_id] = "skip"
+        else:
+            results[package_id] = "fail"
+    return results
+
+
+def _log_choco_result(package_id: str, reason: str):
+    logger = get_logger()
+    events.emit(events.PACKAGE, package=package_id, duration=_choco_durations.pop(package_id, None),
+                error="ChocoInstallFailed" if reason == "fail" else None, manager="choco", result=reason)
+    if reason == "reboot":
+        logger.success(f"{package_id} instalado (reboot pendente).")
+    elif reason == "skip":
+        logger.warning(f"{package_id} já está instalado. Pulando.")
+    elif reason == "ok":
+        logger.success(f"{package_id} instalado.")
+    else:
+        logger.warning(f"Erro em {package_id}. Verifique manualmente.")
+
+
+def _install_choco_single(choco: str, package_id: str, extra_args: str, max_attempts: int = 2,
+                          source: str = None, on_progress=None) -> str:
+    """Instala um pacote em uma chamada própria do choco, com retry."""
+    argv = _choco_install_argv(choco, [package_id], extra_args, source)
+
+    def _do_install():
+        rc, out = _run_choco(argv, on_progress, [package_id])
+        if rc == TIMEOUT_RC:
+            # Encerrado por tempo: repetir só estouraria o tempo de novo (e a etapa já expirou)
+            return "fail"
+        reason = _classify_choco_result(rc, out)
+        if reason == "fail":
+            raise RuntimeError(f"{package_id} retornou código {rc}")
+        return reason
+
+    try:
+        return _retry(_do_install, max_attempts=max_attempts, label=package_id)
+    except Exception:
+        return "fail"
+
+
 def install_choco_packages() -> bool:
     """Instala pacotes configurados via Chocolatey."""
     logger = get_logger()
@@ -206,61 +548,163 @@ def install_choco_packages() -> bool:
         return False
 
     choco = _get_choco_cmd()
-    packages = CONFIG.choco_packages
-    all_ok = True
+    batch = getattr(CONFIG, "choco_batch_install", False)
+    results = {}
+
+    # Pacotes já presentes na pasta lib do Chocolatey nem chegam ao choco
+    index = get_installed_index()
+    packages = []
+    for entry in CONFIG.choco_packages:
+        package_id, _ = _split_choco_entry(entry)
+        version = index.choco_version(package_id)
+        if version:
+            logger.warning(f"{package_id} já está instalado (v{version}). Pulando.")
+            events.emit(events.PACKAGE, package=package_id, manager="choco", result="skip",
+                        installed_version=version)
+            results[package_id] = "skip"
+        else:
+            packages.append(entry)
 
-    with Progress(
-        SpinnerColumn(),
-        TextColumn("[progress.description]{task.description}"),
-        BarColumn(),
-        TextColumn("[progress.percentage]{task.percentage:>3.0f}%"),
-        TimeElapsedColumn(),
-        console=console
-    ) as progress:
-        task = progress.add_task("[cyan]Instalando pacotes...[/]", total=len(packages))
-
-        for idx, entry in enumerate(packages, 1):
-            if isinstance(entry, (list, tuple)):
-                package_id, extra_args = entry[0], entry[1]
-            else:
-                package_id, extra_args = entry, ""
-
-            progress.update(task, description=f"[cyan]Instalando {package_id}...[/]")
-            logger.info(f"Chocolatey: {package_id}")
-
-            if choco.startswith('"'):
-                cmd = f'& {choco} install {package_id} -y --no-progress --ignore-checksums'
-            else:
-                cmd = f'{choco} install {package_id} -y --no-progress --ignore-checksums'
-                
-            if extra_args:
-                cmd += f' {extra_args}'
-
-            def _do_install(c=cmd, pid=package_id):
-                rc, out, _ = run_powershell(c, capture_output=True)
-                if rc == 0:
-                    return True, "ok", out
-                if rc in (1641, 3010):
-                    return True, "reboot", out
-                out_lower = out.lower() if out else ""
-                if "already installed" in out_lower or "nothing to do" in out_lower:
-                    return True, "skip", out
-                raise RuntimeError(f"{pid} retornou código {rc}")
-
-            try:
-                ok, reason, _ = _retry(_do_install, max_attempts=2, label=package_id)
-                if reason == "reboot":
-                    logger.success(f"{package_id} instalado (reboot pendente).")
-                elif reason == "skip":
-                    logger.warning(f"{package_id} já está instalado. Pulando.")
-                else:
-                    logger.success(f"{package_id} instalado.")
-            except Exception:
-                all_ok = False
-                logger.warning(f"Erro em {package_id}. Verifique manualmente.")
+    if not packages:
+        return True
 
-            progress.advance(task)
+    # Espelho offline primeiro; o que falhar nele é retentado no feed da comunidade
+    mirror = mirror_source()
+    if mirror:
+        logger.info(f"Chocolatey: usando espelho offline {mirror}")
+
+    done = 0
+    with progress_bar("[cyan]Instalando pacotes...[/]", total=len(packages)) as (progress, task):
+        if batch:
+            for extra_args, package_ids in _group_choco_packages(packages):
+                names = ", ".join(package_ids)
+                progress.update(task, description=f"[cyan]Instalando {names}...[/]")
+                logger.info(f"Chocolatey (lote): {names}")
+
+                argv = _choco_install_argv(choco, package_ids, extra_args, source=mirror)
+                _, out = _run_choco(argv, _choco_progress_callback(progress, task, done), package_ids)
+                batch_results = _parse_choco_batch_output(out, package_ids)
+
+                # Só os pacotes que falharam no lote são retentados, um a um
+                for package_id in package_ids:
+                    if batch_results[package_id] == "fail":
+                        logger.warning(f"{package_id}: falhou no lote — tentando individualmente...")
+                        progress.update(task, description=f"[cyan]Instalando {package_id}...[/]")
+                        batch_results[package_id] = _install_choco_single(
+                            choco, package_id, extra_args, max_attempts=1,
+                            on_progress=_choco_progress_callback(progress, task, done),
+                        )
+                    results[package_id] = batch_results[package_id]
+                    _log_choco_result(package_id, results[package_id])
+                    done += 1
+                    progress.update(task, completed=done)
+        else:
+            for entry in packages:
+                package_id, extra_args = _split_choco_entry(entry)
+                progress.update(task, description=f"[cyan]Instalando {package_id}...[/]")
+                logger.info(f"Chocolatey: {package_id}")
+                on_progress = _choco_progress_callback(progress, task, done)
+
+                reason = "fail"
+                if mirror:
+                    reason = _install_choco_single(choco, package_id, extra_args, max_attempts=1,
+                                                   source=mirror, on_progress=on_progress)
+                if reason == "fail":
+                    reason = _install_choco_single(choco, package_id, extra_args, on_progress=on_progress)
+                results[package_id] = reason
+                _log_choco_result(package_id, results[package_id])
+                done += 1
+                progress.update(task, completed=done)
+
+    invalidate_installed_index()
+    return all(reason != "fail" for reason in results.values())
+
+
+def _rc_error(rc: int):
+    """error_class dos eventos de instaladores a partir do código de saída."""
+    if rc == 0 or rc in (1641, 3010):
+        return None
+    return "Timeout" if rc == TIMEOUT_RC else "NonZeroExit"
+
+
+def _already_installed(name: str, cfg) -> bool:
+    """Consulta o índice de programas instalados pelo trecho de nome em cfg.detect."""
+    if not cfg.detect:
+        return False
+    found = get_installed_index().find_program(cfg.detect)
+    if found:
+        display_name, version = found
+        get_logger().warning(f"{name} já está instalado ({display_name} {version}). Pulando.")
+        events.emit(events.INSTALLER, package=name, result="skip", installed_version=version)
+        return True
+    return False
+
+
+def _local_installer(name: str, cfg) -> str:
+    """Traz o instalador para o cache local e retorna o caminho a executar.
+
+    Sem cache configurado (ou se a cópia falhar), retorna o caminho de rede original.
+    """
+    logger = get_logger()
+    cache = get_installer_cache()
+    if cache is None or cfg.cache == "off":
+        return cfg.path
+
+    # "tree": instaladores que leem arquivos vizinhos (ex: setup.exe do Office 2013)
+    tree = cfg.cache == "tree"
+    source = os.path.dirname(cfg.path) if tree else cfg.path
+
+    min_bytes = CONFIG.staging_min_mb * 1024 * 1024
+
+    def _copy(src, dst):
+        # Arquivos grandes: cópia em blocos retomável + checksum publicado (.sha256)
+        if os.path.getsize(src) < min_bytes:
+            return default_copy_file(src, dst)
+        result = stage_file(src, dst, chunk_size=CONFIG.staging_chunk_mb * 1024 * 1024)
+        logger.info(f"{name}: {os.path.basename(src)} — {result.summary()}")
+        return result
+
+    try:
+        with status(f"[primary]Preparando {name} no cache local...[/]"):
+            local, hit = cache.fetch(source, tree=tree, copy_file=_copy)
+    except Exception as e:
+        logger.warning(f"{name}: cache indisponível ({e}) — executando da rede.")
+        return cfg.path
+
+    path = os.path.join(local, os.path.basename(cfg.path)) if tree else local
+    if hit:
+        logger.info(f"{name}: cópia em cache válida, sem transferência ({path})")
+    else:
+        logger.info(f"{name}: copiado para o cache ({path})")
+    return path
+
+
+def prewarm_installer_cache() -> bool:
+    """Copia para o cache local todos os instaladores configurados em CONFIG.unc_installers."""
+    logger = get_logger()
+    print_step("Pré-carregando cache de instaladores...")
+
+    if get_installer_cache() is None:
+        logger.warning("Cache de instaladores desativado ou inacessível (installer_cache_dir).")
+        return False
+
+    installers = [
+        ("Office 2013", CONFIG.office_installer),
+        ("Office 365", CONFIG.office16_365_installer),
+        ("SQL Native Client", CONFIG.sql_native_client_installer),
+    ]
 
+    all_ok = True
+    for name, cfg in installers:
+        if not cfg.path or cfg.cache == "off":
+            continue
+        if not os.path.normcase(cfg.path).startswith(os.path.normcase(CONFIG.unc_installers)):
+            continue
+        path = _local_installer(name, cfg)
+        if path == cfg.path:
+            all_ok = False
+        else:
+            logger.success(f"{name} em cache.")
     return all_ok
 
 
@@ -273,22 +717,29 @@ def install_sql_native_client() -> bool:
     if not cfg or not cfg.path:
         return False
 
-    if not os.path.exists(cfg.path):
-        logger.error(f"SQL Native Client: Arquivo não encontrado: {cfg.path}")
+    if _already_installed("SQL Native Client", cfg):
+        return True
+
+    path = _local_installer("SQL Native Client", cfg)
+    if not os.path.exists(path):
+        logger.error(f"SQL Native Client: Arquivo não encontrado: {path}")
         return False
 
-    logger.info(f"Executando: {cfg.path}")
+    logger.info(f"Executando: {path}")
     
     # Executa silenciosamente via msiexec
-    cmd = f'Start-Process -FilePath "msiexec.exe" -ArgumentList "/i `"{cfg.path}`" /qn /norestart IACCEPTSQLNCLILICENSETERMS=YES" -Wait -NoNewWindow'
+    cmd = f'Start-Process -FilePath "msiexec.exe" -ArgumentList "/i `"{path}`" /qn /norestart IACCEPTSQLNCLILICENSETERMS=YES" -Wait -NoNewWindow'
     
     start = time.time()
-    with console.status("[primary]Instalando SQL Native Client 2012...[/]"):
+    with status("[primary]Instalando SQL Native Client 2012...[/]"):
         return_code, stdout, stderr = run_powershell(cmd, capture_output=True)
         
     elapsed = time.time() - start
-    
+    events.emit(events.INSTALLER, package="SQL Native Client", duration=elapsed, rc=return_code,
+                error=_rc_error(return_code), result="ok" if return_code == 0 else "fail")
+
     if return_code == 0:
+        invalidate_installed_index()
         logger.success(f"SQL Native Client instalado ({elapsed:.0f}s)")
         return True
     else:
@@ -296,70 +747,136 @@ def install_sql_native_client() -> bool:
         return False
 
 
-def _count_files(source: str) -> int:
-    """Conta o número de arquivos em um diretório."""
-    count = 0
-    for _, _, files in os.walk(source):
-        count += len(files)
-    return count
-
+def _copy_from_pack(src: str, dst: str, name: str, pack_dir: str, mode: str) -> Optional[SyncStats]:
+    """Extrai o pacote publicado de src em dst (download sequencial + extração em fluxo).
 
-def copy_network_folders() -> bool:
-    """Copia pastas de rede para destinos locais com progress bar."""
+    Retorna None quando não há pacote atualizado ou ele falha: o chamador copia arquivo por arquivo.
+    """
     logger = get_logger()
-    print_step("Copiando pastas da rede...")
+    manifest, reason = fresh_pack(src, pack_dir)
+    if manifest is None:
+        logger.info(f"{name}: {reason} — cópia arquivo por arquivo.")
+        return None
+
+    if mode != "mirror":
+        extracted, reason = verify_extracted(dst, manifest)
+        if extracted:
+            logger.info(f"{name}: pacote {manifest.archive} já extraído em {dst}.")
+            return SyncStats(files_skipped=manifest.files, bytes_skipped=manifest.bytes, dirs=manifest.dirs)
+        if reason:
+            logger.info(f"{name}: {reason} — extraindo o pacote de novo.")
+
+    size = os.path.getsize(os.path.join(pack_dir, manifest.archive))
+    try:
+        with progress_bar(f"[cyan]Baixando pacote {name}...[/]", total=size, unit="bytes") as (progress, task):
+            stats = extract_pack(manifest, pack_dir, dst, on_read=lambda n: progress.advance(task, n))
+    except Exception as e:
+        logger.warning(f"{name}: falha no pacote {manifest.archive} ({e}) — cópia arquivo por arquivo.")
+        return None
 
-    folders = CONFIG.unc_folders_to_copy
-    all_ok = True
+    logger.info(f"{name}: pacote {manifest.archive} ({size / 1024 / 1024:.1f} MB) extraído.")
+    return stats
 
-    if not folders:
-        print_info("Nenhuma pasta configurada")
-        return True
 
-    for cfg in folders:
-        logger.info(f"Copiando: {cfg.source} -> {cfg.destination}")
-        folder_name = os.path.basename(cfg.source)
+# Métricas da última chamada de copy_network_folders (uma entrada por pasta copiada)
+_copy_metrics = []
+
 
-        def _do_copy(src=cfg.source, dst=cfg.destination, name=folder_name, shortcut_info=cfg.shortcut):
-            total_files = _count_files(src)
-            if total_files == 0:
-                total_files = 1
+async def _copy_folder_async(cfg: FolderCopyConfig) -> bool:
+    """Copia uma pasta da rede (pacote publicado ou arquivo por arquivo), com retry. False se falhou."""
+    logger = get_logger()
+    logger.info(f"Copiando: {cfg.source} -> {cfg.destination}")
+    src, dst, name = cfg.source, cfg.destination, os.path.basename(cfg.source)
 
-            if os.path.exists(dst):
-                shutil.rmtree(dst)
+    async def _do_copy() -> dict:
+        start = time.time()
 
-            start = time.time()
+        stats = await to_thread(_copy_from_pack, src, dst, name, cfg.pack_dir, cfg.mode) if cfg.pack_dir else None
+        copy_mode = "pack" if stats is not None else "files"
 
-            with Progress(
-                SpinnerColumn(),
-                TextColumn("[cyan]{task.description}"),
-                BarColumn(bar_width=30),
-                TextColumn("[progress.percentage]{task.percentage:>3.0f}%"),
-                TimeElapsedColumn(),
-                console=console
-            ) as progress:
-                task = progress.add_task(f"[cyan]Copiando {name}...[/]", total=total_files)
+        if stats is None:
+            if cfg.mode == "mirror" and os.path.exists(dst):
+                await to_thread(shutil.rmtree, dst)
 
-                def _copy_with_progress(s, d):
-                    shutil.copy2(s, d)
-                    progress.advance(task)
+            # Progresso em bytes; o total cresce à medida que a origem é listada
+            with progress_bar(f"[cyan]Copiando {name}...[/]", total=0, unit="bytes") as (progress, task):
+                discovered = [0]
 
-                shutil.copytree(src, dst, copy_function=_copy_with_progress)
+                def _on_discover(size):
+                    # Etapa encerrada por tempo: nenhum arquivo novo é copiado
+                    check_step()
+                    discovered[0] += size
+                    progress.update(task, total=discovered[0])
 
-            elapsed = time.time() - start
-            logger.success(f"{name} → {dst} ({elapsed:.0f}s)")
-            
-            if shortcut_info:
-                exe_path = os.path.join(dst, shortcut_info.target_exe)
-                _create_desktop_shortcut(exe_path, shortcut_info.name)
+                # Em "sync" um retry copia só o que faltou; em "mirror" o destino já está vazio
+                stats = await sync_tree_async(src, dst, compare_hash=cfg.compare_hash, workers=cfg.workers,
+                                              on_discover=_on_discover,
+                                              on_file=lambda path, size, copied: progress.advance(task, size))
 
+        logger.info(f"{name}: {stats.summary()}")
+        logger.info(f"{name}: {stats.files_per_sec:.0f} arquivos/s, {stats.mb_per_sec:.1f} MB/s, "
+                    f"latência p95 {stats.percentile(95) * 1000:.0f} ms")
+        metrics = {"folder": name, "source": src, "destination": dst, "mode": copy_mode,
+                   "workers": cfg.workers, **stats.metrics()}
+        logger.metrics("copy", metrics)
+        _copy_metrics.append(metrics)
+
+        elapsed = time.time() - start
+        events.emit(events.COPY, package=name, duration=elapsed, bytes=stats.bytes_copied, mode=copy_mode,
+                    files_copied=stats.files_copied, files_skipped=stats.files_skipped, source=src,
+                    destination=dst)
+        logger.success(f"{name} → {dst} ({elapsed:.0f}s)")
+        return metrics
+
+    with span(f"copiar {name}", "copia", lane=name, source=src, destination=dst) as trace_args:
         try:
-            _retry(_do_copy, max_attempts=3, label=folder_name)
+            metrics = await _retry_async(_do_copy, max_attempts=3, label=name)
+            trace_args["mode"] = metrics["mode"]
+            return True
+        except StepExpired:
+            raise
+        except CopyError as e:
+            logger.error(f"{name} — {e}\n{e.report()}")
+            if e.stats is not None:
+                logger.info(f"{name}: {e.stats.summary()} em {e.stats.elapsed:.0f}s até a falha")
+            events.emit(events.COPY, package=name, error=e, failed_files=len(e.errors))
         except Exception as e:
-            logger.error(f"{folder_name} — {e}")
-            all_ok = False
+            logger.error(f"{name} — {e}")
+            events.emit(events.COPY, package=name, error=e)
+    return False
 
-    return all_ok
+
+def copy_network_folders() -> bool:
+    """Copia pastas de rede para destinos locais com progress bar e cria o atalho de cada pasta.
+
+    As pastas são copiadas em paralelo, uma tarefa por pasta no mesmo event loop.
+    Métricas de vazão e latência de cada pasta vão para o log (bloco METRICS) e para o resumo.
+    """
+    print_step("Copiando pastas da rede...")
+
+    folders = CONFIG.unc_folders_to_copy
+    _copy_metrics.clear()
+
+    if not folders:
+        print_info("Nenhuma pasta configurada")
+        return True
+
+    async def _copy_all():
+        return await asyncio.gather(*(_copy_folder_async(cfg) for cfg in folders))
+
+    # Barras de todas as pastas no mesmo Progress (o Rich só permite um ativo)
+    with shared_progress():
+        results = run_sync(_copy_all())
+    # Métricas na ordem da configuração, não na de término
+    order = [cfg.source for cfg in folders]
+    _copy_metrics.sort(key=lambda m: order.index(m["source"]))
+
+    # Atalhos das pastas copiadas numa única passada
+    copied = [cfg for cfg, ok in zip(folders, results) if ok]
+    if any(cfg.shortcut for cfg in copied):
+        create_all_shortcuts(webapp=False, folders=copied)
+
+    return all(results)
 
 
 def install_office(office_version: str = None) -> bool:
@@ -375,12 +892,16 @@ def install_office(office_version: str = None) -> bool:
 
     if office_version == "2013":
         cfg = CONFIG.office_installer
+        if _already_installed("Office 2013", cfg):
+            return True
         if cfg.path:
-            return _run_installer("Office 2013", cfg.path, cfg.args)
+            return _run_installer("Office 2013", _local_installer("Office 2013", cfg), cfg.args)
     elif office_version == "365":
         cfg = CONFIG.office16_365_installer
+        if _already_installed("Office 365", cfg):
+            return True
         if cfg.path:
-            return _run_installer("Office 365", cfg.path, cfg.args)
+            return _run_installer("Office 365", _local_installer("Office 365", cfg), cfg.args)
     else:
         logger.info("Instalação do Office pulada.")
 
@@ -416,6 +937,11 @@ def _select_office_version() -> str:
 
 def _run_installer(name: str, path: str, args: str) -> bool:
     """Executa um instalador com Spinner e retorna sucesso."""
+    return run_sync(_run_installer_async(name, path, args))
+
+
+async def _run_installer_async(name: str, path: str, args: str) -> bool:
+    """Versão async de _run_installer: pode rodar junto de outras tarefas no mesmo loop."""
     logger = get_logger()
 
     if not os.path.exists(path):
@@ -428,113 +954,121 @@ def _run_installer(name: str, path: str, args: str) -> bool:
         cmd = [path] + (args.split() if args else [])
         start = time.time()
 
-        with console.status(f"[primary]Instalando {name}...[/]"):
-            result = subprocess.run(cmd, capture_output=True, text=True)
+        with progress_bar(f"[primary]Instalando {name}...[/]") as (progress, task):
+            def on_progress(description, _percent):
+                progress.update(task, description=f"[primary]Instalando {name}:[/] {escape(description)}")
+
+            # Sem argumentos silenciosos o instalador abre o assistente: esperar o técnico não é travamento
+            timeout, idle_timeout = command_limits(interactive=not args)
+            result = await stream_process_async(cmd, parsers=[last_line], on_progress=on_progress,
+                                                log_label=name, timeout=timeout, idle_timeout=idle_timeout)
 
         elapsed = time.time() - start
+        events.emit(events.INSTALLER, package=name, duration=elapsed, rc=result.returncode,
+                    error=_rc_error(result.returncode), result="ok" if result.returncode == 0 else "fail")
 
         if result.returncode == 0:
+            invalidate_installed_index()
             logger.success(f"{name} instalado ({elapsed:.0f}s)")
             return True
         else:
             logger.warning(f"{name}: Código {result.returncode}")
+            for line in result.tail[-5:]:
+                logger.warning(f"  {line}")
             return False
     except Exception as e:
         logger.error(f"Falha: {e}")
+        events.emit(events.INSTALLER, package=name, error=e, result="fail")
         return False
 
 
-def create_webapp_shortcut() -> bool:
-    """Cria atalho .lnk do NextBP via VBScript."""
-    logger = get_logger()
-    print_step("Configurando atalho NextBP...")
-
-    webapp_url = CONFIG.webapp_url
-    webapp_name = CONFIG.webapp_name
-    chrome_path = CONFIG.chrome_path
-
-    if not webapp_url:
-        print_info("URL não configurada")
-        return False
-
-    if not os.path.exists(chrome_path):
-        logger.error(f"Chrome não encontrado: {chrome_path}")
-        return False
+def _public_desktop() -> str:
+    return os.path.join(os.environ.get("PUBLIC", r"C:\Users\Public"), "Desktop")
 
-    logger.info(f"Atalho: {webapp_name} -> {webapp_url}")
 
+def _webapp_shortcut_spec() -> ShortcutSpec:
+    """Atalho do NextBP: Chrome em modo --app apontando para CONFIG.webapp_url."""
     if CONFIG.webapp_shortcut_location == "Desktop":
-        shortcut_dir = os.path.join(os.environ.get("PUBLIC", r"C:\Users\Public"), "Desktop")
+        shortcut_dir = _public_desktop()
     else:
         shortcut_dir = os.path.join(os.environ.get("PROGRAMDATA", r"C:\ProgramData"),
                                      "Microsoft", "Windows", "Start Menu", "Programs")
 
-    shortcut_path = os.path.join(shortcut_dir, f"{webapp_name}.lnk")
-
-    vbs_script = f'''
-Set WshShell = CreateObject("WScript.Shell")
-Set Shortcut = WshShell.CreateShortcut("{shortcut_path}")
-Shortcut.TargetPath = "{chrome_path}"
-Shortcut.Arguments = "--app={webapp_url}"
-Shortcut.WorkingDirectory = "{os.path.dirname(chrome_path)}"
-Shortcut.Description = "{webapp_name}"
-Shortcut.Save
-'''
+    return ShortcutSpec(
+        path=os.path.join(shortcut_dir, f"{CONFIG.webapp_name}.lnk"),
+        target=CONFIG.chrome_path,
+        arguments=f"--app={CONFIG.webapp_url}",
+        working_dir=os.path.dirname(CONFIG.chrome_path),
+        description=CONFIG.webapp_name,
+        icon_location=CONFIG.chrome_path,
+    )
 
-    vbs_path = os.path.join(os.environ.get("TEMP", "/tmp"), "create_shortcut.vbs")
-    try:
-        with open(vbs_path, 'w', encoding='utf-8') as f:
-            f.write(vbs_script)
 
-        subprocess.run(["cscript", "//Nologo", vbs_path], capture_output=True)
+def _folder_shortcut_spec(target_exe: str, shortcut_name: str) -> ShortcutSpec:
+    """Atalho na Área de Trabalho Pública para um executável copiado da rede."""
+    return ShortcutSpec(
+        path=os.path.join(_public_desktop(), f"{shortcut_name}.lnk"),
+        target=target_exe,
+        working_dir=os.path.dirname(target_exe),
+        description=shortcut_name,
+    )
 
-        logger.success(f"Atalho criado: {shortcut_path}")
-        return True
-    except Exception as e:
-        logger.error(f"Falha: {e}")
-        return False
-    finally:
-        try:
-            os.remove(vbs_path)
-        except OSError:
-            pass
 
+def create_all_shortcuts(webapp: bool = True,
+                         folders: Optional[List[FolderCopyConfig]] = None) -> List[Tuple[str, bool, str]]:
+    """Cria numa passada o atalho do NextBP e o de cada pasta (FolderCopyConfig.shortcut).
 
-def _create_desktop_shortcut(target_exe: str, shortcut_name: str) -> bool:
-    """Cria um atalho na Área de Trabalho Pública (Geral) para um executável local."""
+    folders: pastas cujos atalhos criar (None = todas de CONFIG.unc_folders_to_copy).
+    Retorna (nome, sucesso, erro) para cada atalho; alvo inexistente conta como falha e não é gravado.
+    """
     logger = get_logger()
-    
-    if not os.path.exists(target_exe):
-        logger.warning(f"Executável alvo do atalho não encontrado: {target_exe}")
-        return False
-        
-    shortcut_dir = os.path.join(os.environ.get("PUBLIC", r"C:\Users\Public"), "Desktop")
-    shortcut_path = os.path.join(shortcut_dir, f"{shortcut_name}.lnk")
-    
-    vbs_script = f'''
-Set WshShell = CreateObject("WScript.Shell")
-Set Shortcut = WshShell.CreateShortcut("{shortcut_path}")
-Shortcut.TargetPath = "{target_exe}"
-Shortcut.WorkingDirectory = "{os.path.dirname(target_exe)}"
-Shortcut.Description = "{shortcut_name}"
-Shortcut.Save
-'''
-    vbs_path = os.path.join(os.environ.get("TEMP", "/tmp"), f"create_{shortcut_name.replace(' ', '')}.vbs")
-    try:
-        with open(vbs_path, 'w', encoding='utf-8') as f:
-            f.write(vbs_script)
+    if folders is None:
+        folders = CONFIG.unc_folders_to_copy
+
+    # (nome, spec, erro) na ordem da configuração; spec None = falhou antes de gravar
+    entries = []
+    if webapp and CONFIG.webapp_url:
+        if os.path.exists(CONFIG.chrome_path):
+            entries.append((CONFIG.webapp_name, _webapp_shortcut_spec(), ""))
+        else:
+            entries.append((CONFIG.webapp_name, None, f"Chrome não encontrado: {CONFIG.chrome_path}"))
+    for cfg in folders:
+        if not cfg.shortcut:
+            continue
+        exe_path = os.path.join(cfg.destination, cfg.shortcut.target_exe)
+        if os.path.exists(exe_path):
+            entries.append((cfg.shortcut.name, _folder_shortcut_spec(exe_path, cfg.shortcut.name), ""))
+        else:
+            entries.append((cfg.shortcut.name, None, f"Executável alvo do atalho não encontrado: {exe_path}"))
 
-        subprocess.run(["cscript", "//Nologo", vbs_path], capture_output=True)
-        logger.info(f"Atalho local criado: {shortcut_name}")
-        return True
-    except Exception as e:
-        logger.error(f"Falha ao criar atalho para {shortcut_name}: {e}")
+    created = iter(create_shortcuts([spec for _, spec, _ in entries if spec]))
+    results = []
+    for name, spec, error in entries:
+        if spec is None:
+            results.append((name, False, error))
+            continue
+        _, ok, error = next(created)
+        results.append((name, ok, error))
+
+    for name, ok, error in results:
+        if ok:
+            logger.success(f"Atalho criado: {name}")
+        else:
+            logger.error(f"Falha ao criar atalho {name}: {error}")
+    return results
+
+
+def create_webapp_shortcut() -> bool:
+    """Cria atalho .lnk do NextBP."""
+    print_step("Configurando atalho NextBP...")
+
+    if not CONFIG.webapp_url:
+        print_info("URL não configurada")
         return False
-    finally:
-        try:
-            os.remove(vbs_path)
-        except OSError:
-            pass
+
+    get_logger().info(f"Atalho: {CONFIG.webapp_name} -> {CONFIG.webapp_url}")
+    results = create_all_shortcuts(webapp=True, folders=[])
+    return all(ok for _, ok, _ in results)
 
 
 def configure_power_plan() -> bool:
@@ -549,14 +1083,16 @@ def configure_power_plan() -> bool:
         ("Desativando suspensão de disco", "powercfg /change disk-timeout-ac 0")
     ]
 
-    all_ok = True
     for desc, cmd in commands:
         logger.info(f"{desc}: {cmd}")
-        return_code, _, _ = run_powershell(cmd, capture_output=True)
-        if return_code != 0:
-            logger.warning(f"Aviso ao executar: {desc}")
+
+    # Os quatro powercfg em uma única ida ao PowerShell
+    all_ok = True
+    for result in run_powershell_batch(commands):
+        if not result.ok:
+            logger.warning(f"Aviso ao executar: {result.label} (código {result.returncode}) {result.stderr.strip()}")
             all_ok = False
-            
+
     if all_ok:
         logger.success("Plano de energia corporativo aplicado (Anti-hibernação)")
         return True
@@ -598,10 +1134,11 @@ def launch_anydesk() -> bool:
             if senha:
                 logger.info("Injetando senha mestre lida do servidor UNC...")
                 # O AnyDesk CLI aceita receber a senha via pipe stdin
-                process = subprocess.Popen([exe_path, "--set-password"], stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-                process.communicate(input=senha.encode())
-                
-                if process.returncode == 0:
+                return_code, _, _ = run_process([exe_path, "--set-password"], input_data=senha.encode(), timeout=60)
+                if return_code == TIMEOUT_RC:
+                    logger.warning("AnyDesk não respondeu ao definir a senha (60s) — processo encerrado.")
+
+                if return_code == 0:
                     logger.success("Senha autônoma configurada com sucesso!")
                 else:
                     logger.warning("Ocorreu um erro ao definir a senha silenciosa do AnyDesk.")
@@ -612,7 +1149,7 @@ def launch_anydesk() -> bool:
 
     # Inicia a Interface
     try:
-        subprocess.Popen([exe_path])
+        spawn([exe_path])
         logger.success("AnyDesk iniciado!")
         return True
     except Exception as e:
@@ -0,0 +1,213 @@
+"""Perfis do modo automático (--auto): validação e geração em lote a partir de um CSV de inventário."""
+import csv
+import json
+import os
+from typing import Dict, Iterator, List, Tuple
+
+from config import CONFIG
+from modules.identity import _validate_admin_user, _validate_domain, _validate_hostname
+from modules.install import STEP_KEYS
+from utils.console import console, print_error, print_step
+from utils.logger import get_logger
+from rich.markup import escape
+from rich.table import Table
+
+OFFICE_VERSIONS = ("", "2013", "365")
+# Colunas aceitas no CSV (cabeçalho obrigatório; só hostname e admin_user precisam ter valor)
+CSV_COLUMNS = ("hostname", "domain", "admin_user", "install_office", "skip_steps", "auto_reboot")
+_TRUE = {"1", "true", "sim", "s", "yes", "y", "x"}
+_FALSE = {"", "0", "false", "nao", "não", "n", "no"}
+
+
+def validate_profile(profile: dict) -> List[str]:
+    """Todos os problemas do perfil (lista vazia = válido).
+
+    "install_office": null (perfis antigos) vale como "" — Office pulado.
+    """
+    errors = []
+    hostname = profile.get("hostname") or ""
+    admin_user = profile.get("admin_user") or ""
+    domain = profile.get("domain") or CONFIG.default_domain
+
+    if not hostname:
+        errors.append("hostname ausente")
+    elif not _validate_hostname(hostname):
+        errors.append(f"hostname inválido: '{hostname}' (1-15 caracteres, letras, números e hífen)")
+    if not admin_user:
+        errors.append("admin_user ausente")
+    elif not _validate_admin_user(admin_user):
+        errors.append(f"admin_user inválido: '{admin_user}'")
+    if not _validate_domain(domain):
+        errors.append(f"domínio inválido: '{domain}'")
+    if (profile.get("install_office") or "") not in OFFICE_VERSIONS:
+        errors.append(f"install_office inválido: '{profile.get('install_office')}' (use 2013, 365 ou vazio)")
+
+    skip = profile.get("skip_steps", [])
+    if not isinstance(skip, list):
+        errors.append("skip_steps deve ser uma lista")
+    else:
+        unknown = [s for s in skip if s not in STEP_KEYS]
+        if unknown:
+            errors.append(f"etapas desconhecidas em skip_steps: {', '.join(unknown)}")
+    if not isinstance(profile.get("auto_reboot", False), bool):
+        errors.append("auto_reboot deve ser true ou false")
+    return errors
+
+
+CSV_DELIMITERS = ";,\t"
+
+
+def _detect_delimiter(sample: str) -> str:
+    """Separador do CSV: o que divide o cabeçalho em colunas conhecidas; senão o Sniffer; senão ','.
+
+    O cabeçalho é obrigatório, então ele decide mesmo em arquivos de uma linha
+    (onde o Sniffer costuma errar).
+    """
+    header = sample.splitlines()[0] if sample else ""
+    for delimiter in CSV_DELIMITERS:
+        if "hostname" in (c.strip().strip('"').lower() for c in header.split(delimiter)):
+            return delimiter
+    try:
+        return csv.Sniffer().sniff(sample, delimiters=CSV_DELIMITERS).delimiter
+    except csv.Error:
+        return ","
+
+
+class _LineCounter:
+    """Linhas do arquivo para o csv, anotando onde começa cada registro.
+
+    reader.line_num aponta a última linha física lida; num campo entre aspas com
+    quebra de linha, isso é o fim do registro, não o início.
+    """
+
+    def __init__(self, f):
+        self._f = f
+        self.line = 0
+        self.start = None
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        text = next(self._f)
+        self.line += 1
+        # Linhas vazias antes do registro são puladas pelo csv e não contam como início
+        if self.start is None and text.strip():
+            self.start = self.line
+        return text
+
+
+def _open_csv(path: str):
+    """Abre o CSV detectando ';' (Excel em pt-BR), ',' ou tabulação. Retorna (arquivo, leitor, linhas)."""
+    f = open(path, "r", encoding="utf-8-sig", newline="")
+    sample = f.read(4096)
+    f.seek(0)
+    lines = _LineCounter(f)
+    return f, csv.DictReader(lines, delimiter=_detect_delimiter(sample)), lines
+
+
+def _row_to_profile(row: Dict[str, str]) -> Tuple[dict, List[str]]:
+    errors = []
+    value = {k: (row.get(k) or "").strip() for k in CSV_COLUMNS}
+
+    reboot = value["auto_reboot"].lower()
+    if reboot not in _TRUE and reboot not in _FALSE:
+        errors.append(f"auto_reboot inválido: '{value['auto_reboot']}' (use sim/não)")
+
+    profile = {
+        "hostname": value["hostname"].upper(),
+        "domain": value["domain"] or CONFIG.default_domain,
+        "admin_user": value["admin_user"],
+        "install_office": value["install_office"],
+        # Etapas separadas por espaço, vírgula ou '|' (a célula pode estar entre aspas)
+        "skip_steps": [s.lower() for s in value["skip_steps"].replace("|", " ").replace(",", " ").split()],
+        "auto_reboot": reboot in _TRUE,
+    }
+    return profile, errors + validate_profile(profile)
+
+
+def read_profiles_csv(path: str) -> Iterator[Tuple[int, dict, List[str]]]:
+    """Percorre o CSV linha a linha: (número da linha onde o registro começa, perfil, erros).
+
+    Hostnames repetidos (sem diferenciar maiúsculas) são erro a partir da segunda ocorrência.
+    """
+    f, reader, lines = _open_csv(path)
+    with f:
+        missing = [c for c in ("hostname", "admin_user") if c not in (reader.fieldnames or [])]
+        if missing:
+            raise ValueError(f"Colunas obrigatórias ausentes no CSV: {', '.join(missing)}")
+
+        first_seen: Dict[str, int] = {}
+        while True:
+            # Linha inicial do registro (um campo entre aspas pode ocupar várias linhas)
+            lines.start = None
+            row = next(reader, None)
+            if row is None:
+                break
+            if not any((v or "").strip() for v in row.values() if isinstance(v, str)):
+                continue  # linha em branco
+            line = lines.start
+            profile, errors = _row_to_profile(row)
+            hostname = profile["hostname"]
+            if hostname:
+                if hostname in first_seen:
+                    errors.append(f"hostname duplicado (também na linha {first_seen[hostname]})")
+                else:
+                    first_seen[hostname] = line
+            yield line, profile, errors
+
+
+def _write_profile(out_dir: str, profile: dict) -> str:
+    path = os.path.join(out_dir, f"{profile['hostname']}.json")
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(profile, f, indent=4, ensure_ascii=False)
+    os.replace(path + ".tmp", path)
+    return path
+
+
+def generate_profiles(csv_path: str, out_dir: str = None) -> bool:
+    """Valida todas as linhas do CSV e grava um <HOSTNAME>.json por máquina em out_dir.
+
+    Nada é gravado se houver qualquer erro: todos são listados de uma vez.
+    """
+    logger = get_logger()
+    out_dir = out_dir or "profiles"
+    print_step(f"Validando perfis de {csv_path}...")
+
+    profiles, problems = [], []
+    try:
+        for line, profile, errors in read_profiles_csv(csv_path):
+            if errors:
+                problems.extend((line, profile["hostname"], e) for e in errors)
+            else:
+                profiles.append(profile)
+    except (OSError, ValueError, csv.Error) as e:
+        logger.error(f"Falha ao ler {csv_path}: {e}")
+        return False
+
+    if problems:
+        table = Table(title=f"[error]{len(problems)} erro(s) em {len({p[0] for p in problems})} linha(s)[/]",
+                      box=None, padding=(0, 2))
+        table.add_column("Linha", justify="right", style="dim")
+        table.add_column("Hostname", style="bold")
+        table.add_column("Problema")
+        for line, hostname, error in problems:
+            table.add_row(str(line), escape(hostname) or "-", escape(error))
+        console.print(table)
+        logger.error(f"Perfis: {len(problems)} erro(s) em {csv_path} — nenhum arquivo gravado.")
+        return False
+
+    if not profiles:
+        print_error(f"Nenhuma máquina encontrada em {csv_path}.")
+        return False
+
+    try:
+        os.makedirs(out_dir, exist_ok=True)
+        for profile in profiles:
+            _write_profile(out_dir, profile)
+    except OSError as e:
+        logger.error(f"Falha ao gravar perfis em {out_dir}: {e}")
+        return False
+
+    logger.success(f"{len(profiles)} perfil(is) gravado(s) em {out_dir}.")
+    return True
@@ -14,6 +14,7 @@ from typing import Optional, Dict
 from packaging import version
 from config import CONFIG, VERSION
 from utils.logger import get_logger
+from utils import events
 from utils.console import console, confirm_action
 
 def get_remote_version_info() -> Optional[Dict]:
@@ -79,6 +80,8 @@ def _prompt_and_update(remote_ver_str: str, exe_filename: str) -> None:
     if not os.path.exists(remote_exe_path):
         return
 
+    events.emit(events.UPDATE, result="available", current_version=VERSION, remote_version=remote_ver_str)
+
     # Notifica e pergunta
     console.print()
     console.print(f"[bold accent]✨ Nova versão {remote_ver_str} disponível![/]")
@@ -87,6 +90,7 @@ def _prompt_and_update(remote_ver_str: str, exe_filename: str) -> None:
 
     if not confirm_action("Deseja atualizar agora?"):
         console.print("[dim]  Atualização ignorada.[/]")
+        events.emit(events.UPDATE, result="declined", current_version=VERSION, remote_version=remote_ver_str)
         return
 
     # Cópia da rede para disco local (TEMP)
@@ -99,6 +103,7 @@ def _prompt_and_update(remote_ver_str: str, exe_filename: str) -> None:
         shutil.copy2(remote_exe_path, local_temp_exe)
     except Exception as e:
         logger.error(f"Falha na cópia do update: {e}")
+        events.emit(events.UPDATE, error=e, result="error", remote_version=remote_ver_str)
         return
 
     current_exe_path = sys.executable
@@ -127,6 +132,7 @@ del "%~f0"
             f.write(bat_content)
     except Exception as e:
         logger.error(f"Falha ao criar script de atualização: {e}")
+        events.emit(events.UPDATE, error=e, result="error", remote_version=remote_ver_str)
         return
 
     # Dispara o batch em segundo plano
@@ -135,6 +141,8 @@ del "%~f0"
         creationflags=subprocess.CREATE_NEW_CONSOLE
     )
 
+    events.emit(events.UPDATE, result="applied", current_version=VERSION, remote_version=remote_ver_str)
+
     # Informa o usuário e encerra
     console.print()
     console.print(f"[bold accent]  ✅ Atualização v{remote_ver_str} preparada![/]")
@@ -143,4 +151,6 @@ del "%~f0"
     console.print()
     time.sleep(2)
 
+    # os._exit não roda o atexit: grava o que o logger ainda tem na fila
+    logger.close()
     os._exit(0)
@@ -0,0 +1,43 @@
+"""Configuração comum dos testes: raiz do projeto no sys.path e logs/trace em pasta temporária."""
+import os
+import sys
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+
+@pytest.fixture(autouse=True, scope="session")
+def _isolated_config(tmp_path_factory):
+    """Logger, eventos e histórico gravam numa pasta temporária (nunca em C:\\ProvisioningLogs)."""
+    from config import CONFIG
+    CONFIG.log_dir = str(tmp_path_factory.mktemp("logs"))
+    CONFIG.trace_enabled = False
+    CONFIG.powershell_pool_size = 0
+
+
+@pytest.hookimpl(hookwrapper=True, trylast=True)
+def pytest_runtest_call(item):
+    """O console do logger é renderizado em segundo plano: espera ainda dentro da captura do teste."""
+    yield
+    from utils.logger import wait_console
+    wait_console()
+
+
+class RecordingLogger:
+    """Dublê do Logger: guarda (nível, mensagem) em vez de gravar arquivo/console."""
+
+    def __init__(self):
+        self.records = []
+
+    def __getattr__(self, level):
+        return lambda message, *args: self.records.append((level, message))
+
+    def lines(self, level: str = "output"):
+        return [message for kind, message in self.records if kind == level]
+
+
+@pytest.fixture
+def recording_logger():
+    return RecordingLogger()
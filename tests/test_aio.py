@@ -0,0 +1,98 @@
+"""utils.aio: cópia em thread cancelável, etapa herdada pelas threads e processos async encerráveis."""
+import asyncio
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+from config import CONFIG, FolderCopyConfig
+from modules import install
+from utils.aio import run_process_async, run_sync, sync_tree_async, to_thread
+from utils.process import StepExpired, check_step, consume_expired, expire_step, track_processes
+
+
+def _files(root, count, size=16):
+    os.makedirs(root, exist_ok=True)
+    for i in range(count):
+        with open(os.path.join(root, f"arquivo{i:03}.dat"), "wb") as f:
+            f.write(bytes([i % 256]) * size)
+
+
+def test_sync_tree_async_copies(tmp_path):
+    src, dst = str(tmp_path / "origem"), str(tmp_path / "destino")
+    _files(src, 20)
+    stats = run_sync(sync_tree_async(src, dst, workers=4))
+    assert stats.files_copied == 20
+    assert sorted(os.listdir(dst)) == sorted(os.listdir(src))
+
+
+def test_cancel_stops_starting_new_files(tmp_path):
+    src, dst = str(tmp_path / "origem"), str(tmp_path / "destino")
+    _files(src, 100)
+
+    async def _cancel_early():
+        task = asyncio.ensure_future(sync_tree_async(src, dst, on_discover=lambda size: time.sleep(0.01)))
+        await asyncio.sleep(0.1)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    run_sync(_cancel_early())
+    # A thread já terminou quando o cancelamento chega ao chamador: nada mais é copiado
+    copied = len(os.listdir(dst))
+    time.sleep(0.1)
+    assert 0 < copied < 100
+    assert len(os.listdir(dst)) == copied
+
+
+def test_to_thread_runs_in_callers_step():
+    with track_processes("etapa-aio"):
+        run_sync(to_thread(check_step))
+        expire_step("etapa-aio")
+        try:
+            with pytest.raises(StepExpired):
+                run_sync(to_thread(check_step))
+        finally:
+            consume_expired("etapa-aio")
+
+
+def test_expired_step_kills_async_process():
+    killed = []
+    with track_processes("etapa-lenta"):
+        timer = threading.Timer(0.5, lambda: killed.append(expire_step("etapa-lenta")))
+        timer.start()
+        start = time.monotonic()
+        try:
+            rc, _, _ = run_sync(run_process_async([sys.executable, "-c", "import time; time.sleep(30)"]))
+        finally:
+            timer.cancel()
+            consume_expired("etapa-lenta")
+    assert killed == [1]
+    assert rc != 0
+    assert time.monotonic() - start < 10
+
+
+def test_copy_network_folders_copies_all_folders_concurrently(tmp_path, monkeypatch):
+    names = ["client", "Client_Mega", "docs"]
+    folders = []
+    for name in names:
+        _files(str(tmp_path / "rede" / name), 10)
+        folders.append(FolderCopyConfig(source=str(tmp_path / "rede" / name),
+                                        destination=str(tmp_path / "local" / name), workers=2))
+    monkeypatch.setattr(CONFIG, "unc_folders_to_copy", folders)
+
+    # Cada cópia só termina depois que todas começaram: sequencial, isto travaria
+    started = threading.Barrier(len(names), timeout=5)
+    original = install.sync_tree_async
+
+    async def _together(src, dst, **kwargs):
+        await to_thread(started.wait)
+        return await original(src, dst, **kwargs)
+
+    monkeypatch.setattr(install, "sync_tree_async", _together)
+    assert install.copy_network_folders() is True
+    assert [m["folder"] for m in install._copy_metrics] == names
+    for name in names:
+        assert len(os.listdir(tmp_path / "local" / name)) == 10
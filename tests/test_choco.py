@@ -0,0 +1,82 @@
+"""Interpretação da saída do choco (modules.install): lote e pacote único."""
+import pytest
+
+from modules.install import _classify_choco_result, _group_choco_packages, _parse_choco_batch_output
+
+BATCH_OUTPUT = """\
+Chocolatey v2.2.2
+Installing the following packages:
+googlechrome;winrar;anydesk;microsoft-teams-new-install;teams
+By installing, you accept licenses for the packages.
+googlechrome v120.0.6099.110 already installed.
+ Use --force to reinstall, specify a version to install, or try upgrade.
+Progress: Downloading winrar 7.0.1... 100%
+Installing winrar...
+ The install of winrar was successful.
+  Software installed to 'C:\\Program Files\\WinRAR'
+anydesk v8.0.6 [Approved]
+ The install of anydesk was successful.
+microsoft-teams-new-install v1.0 [Approved]
+ERROR: Running [\"C:\\teamsbootstrapper.exe\" -p ] was not successful. Exit code was '3010'.
+Chocolatey installed 2/4 packages.
+ See the log for details (C:\\ProgramData\\chocolatey\\logs\\chocolatey.log).
+
+Packages requiring reboot:
+ - microsoft-teams-new-install (exit code 3010)
+
+The recent package changes indicate a reboot is necessary.
+"""
+
+
+def test_batch_output_per_package():
+    ids = ["googlechrome", "winrar", "anydesk", "microsoft-teams-new-install", "teams"]
+    assert _parse_choco_batch_output(BATCH_OUTPUT, ids) == {
+        "googlechrome": "skip",
+        "winrar": "ok",
+        "anydesk": "ok",
+        "microsoft-teams-new-install": "reboot",
+        # "teams" só aparece como parte de outro id: não mencionado = falha (será retentado)
+        "teams": "fail",
+    }
+
+
+def test_batch_output_is_case_insensitive():
+    out = "The install of GoogleChrome was successful.\n"
+    assert _parse_choco_batch_output(out, ["googlechrome"]) == {"googlechrome": "ok"}
+
+
+def test_batch_reboot_from_exit_code_without_section():
+    out = "anydesk.install exit code 1641 - reboot initiated\n"
+    assert _parse_choco_batch_output(out, ["anydesk.install"]) == {"anydesk.install": "reboot"}
+
+
+def test_batch_empty_output_fails_everything():
+    assert _parse_choco_batch_output("", ["a", "b"]) == {"a": "fail", "b": "fail"}
+    assert _parse_choco_batch_output(None, ["a"]) == {"a": "fail"}
+
+
+def test_batch_reboot_section_ends_at_first_non_item():
+    out = "Packages requiring reboot:\n - winrar (exit code 3010)\n\n - anydesk (not a reboot item)\n"
+    results = _parse_choco_batch_output(out, ["winrar", "anydesk"])
+    assert results == {"winrar": "reboot", "anydesk": "fail"}
+
+
+@pytest.mark.parametrize("rc, out, expected", [
+    (0, "", "ok"),
+    (3010, "", "reboot"),
+    (1641, "", "reboot"),
+    (1, "winrar v7.0 already installed.", "skip"),
+    (1, "Nothing to do.", "skip"),
+    (1, "ERROR: 404 Not Found", "fail"),
+    (1, None, "fail"),
+])
+def test_classify_single_install(rc, out, expected):
+    assert _classify_choco_result(rc, out) == expected
+
+
+def test_group_packages_by_arguments_in_config_order():
+    packages = [("googlechrome", ""), ("anydesk", "--params '/INSTALL'"), ("winrar", ""), "7zip"]
+    assert _group_choco_packages(packages) == [
+        ("", ["googlechrome", "winrar", "7zip"]),
+        ("--params '/INSTALL'", ["anydesk"]),
+    ]
@@ -0,0 +1,82 @@
+"""utils.executor: contrato do backend e SimulatedExecutor (cenários, limites e desvio das chamadas)."""
+import os
+
+import pytest
+
+from utils.aio import run_process_async, run_sync
+from utils.executor import Executor, SimulatedExecutor, set_executor
+from utils.powershell import run_powershell, run_powershell_batch
+from utils.process import TIMEOUT_RC, choco_progress, run_process, stream_process
+
+SCENARIO = {
+    "rules": [
+        {"match": r"choco(\.exe)? install", "foreach": "install", "latency_ms": 10, "item_latency_ms": 10,
+         "lines": ["Installing {count} packages"], "item_lines": ["Progress: Downloading {item} 1.0... 50%",
+                                                                 " The install of {item} was successful."],
+         "footer": ["Chocolatey installed {count}/{count} packages."]},
+        {"match": "falha", "rc": 2, "stderr": "deu errado"},
+        {"match": "lento", "latency_ms": 2000, "lines": ["1", "2", "3", "4"]},
+    ],
+    "default": {"match": "", "lines": ["ok"]},
+}
+
+
+@pytest.fixture
+def simulated(tmp_path):
+    executor = SimulatedExecutor(SCENARIO, str(tmp_path))
+    set_executor(executor)
+    yield executor
+    set_executor(None)
+
+
+def test_incomplete_backend_fails_at_construction():
+    class OnlyCopy(Executor):
+        def copy_file(self, src, dst):
+            pass
+
+    with pytest.raises(TypeError):
+        OnlyCopy()
+
+
+def test_map_path(tmp_path):
+    executor = SimulatedExecutor({}, str(tmp_path))
+    assert executor.map_path(r"\\192.168.0.11\T.I\packs") == os.path.join(str(tmp_path), "unc", "192.168.0.11",
+                                                                         "T.I", "packs")
+    assert executor.map_path(r"C:\NextUltraDisplays\app.exe") == os.path.join(str(tmp_path), "c",
+                                                                              "NextUltraDisplays", "app.exe")
+    assert executor.map_path("relativo/x") == "relativo/x"
+
+
+def test_calls_are_routed_to_the_backend(simulated):
+    assert run_powershell("Get-Item x") == (0, "ok\n", "")
+    assert run_process(["tool.exe", "falha"]) == (2, "", "deu errado")
+    batch = run_powershell_batch([("a", "echo a"), ("b", "falha")])
+    assert [r.returncode for r in batch] == [0, 2]
+    assert run_sync(run_process_async(["tool.exe"])) == (0, "ok\n", "")
+    assert [kind for kind, *_ in simulated.calls] == ["powershell", "process", "powershell", "powershell", "process"]
+
+
+def test_foreach_rule_streams_per_package_lines(simulated):
+    updates = []
+    result = stream_process(["choco.exe", "install", "winrar", "anydesk", "-y"], parsers=[choco_progress],
+                            on_progress=lambda d, p: updates.append(d))
+    assert result.returncode == 0
+    assert result.tail == [
+        "Installing 2 packages",
+        "Progress: Downloading winrar 1.0... 50%", " The install of winrar was successful.",
+        "Progress: Downloading anydesk 1.0... 50%", " The install of anydesk was successful.",
+        "Chocolatey installed 2/2 packages.",
+    ]
+    assert updates == ["Baixando winrar", "Baixando anydesk"]
+    # latência base + uma por pacote
+    assert simulated.calls[-1][3] == pytest.approx(0.03)
+
+
+def test_simulated_timeout_cuts_output(simulated):
+    rc, out, err = run_process(["lento"], timeout=0.5)
+    assert rc == TIMEOUT_RC
+    assert out == "1\n"
+    assert "0.5s" in err
+
+    result = stream_process(["lento"], timeout=0.5)
+    assert result.returncode == TIMEOUT_RC and result.timed_out == "timeout"
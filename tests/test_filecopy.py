@@ -0,0 +1,131 @@
+"""utils.filecopy: sync_tree (erros, remoção de extras, fila limitada) e comparação por mtime."""
+import os
+import shutil
+import threading
+import time
+
+import pytest
+
+from utils.filecopy import MTIME_TOLERANCE, CopyError, is_unchanged, sync_tree
+
+
+def _tree(root, files):
+    for rel, content in files.items():
+        path = os.path.join(root, *rel.split("/"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+
+
+def _failing_copy(*names):
+    def copy_file(src, dst):
+        if os.path.basename(src) in names:
+            raise OSError(f"acesso negado: {os.path.basename(src)}")
+        shutil.copy2(src, dst)
+    return copy_file
+
+
+@pytest.fixture
+def dirs(tmp_path):
+    src, dst = str(tmp_path / "origem"), str(tmp_path / "destino")
+    _tree(src, {"a.txt": "a", "b.txt": "b", "sub/c.txt": "c"})
+    return src, dst
+
+
+def test_sync_copies_then_skips_and_removes_extras(dirs):
+    src, dst = dirs
+    assert sync_tree(src, dst).files_copied == 3
+
+    _tree(dst, {"sobra.txt": "x", "velha/d.txt": "d"})
+    stats = sync_tree(src, dst)
+    assert (stats.files_copied, stats.files_skipped, stats.files_removed) == (0, 3, 2)
+    assert not os.path.exists(os.path.join(dst, "velha"))
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_errors_are_aggregated_with_partial_stats(dirs, workers):
+    src, dst = dirs
+    with pytest.raises(CopyError) as info:
+        sync_tree(src, dst, workers=workers, copy_file=_failing_copy("a.txt", "c.txt"))
+
+    error = info.value
+    assert sorted(os.path.basename(path) for path, _ in error.errors) == ["a.txt", "c.txt"]
+    assert str(error).startswith("2 arquivo(s) com erro")
+    assert "acesso negado" in error.report()
+    # O que deu certo continua copiado e o tempo total é preenchido mesmo com erro
+    assert error.stats.files_copied == 1
+    assert error.stats.elapsed > 0
+    assert os.path.exists(os.path.join(dst, "b.txt"))
+
+
+def test_report_is_limited():
+    error = CopyError([(f"arquivo{i}", "erro") for i in range(15)])
+    lines = error.report(limit=10).splitlines()
+    assert len(lines) == 11
+    assert lines[-1] == "  ... e mais 5"
+    assert error.stats is None
+
+
+def test_no_extras_removed_when_anything_failed(dirs):
+    src, dst = dirs
+    _tree(dst, {"sobra.txt": "x"})
+    with pytest.raises(CopyError):
+        sync_tree(src, dst, copy_file=_failing_copy("b.txt"))
+    assert os.path.exists(os.path.join(dst, "sobra.txt"))
+
+    # Sem erro, a mesma sincronização remove o que saiu da origem
+    assert sync_tree(src, dst).files_removed == 1
+    assert not os.path.exists(os.path.join(dst, "sobra.txt"))
+
+
+def test_in_flight_files_are_bounded(tmp_path):
+    src, dst = str(tmp_path / "origem"), str(tmp_path / "destino")
+    _tree(src, {f"arquivo{i:03}.txt": str(i) for i in range(200)})
+    workers = 2
+    lock = threading.Lock()
+    counts = {"discovered": 0, "done": 0, "max_pending": 0}
+
+    def on_discover(size):
+        with lock:
+            counts["discovered"] += 1
+            counts["max_pending"] = max(counts["max_pending"], counts["discovered"] - counts["done"])
+
+    def slow_copy(s, d):
+        time.sleep(0.002)
+        shutil.copy2(s, d)
+
+    def on_file(path, size, copied):
+        with lock:
+            counts["done"] += 1
+
+    stats = sync_tree(src, dst, workers=workers, copy_file=slow_copy, on_discover=on_discover, on_file=on_file)
+    assert stats.files_copied == 200
+    # A listagem espera as cópias: no máximo workers * 4 na fila, mais o arquivo recém-listado
+    assert workers < counts["max_pending"] <= workers * 4 + 1
+
+
+def test_mtime_tolerance(tmp_path):
+    src, dst = str(tmp_path / "a.bin"), str(tmp_path / "b.bin")
+    for path in (src, dst):
+        with open(path, "wb") as f:
+            f.write(b"12345")
+    base = os.stat(src).st_mtime
+
+    os.utime(dst, (base, base + MTIME_TOLERANCE - 0.5))
+    assert is_unchanged(src, dst)
+    os.utime(dst, (base, base - MTIME_TOLERANCE + 0.5))
+    assert is_unchanged(src, dst)
+    os.utime(dst, (base, base + MTIME_TOLERANCE + 1))
+    assert not is_unchanged(src, dst)
+
+    # Mesmo tamanho e mtime com outro conteúdo: só compare_hash percebe; tamanho diferente sempre copia
+    os.utime(dst, (base, base))
+    with open(dst, "wb") as f:
+        f.write(b"54321")
+    os.utime(dst, (base, base))
+    assert is_unchanged(src, dst)
+    assert not is_unchanged(src, dst, compare_hash=True)
+    with open(dst, "ab") as f:
+        f.write(b"6")
+    os.utime(dst, (base, base))
+    assert not is_unchanged(src, dst)
@@ -0,0 +1,109 @@
+"""utils.history: importação única dos logs antigos e registro das execuções pelos eventos."""
+import os
+import time
+
+import pytest
+
+from utils import history as history_module
+from utils import logger as logger_module
+from utils.history import RunHistory, get_history
+from utils.logger import Logger
+
+
+def _log(log_dir, name, lines, age_s=0.0):
+    path = os.path.join(str(log_dir), name)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(f"[2026-10-01 08:00:00] [INFO] {line}" for line in lines) + "\n")
+    if age_s:
+        mtime = time.time() - age_s
+        os.utime(path, (mtime, mtime))
+    return path
+
+
+@pytest.fixture
+def history(tmp_path):
+    db = RunHistory(str(tmp_path / "history.db"))
+    yield db
+    db.close()
+
+
+def _runs(db):
+    rows = db._conn.execute("SELECT run_id, hostname, kind, started_at, duration_s FROM runs ORDER BY id")
+    return [dict(row) for row in rows]
+
+
+def test_import_parses_name_and_kind(history, tmp_path):
+    _log(tmp_path, "provisioning_PC_FIN_01_20261001_080000.log", ["Diagnóstico", "Etapa 2 concluída em 900s!"])
+    _log(tmp_path, "provisioning_PC02_20261002_090000.log", ["Configurando identidade do computador"])
+    _log(tmp_path, "provisioning_PC03_20261003_100000.log", ["Diagnóstico do sistema"])
+    _log(tmp_path, "provisioning_PC04_20261004_110000.log", ["Menu principal"])
+    _log(tmp_path, "provisioning_PC05_data-invalida.log", ["Etapa 2 concluída"])
+    _log(tmp_path, "trace_PC01_20261001_080000.json", [])
+
+    assert history.import_logs(str(tmp_path)) == 4
+    runs = {run["run_id"]: run for run in _runs(history)}
+    assert set(runs) == {"log:provisioning_PC_FIN_01_20261001_080000.log",
+                         "log:provisioning_PC02_20261002_090000.log",
+                         "log:provisioning_PC03_20261003_100000.log",
+                         "log:provisioning_PC04_20261004_110000.log"}
+
+    first = runs["log:provisioning_PC_FIN_01_20261001_080000.log"]
+    # Hostname com "_" e tipo pela prioridade (instalação vence diagnóstico no mesmo log)
+    assert (first["hostname"], first["kind"]) == ("PC_FIN_01", "install")
+    assert first["started_at"] == "2026-10-01T08:00:00.000"
+    assert first["duration_s"] > 0
+    assert [runs[f"log:provisioning_PC0{i}_2026100{i}_{i + 7:02}0000.log"]["kind"] for i in (2, 3, 4)] == [
+        "identity", "diagnostics", "log"]
+
+
+def test_reimport_is_idempotent(history, tmp_path):
+    _log(tmp_path, "provisioning_PC01_20261001_080000.log", ["Etapa 2 concluída"])
+    assert history.import_logs(str(tmp_path)) == 1
+
+    # Logs novos depois da importação entram pelos eventos, não por uma nova varredura
+    _log(tmp_path, "provisioning_PC01_20261002_080000.log", ["Etapa 2 concluída"])
+    assert history.import_logs(str(tmp_path)) == 0
+    reopened = RunHistory(history.path)
+    try:
+        assert reopened.import_logs(str(tmp_path)) == 0
+        assert len(_runs(reopened)) == 1
+    finally:
+        reopened.close()
+
+
+def test_current_log_is_not_imported(tmp_path, monkeypatch):
+    _log(tmp_path, "provisioning_PC01_20261001_080000.log", ["Etapa 2 concluída"], age_s=3600)
+    current = Logger(str(tmp_path), buffered=False)
+    current.output("Menu principal")
+    monkeypatch.setattr(logger_module, "_logger", current)
+    monkeypatch.setattr(history_module, "_history", None)
+    monkeypatch.setattr(history_module, "history_path", lambda log_dir=None: str(tmp_path / "history.db"))
+
+    db = get_history()
+    try:
+        assert [run["run_id"] for run in _runs(db)] == ["log:provisioning_PC01_20261001_080000.log"]
+    finally:
+        db.close()
+
+
+def test_events_record_runs_and_steps(history):
+    def event(name, second, step=None, duration=None, error=None, **data):
+        return {"event": name, "run_id": "r1", "hostname": "PC01", "ts": f"2026-10-18T10:00:{second:02}.000",
+                "step": step, "duration_s": duration, "error_class": error, "data": data}
+
+    for record in [
+        event("run_start", 0, kind="diagnostics"),
+        event("run_end", 1, duration=1.0, kind="diagnostics", passed=5, total=5),
+        event("run_start", 2, kind="install"),
+        event("step_end", 3, step="chocolatey", duration=30.0, status=True),
+        event("step_end", 4, step="office", duration=90.0, status=False, error="TimeoutError"),
+        event("run_end", 5, duration=120.0, kind="install", ok=1, failed=1, skipped=0),
+    ]:
+        history.record(record, log_file="provisioning_PC01_20261018_100000.log")
+
+    last = history.last_run("install")
+    assert (last["status"], last["ok"], last["failed"], last["duration_s"]) == ("fail", 1, 1, 120.0)
+    assert history.last_run("diagnostics")["status"] == "ok"
+    assert history.last_run()["id"] == last["id"]
+    assert [(s["step"], s["status"], s["error_class"]) for s in history.steps(last["id"])] == [
+        ("chocolatey", "ok", None), ("office", "fail", "TimeoutError")]
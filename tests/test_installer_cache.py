@@ -0,0 +1,129 @@
+"""utils.installer_cache: cache endereçado por conteúdo, LRU e recuperação de objetos corrompidos."""
+import os
+import shutil
+
+import pytest
+
+from config import CONFIG, InstallerConfig
+from utils import installer_cache
+from utils.installer_cache import InstallerCache, get_installer_cache
+
+
+def _write(path, data: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+    return str(path)
+
+
+class CountingCopy:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, src, dst):
+        self.calls += 1
+        return shutil.copy2(src, dst)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return InstallerCache(str(tmp_path / "cache"), max_bytes=10 * 1024 * 1024)
+
+
+def test_second_fetch_is_a_hit_without_transfer(cache, tmp_path):
+    source = _write(tmp_path / "rede" / "sqlncli.msi", b"MSI" * 1000)
+    copy = CountingCopy()
+
+    first, hit = cache.fetch(source, copy_file=copy)
+    assert not hit and copy.calls == 1
+    assert os.path.basename(first) == "sqlncli.msi"
+
+    second, hit = cache.fetch(source, copy_file=copy)
+    assert hit and second == first and copy.calls == 1
+
+    # Índice persistido: outra instância também acerta
+    again, hit = InstallerCache(cache.root, cache.max_bytes).fetch(source, copy_file=copy)
+    assert hit and again == first
+
+
+def test_identical_content_shares_one_object(cache, tmp_path):
+    a = _write(tmp_path / "rede1" / "setup.exe", b"MZ mesmo conteudo")
+    b = _write(tmp_path / "rede2" / "setup.exe", b"MZ mesmo conteudo")
+    path_a, _ = cache.fetch(a)
+    path_b, _ = cache.fetch(b)
+    assert path_a == path_b
+    assert len(cache.index["objects"]) == 1
+
+
+def test_changed_source_is_fetched_again(cache, tmp_path):
+    source = _write(tmp_path / "rede" / "setup.exe", b"v1")
+    cache.fetch(source)
+    _write(tmp_path / "rede" / "setup.exe", b"versao 2")
+    path, hit = cache.fetch(source)
+    assert not hit
+    with open(path, "rb") as f:
+        assert f.read() == b"versao 2"
+
+
+def test_corrupt_object_is_evicted_and_fetched_again(cache, tmp_path):
+    source = _write(tmp_path / "rede" / "setup.exe", b"MZ original")
+    path, _ = cache.fetch(source)
+    _write(path, b"MZ corrompido")
+
+    copy = CountingCopy()
+    again, hit = cache.fetch(source, copy_file=copy)
+    assert not hit and copy.calls == 1
+    with open(again, "rb") as f:
+        assert f.read() == b"MZ original"
+
+
+def test_tree_fetch_and_hit(cache, tmp_path):
+    root = tmp_path / "rede" / "Office2013"
+    _write(root / "setup.exe", b"MZ")
+    _write(root / "proplus.ww" / "proplusww.msi", b"MSI")
+    path, hit = cache.fetch(str(root), tree=True)
+    assert not hit
+    assert os.path.exists(os.path.join(path, "proplus.ww", "proplusww.msi"))
+    assert cache.fetch(str(root), tree=True) == (path, True)
+
+
+def test_lru_eviction_keeps_recently_used(tmp_path):
+    cache = InstallerCache(str(tmp_path / "cache"), max_bytes=250)
+    sources = {name: _write(tmp_path / "rede" / f"{name}.exe", name.encode() * 100) for name in "abc"}
+
+    cache.fetch(sources["a"])
+    cache.fetch(sources["b"])
+    cache.fetch(sources["a"])  # a passa a ser o mais recente
+    path_c, _ = cache.fetch(sources["c"])
+
+    assert cache.total_bytes() <= 250
+    assert cache.lookup(sources["b"]) is None
+    assert cache.lookup(sources["a"]) is not None
+    assert os.path.exists(path_c)
+
+
+def test_oversized_object_is_kept_while_in_use(tmp_path):
+    cache = InstallerCache(str(tmp_path / "cache"), max_bytes=10)
+    source = _write(tmp_path / "rede" / "grande.exe", b"x" * 100)
+    path, _ = cache.fetch(source)
+    assert os.path.exists(path)
+
+
+@pytest.fixture
+def unreachable_cache(tmp_path, monkeypatch):
+    # Pasta "dentro" de um arquivo: makedirs falha como uma letra de pendrive ausente
+    blocker = _write(tmp_path / "arquivo", b"")
+    monkeypatch.setattr(CONFIG, "installer_cache_dir", os.path.join(blocker, "cache"))
+    monkeypatch.setattr(installer_cache, "_cache", None)
+    monkeypatch.setattr(installer_cache, "_cache_failed", False)
+
+
+def test_unreachable_cache_dir_disables_cache(unreachable_cache):
+    assert get_installer_cache() is None
+    assert get_installer_cache() is None
+
+
+def test_unreachable_cache_runs_installer_from_network(unreachable_cache, tmp_path):
+    from modules import install
+    cfg = InstallerConfig(path=_write(tmp_path / "rede" / "sqlncli.msi", b"MSI"))
+    assert install._local_installer("SQL Native Client", cfg) == cfg.path
@@ -0,0 +1,98 @@
+"""utils.inventory: índice do que já está instalado (pasta lib do choco e snapshot JSON)."""
+import json
+
+import pytest
+
+from utils.inventory import (
+    InstalledIndex, SnapshotBackend, WindowsBackend, get_installed_index, invalidate_installed_index,
+    set_inventory_backend,
+)
+
+
+def _nuspec(lib, package_id, version):
+    folder = lib / package_id
+    folder.mkdir(parents=True)
+    (folder / f"{package_id}.nuspec").write_text(
+        f'<?xml version="1.0"?><package><metadata><id>{package_id}</id>'
+        f"<version> {version} </version></metadata></package>", encoding="utf-8")
+
+
+def test_choco_lib_versions_from_nuspec(tmp_path):
+    _nuspec(tmp_path, "GoogleChrome", "120.0.6099.110")
+    _nuspec(tmp_path, "winrar", "7.0.1")
+    (tmp_path / "sem-nuspec").mkdir()
+    (tmp_path / "arquivo.txt").write_text("x")
+
+    assert WindowsBackend(str(tmp_path)).choco_packages() == {
+        "googlechrome": "120.0.6099.110",
+        "winrar": "7.0.1",
+    }
+
+
+def test_missing_choco_lib_is_empty(tmp_path):
+    assert WindowsBackend(str(tmp_path / "nao-existe")).choco_packages() == {}
+
+
+def test_index_lookups():
+    index = InstalledIndex({"googlechrome": "120.0"},
+                           {"Microsoft SQL Server 2012 Native Client": "11.4", "AnyDesk": "8.0"})
+    assert index.choco_version("GoogleChrome") == "120.0"
+    assert index.choco_version("winrar") is None
+    assert index.find_program("native client|sqlncli") == ("Microsoft SQL Server 2012 Native Client", "11.4")
+    assert index.find_program("anydesk") == ("AnyDesk", "8.0")
+    assert index.find_program("office| |") is None
+
+
+@pytest.mark.parametrize("display_name, detected", [
+    ("Microsoft 365 Apps for business - pt-br", True),
+    ("Microsoft 365 Apps for enterprise - en-us", True),
+    ("Microsoft Office 365 ProPlus - pt-br", True),
+    ("Microsoft Office 365 Business - pt-br", True),
+    # Versões de fábrica (OEM) do Click-to-Run: não são a instalação corporativa
+    ("Microsoft 365 - pt-br", False),
+    ("Microsoft 365 - en-us", False),
+    ("Microsoft OneNote - pt-br", False),
+])
+def test_office_365_detection_ignores_oem_stubs(display_name, detected):
+    from config import CONFIG
+    index = InstalledIndex({}, {display_name: "16.0.17928.20156"})
+    assert (index.find_program(CONFIG.office16_365_installer.detect) is not None) is detected
+
+
+@pytest.fixture
+def snapshot(tmp_path):
+    path = tmp_path / "inventory.json"
+    path.write_text(json.dumps({"choco": {"WinRAR": "7.0"}, "programs": {"AnyDesk": "8.0"}}), encoding="utf-8")
+    set_inventory_backend(SnapshotBackend(str(path)))
+    yield path
+    set_inventory_backend(None)
+
+
+def test_cached_index_reads_backend_once(snapshot):
+    first = get_installed_index()
+    assert first.choco_version("winrar") == "7.0"
+
+    snapshot.write_text(json.dumps({"choco": {"winrar": "7.1"}, "programs": {}}), encoding="utf-8")
+    assert get_installed_index() is first
+
+    # Após invalidar, o backend é consultado de novo (SnapshotBackend lê o JSON uma vez)
+    invalidate_installed_index()
+    again = get_installed_index()
+    assert again is not first
+    assert again.find_program("anydesk") == ("AnyDesk", "8.0")
+
+
+def test_installed_packages_never_reach_choco(snapshot, tmp_path):
+    from config import CONFIG
+    from modules import install
+    from utils.executor import SimulatedExecutor, set_executor
+
+    snapshot.write_text(json.dumps({"choco": {pid: "1.0" for pid, _ in CONFIG.choco_packages}}), encoding="utf-8")
+    set_inventory_backend(SnapshotBackend(str(snapshot)))
+    executor = SimulatedExecutor({}, str(tmp_path))
+    set_executor(executor)
+    try:
+        assert install.install_choco_packages() is True
+    finally:
+        set_executor(None)
+    assert not [text for kind, text, _, _ in executor.calls if " install " in f" {text} "]
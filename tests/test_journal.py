@@ -0,0 +1,134 @@
+"""utils.journal e --resume: reconstrução da sessão, linhas truncadas e retomada da Instalação Completa."""
+import json
+
+import pytest
+
+from modules import install
+from utils.journal import InstallJournal
+from utils.scheduler import Step, StepResult
+
+STEP_FUNCTIONS = {
+    "chocolatey": "install_choco_packages",
+    "sqlncli": "install_sql_native_client",
+    "folders": "copy_network_folders",
+    "office": "install_office",
+    "power": "configure_power_plan",
+    "shortcut": "create_webapp_shortcut",
+    "anydesk": "launch_anydesk",
+}
+
+
+@pytest.fixture
+def journal(tmp_path):
+    return InstallJournal(str(tmp_path / "journal_PC01.jsonl"))
+
+
+def _run(journal, steps, options=None, resume=None, end=True, started_only=()):
+    """Uma execução no diário: steps = {chave: status}; started_only = iniciadas sem finish."""
+    journal.begin(options or {}, resume=resume)
+    for key, status in steps.items():
+        step = Step(key, key.title(), lambda: None)
+        journal.step_started(step)
+        journal.step_finished(step, StepResult(key, key.title(), status, detail=f"{key} ok" if status else "",
+                                               elapsed=1.0, timed_out=status == "timeout"))
+    for key in started_only:
+        journal.step_started(Step(key, key.title(), lambda: None))
+    if end:
+        journal.end()
+
+
+def test_completed_and_interrupted_steps(journal):
+    _run(journal, {"chocolatey": True, "sqlncli": False}, options={"skip": ["office"]}, end=False,
+         started_only=["folders"])
+
+    session = journal.last_session()
+    assert session.options == {"skip": ["office"]}
+    assert session.completed("chocolatey")
+    assert not session.completed("sqlncli")
+    assert not session.completed("folders")
+    assert session.interrupted == ["folders"]
+    assert session.finished is False
+
+
+def test_resume_keeps_session_and_clears_interrupted(journal):
+    _run(journal, {"chocolatey": True}, end=False, started_only=["folders"])
+    first = journal.last_session()
+
+    _run(journal, {"folders": True}, resume=first)
+    session = journal.last_session()
+    assert session.session == first.session
+    assert session.completed("chocolatey") and session.completed("folders")
+    assert session.interrupted == []
+    assert session.finished is True
+
+
+def test_truncated_last_line_is_ignored_and_closed(journal):
+    _run(journal, {"chocolatey": True}, end=False)
+    with open(journal.path, "a", encoding="utf-8") as f:
+        f.write('{"ts": "2026-10-18T10:00:00", "event": "finish", "step": "folders", "sta')
+
+    session = journal.last_session()
+    assert session.completed("chocolatey")
+    assert "folders" not in session.results
+
+    # Retomada fecha a linha truncada: o próximo registro continua legível
+    _run(journal, {"folders": True}, resume=session)
+    with open(journal.path, encoding="utf-8") as f:
+        assert json.loads(f.read().splitlines()[-1])["event"] == "end"
+    assert journal.last_session().completed("folders")
+
+
+def test_last_session_picks_most_recent_installation(journal, tmp_path):
+    _run(journal, {"chocolatey": True, "folders": True})
+    old = journal.last_session()
+    _run(journal, {"chocolatey": False})
+
+    # Registro atrasado de outra sessão (ex: outra instância gravando no mesmo diário)
+    stale = InstallJournal(journal.path)
+    stale.session_id, stale.run_id = old.session, "atrasado"
+    stale.step_finished(Step("power", "Power", lambda: None), StepResult("power", "Power", True))
+
+    session = journal.last_session()
+    assert session.session != old.session
+    assert set(session.results) == {"chocolatey"}
+    assert not session.completed("chocolatey")
+
+
+def test_empty_or_missing_journal(journal):
+    assert journal.last_session() is None
+    open(journal.path, "w").close()
+    assert journal.last_session() is None
+
+
+def test_summary_rebuilt_from_journal(journal):
+    _run(journal, {"chocolatey": True, "sqlncli": "timeout"}, end=False)
+    _run(journal, {"sqlncli": False}, resume=journal.last_session())
+    planned = [Step("chocolatey", "Softwares", lambda: None, "choco"),
+               Step("sqlncli", "SQL", lambda: None, "msi"),
+               Step("power", "Energia", lambda: None, "powercfg")]
+
+    assert install._journal_summary(journal.last_session(), planned) == [
+        ("Chocolatey", True, "chocolatey ok"),
+        ("Sqlncli", False, ""),
+        ("Energia", None, "powercfg"),
+    ]
+    assert install._journal_summary(None, planned)[0] == ("Softwares", None, "choco")
+
+
+def test_resume_skips_completed_steps(journal, monkeypatch):
+    _run(journal, {"chocolatey": True, "sqlncli": False}, options={"skip": ["office"], "office_version": ""},
+         end=False, started_only=["folders"])
+
+    called = []
+    for key, name in STEP_FUNCTIONS.items():
+        monkeypatch.setattr(install, name, lambda *a, _key=key, **k: called.append(_key) or True)
+    monkeypatch.setattr(install, "get_journal", lambda: journal)
+    monkeypatch.setattr(install, "_pre_flight_check", lambda: True)
+
+    assert install.run_full_install(resume=True) is True
+    # chocolatey já concluída; office pulada pelas opções da execução original
+    assert sorted(called) == ["anydesk", "folders", "power", "shortcut", "sqlncli"]
+
+    session = journal.last_session()
+    assert session.finished and session.interrupted == []
+    assert all(session.completed(key) for key in STEP_FUNCTIONS if key != "office")
@@ -0,0 +1,79 @@
+"""utils.logger: arquivo em lotes e console renderizado fora da thread que registra."""
+import threading
+import time
+
+import pytest
+
+from utils import console as console_module
+from utils import logger as logger_module
+from utils.logger import Logger
+
+
+class SlowConsole:
+    """Dublê do Console do Rich: cada print demora `delay` e fica registrado."""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.printed = []
+        self.threads = set()
+
+    def print(self, message="", *args, **kwargs):
+        time.sleep(self.delay)
+        self.threads.add(threading.current_thread().name)
+        self.printed.append(str(message))
+
+
+@pytest.fixture
+def slow_console(monkeypatch):
+    fake = SlowConsole(delay=0.05)
+    monkeypatch.setattr(console_module, "console", fake)
+    return fake
+
+
+@pytest.fixture
+def logger(tmp_path, monkeypatch):
+    log = Logger(str(tmp_path))
+    monkeypatch.setattr(logger_module, "_logger", log)
+    yield log
+    log.close()
+
+
+def test_slow_console_does_not_block_caller(logger, slow_console):
+    start = time.monotonic()
+    for i in range(10):
+        logger.info(f"mensagem {i}")
+    assert time.monotonic() - start < 10 * slow_console.delay / 2
+
+    logger.wait_console()
+    assert [line.split()[-1] for line in slow_console.printed] == [str(i) for i in range(10)]
+    assert slow_console.threads == {"logger-console"}
+
+
+def test_direct_prints_and_prompts_keep_order(logger, slow_console, monkeypatch):
+    logger.warning("pendente 1")
+    logger.error("pendente 2")
+    console_module.print_step("depois")
+    assert [line.split()[-1] for line in slow_console.printed] == ["1", "2", "depois"]
+
+    logger.info("antes da pergunta")
+    monkeypatch.setattr(console_module.Prompt, "ask",
+                        classmethod(lambda cls, *a, **k: slow_console.printed[-1]))
+    assert console_module.ask_input("Opção").endswith("antes da pergunta")
+
+
+def test_close_writes_file_and_pending_console(logger, slow_console):
+    logger.info("no console e no arquivo")
+    logger.output("só no arquivo")
+    logger.close()
+
+    assert len(slow_console.printed) == 1
+    with open(logger.log_file, encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    assert [line.split("] ", 1)[1] for line in lines] == [
+        "[INFO] no console e no arquivo", "[OUTPUT] só no arquivo"]
+
+    # Depois do close: gravação e console diretos na própria chamada
+    logger.success("direto")
+    assert slow_console.printed[-1].endswith("direto")
+    with open(logger.log_file, encoding="utf-8") as f:
+        assert f.read().splitlines()[-1].endswith("[SUCCESS] direto")
@@ -0,0 +1,138 @@
+"""utils.packs: publicação, conferência de atualização e extração dos pacotes de pastas."""
+import os
+
+import pytest
+
+from config import CONFIG, FolderCopyConfig
+from modules import install
+from utils import packs
+from utils.packs import (MANIFEST_SUFFIX, build_pack, extract_pack, fresh_pack, manifest_path, pack_name,
+                         shallow_signature, verify_extracted)
+
+
+def _tree(root, files):
+    for rel, content in files.items():
+        path = os.path.join(root, *rel.split("/"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+
+
+@pytest.fixture
+def published(tmp_path):
+    source = str(tmp_path / "rede" / "NextUltraDisplays")
+    pack_dir = str(tmp_path / "packs")
+    _tree(source, {"app.exe": "MZ", "config.ini": "a=1", "dados/tabela.csv": "1;2", "dados/sub/x.bin": "x"})
+    build_pack(source, pack_dir, "tar.gz")
+    return source, pack_dir
+
+
+def test_published_pack_is_fresh(published):
+    source, pack_dir = published
+    manifest, reason = fresh_pack(source, pack_dir)
+    assert manifest is not None and reason == ""
+    assert manifest.shallow == shallow_signature(source)
+
+
+@pytest.mark.parametrize("change", [
+    lambda source: _tree(source, {"config.ini": "a=1\nb=2"}),
+    lambda source: _tree(source, {"novo.txt": "novo"}),
+    lambda source: os.remove(os.path.join(source, "dados", "tabela.csv")),
+])
+def test_changed_source_makes_pack_stale(published, change):
+    source, pack_dir = published
+    change(source)
+    manifest, reason = fresh_pack(source, pack_dir)
+    assert manifest is None
+    assert "desatualizado" in reason
+
+
+def test_old_manifest_without_shallow_signature_uses_full_signature(published):
+    source, pack_dir = published
+    manifest, _ = fresh_pack(source, pack_dir)
+    manifest.shallow = ""
+    manifest.save(manifest_path(pack_dir, source))
+    assert fresh_pack(source, pack_dir)[0] is not None
+    _tree(source, {"dados/sub/x.bin": "alterado fundo"})
+    assert fresh_pack(source, pack_dir)[0] is None
+
+
+def test_stale_pack_falls_back_to_file_copy(published, tmp_path, monkeypatch):
+    source, pack_dir = published
+    dst = str(tmp_path / "local" / "NextUltraDisplays")
+    monkeypatch.setattr(CONFIG, "unc_folders_to_copy",
+                        [FolderCopyConfig(source=source, destination=dst, workers=1, pack_dir=pack_dir)])
+
+    assert install.copy_network_folders() is True
+    assert install._copy_metrics[-1]["mode"] == "pack"
+
+    # Origem alterada depois da publicação: o pacote antigo não pode sobrescrever a versão nova
+    _tree(source, {"config.ini": "a=2 (nova versão)"})
+    assert install.copy_network_folders() is True
+    assert install._copy_metrics[-1]["mode"] == "files"
+    with open(os.path.join(dst, "config.ini"), encoding="utf-8") as f:
+        assert f.read() == "a=2 (nova versão)"
+
+
+def test_verify_extracted_detects_local_changes(published, tmp_path):
+    source, pack_dir = published
+    manifest, _ = fresh_pack(source, pack_dir)
+    dst = str(tmp_path / "destino")
+    assert verify_extracted(dst, manifest) == (False, "")
+    extract_pack(manifest, pack_dir, dst)
+    assert verify_extracted(dst, manifest) == (True, "")
+    _tree(dst, {"config.ini": "editado localmente"})
+    ok, reason = verify_extracted(dst, manifest)
+    assert not ok and "config.ini" in reason
+
+
+def test_sources_with_same_folder_name_get_separate_packs(tmp_path):
+    first = str(tmp_path / "srv1" / "client")
+    second = str(tmp_path / "srv2" / "client")
+    pack_dir = str(tmp_path / "packs")
+    _tree(first, {"app.exe": "MZ versão 1"})
+    _tree(second, {"app.exe": "MZ versão 2", "extra.dll": "x"})
+
+    assert pack_name(first) != pack_name(second)
+    assert pack_name(first).startswith("client-")
+    # Mesmo caminho com outra grafia (Windows/UNC não diferencia) dá o mesmo pacote
+    assert pack_name(first.upper() + "/").lower() == pack_name(first)
+
+    build_pack(first, pack_dir)
+    build_pack(second, pack_dir)
+    assert fresh_pack(first, pack_dir)[0].files == 1
+    assert fresh_pack(second, pack_dir)[0].files == 2
+
+
+def test_pack_published_under_legacy_name_is_still_used(published):
+    source, pack_dir = published
+    legacy = os.path.join(pack_dir, os.path.basename(source) + MANIFEST_SUFFIX)
+    os.replace(manifest_path(pack_dir, source), legacy)
+
+    manifest, reason = fresh_pack(source, pack_dir)
+    assert manifest is not None, reason
+    # Outra origem com o mesmo nome final não aproveita o pacote antigo: a assinatura não bate
+    other = os.path.join(os.path.dirname(os.path.dirname(source)), "outra", os.path.basename(source))
+    _tree(other, {"app.exe": "MZ"})
+    assert fresh_pack(other, pack_dir) == (None, "pacote desatualizado em relação à origem")
+
+
+def test_failed_swap_keeps_previous_version_and_removes_staging(published, tmp_path, monkeypatch):
+    source, pack_dir = published
+    manifest, _ = fresh_pack(source, pack_dir)
+    dst = str(tmp_path / "destino")
+    _tree(dst, {"versao-anterior.txt": "1"})
+    real_rename = os.rename
+
+    def failing_rename(src, target):
+        if src.endswith(".pack-tmp"):
+            raise PermissionError("arquivo em uso")
+        return real_rename(src, target)
+
+    monkeypatch.setattr(packs.os, "rename", failing_rename)
+    with pytest.raises(PermissionError):
+        extract_pack(manifest, pack_dir, dst)
+
+    assert os.listdir(dst) == ["versao-anterior.txt"]
+    assert not os.path.exists(dst + ".pack-tmp")
+    assert not os.path.exists(dst + ".pack-old")
@@ -0,0 +1,87 @@
+"""utils.powershell: protocolo de frames e pool de hosts persistentes (com o dublê do powershell.exe)."""
+import os
+import sys
+import time
+
+import pytest
+
+from utils import powershell
+from utils.powershell import (
+    FRAME_MARKER, HOST_SCRIPT, MAX_START_FAILURES, HostStartFailed, PowerShellPool, _b64encode, parse_frame,
+)
+from utils.process import TIMEOUT_RC
+
+FAKE_HOST = [sys.executable, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                          "benchmarks", "fake_powershell_host.py")]
+
+
+def _host_argv(startup_ms: int = 0):
+    return FAKE_HOST + ["--startup-ms", str(startup_ms), "-Command", HOST_SCRIPT]
+
+
+@pytest.fixture
+def pool():
+    pool = PowerShellPool(1, _host_argv())
+    yield pool
+    pool.close()
+
+
+def test_parse_frame():
+    line = f"{FRAME_MARKER} 3 {_b64encode('saída ✓')} {_b64encode('erro')} 12\r\n"
+    assert parse_frame(line) == (3, "saída ✓", "erro")
+    # Saídas vazias: campos base64 vazios entre espaços simples
+    assert parse_frame(f"{FRAME_MARKER} 0  \n") == (0, "", "")
+    assert parse_frame(f"{FRAME_MARKER} 0\n") == (0, "", "")
+    assert parse_frame("linha comum\n") is None
+
+
+def test_pool_reuses_host(pool):
+    assert pool.run("echo um") == (0, "um\n", "")
+    pid = pool._idle[0].process.pid
+    assert pool.run("echo erro >&2; exit 4") == (4, "", "erro\n")
+    assert pool._idle[0].process.pid == pid
+
+
+def test_run_many_returns_one_result_per_command(pool):
+    results = pool.run_many([("a", "echo a"), ("b", "exit 2")])
+    assert [(r.label, r.returncode, r.stdout) for r in results] == [("a", 0, "a\n"), ("b", 2, "")]
+
+
+def test_dead_host_is_restarted(pool):
+    pool.run("echo um")
+    host = pool._idle[0]
+    host.process.kill()
+    host.process.wait()
+
+    assert pool.run("echo dois") == (0, "dois\n", "")
+    assert not pool.disabled
+
+
+def test_command_timeout_discards_host(pool):
+    rc, _, err = pool.run("sleep 5", timeout=0.5)
+    assert rc == TIMEOUT_RC
+    assert "encerrado" in err
+    # O host foi encerrado com o comando; o próximo sobe um novo
+    assert pool.run("echo ok") == (0, "ok\n", "")
+
+
+def test_start_timeout_and_disable_after_repeated_failures(monkeypatch):
+    monkeypatch.setattr(powershell, "START_TIMEOUT", 0.3)
+    slow = PowerShellPool(1, _host_argv(startup_ms=5000))
+    try:
+        for attempt in range(MAX_START_FAILURES):
+            assert not slow.disabled
+            start = time.monotonic()
+            with pytest.raises(HostStartFailed):
+                slow.run("echo x")
+            assert time.monotonic() - start < 3
+        assert slow.disabled
+    finally:
+        slow.close()
+
+
+def test_missing_executable_fails_to_start():
+    missing = PowerShellPool(1, ["/nao/existe/powershell.exe"])
+    with pytest.raises(HostStartFailed):
+        missing.run("echo x")
+    assert not missing.disabled
@@ -0,0 +1,134 @@
+"""utils.process: parsers de progresso, LineSink e stream_process."""
+import sys
+
+import pytest
+
+from utils.process import TIMEOUT_RC, LineSink, choco_progress, last_line, stream_process
+
+
+@pytest.mark.parametrize("line, expected", [
+    ("Progress: Downloading googlechrome 120.0.1... 45%", ("Baixando googlechrome", 45.0)),
+    ("Progress: 80% - Saving 10 MB of 12 MB", (None, 80.0)),
+    ("Downloading anydesk.install 64 bit", ("Baixando anydesk.install", 0.0)),
+    ("Installing winrar...", ("Instalando winrar", None)),
+    ("Downloading package from source 'https://community.chocolatey.org/api/v2/'", None),
+    ("The install of winrar was successful.", None),
+    ("", None),
+])
+def test_choco_progress(line, expected):
+    assert choco_progress(line) == expected
+
+
+def test_last_line_truncates_and_ignores_blank():
+    assert last_line("   ") is None
+    assert last_line("x" * 100) == ("x" * 60, None)
+
+
+def _sink(logger, **kwargs):
+    sink = LineSink(**kwargs)
+    sink.logger = logger
+    return sink
+
+
+def test_line_sink_logs_first_download_tick_only(recording_logger):
+    updates = []
+    sink = _sink(recording_logger, parsers=[choco_progress], on_progress=lambda d, p: updates.append((d, p)))
+    lines = [
+        "Chocolatey v2.2.2",
+        "Installing googlechrome...",
+        "Progress: Downloading googlechrome 120.0... 10%",
+        "Progress: Downloading googlechrome 120.0... 50%",
+        "Progress: Downloading googlechrome 120.0... 100%",
+        "Progress: 30%",
+        "Progress: Downloading winrar 7.0... 5%",
+        "Progress: Downloading winrar 7.0... 99%",
+        "The install of googlechrome was successful.",
+    ]
+    for line in lines:
+        sink.feed(line + "\r\n")
+
+    assert recording_logger.lines() == [
+        "Chocolatey v2.2.2",
+        "Installing googlechrome...",
+        "Progress: Downloading googlechrome 120.0... 10%",
+        "Progress: Downloading winrar 7.0... 5%",
+        "The install of googlechrome was successful.",
+    ]
+    # A barra recebe todos os ticks, inclusive os que não vão para o log
+    assert len(updates) == 7
+    assert updates[-1] == ("Baixando winrar", 99.0)
+
+
+def test_line_sink_tail_keep_and_label(recording_logger):
+    sink = _sink(recording_logger, keep=lambda line: "successful" in line, tail_lines=3, log_label="choco")
+    for i in range(10):
+        sink.feed(f"linha {i}\n")
+    sink.feed("The install of a was successful.\n")
+    sink.feed("\n")
+
+    result = sink.result(0, "choco.exe")
+    assert result.returncode == 0
+    assert result.line_count == 11
+    assert result.tail == ["linha 8", "linha 9", "The install of a was successful."]
+    assert result.kept == ["The install of a was successful."]
+    assert recording_logger.lines()[0] == "choco: linha 0"
+
+
+def test_line_sink_forced_stop_returns_timeout_rc(recording_logger):
+    sink = _sink(recording_logger)
+    sink.feed("travado\n")
+    result = sink.result(0, "setup.exe", reason="timeout", description="tempo limite de 1s")
+    assert result.returncode == TIMEOUT_RC
+    assert result.timed_out == "timeout"
+    assert recording_logger.lines("warning")
+
+
+def test_stream_process_parses_live_output():
+    script = "import sys\nfor p in (10, 50, 100): print(f'Progress: {p}%', flush=True)\nsys.exit(3)"
+    updates = []
+    result = stream_process([sys.executable, "-c", script], parsers=[choco_progress],
+                            on_progress=lambda d, p: updates.append(p))
+    assert result.returncode == 3
+    assert updates == [10.0, 50.0, 100.0]
+    assert result.tail[-1] == "Progress: 100%"
+
+
+def test_command_limits_interactive_has_no_idle_timeout(monkeypatch):
+    from config import CONFIG
+    from utils.process import command_limits
+    monkeypatch.setattr(CONFIG, "command_timeout", 3600)
+    monkeypatch.setattr(CONFIG, "hang_timeout", 600)
+    assert command_limits() == (3600, 600)
+    assert command_limits(10) == (10, 600)
+    assert command_limits(interactive=True) == (3600, None)
+
+
+def test_interactive_powershell_gets_no_idle_timeout(monkeypatch):
+    from config import CONFIG
+    from utils import powershell
+    monkeypatch.setattr(CONFIG, "hang_timeout", 600)
+    calls = []
+    monkeypatch.setattr(powershell, "_run_oneshot",
+                        lambda command, capture_output, timeout, idle_timeout: calls.append(idle_timeout) or (0, "", ""))
+
+    powershell.run_powershell("Get-Credential", capture_output=False)
+    powershell.run_powershell("Get-Item x")
+    assert calls == [None, 600]
+
+
+@pytest.mark.parametrize("args, idle", [("", None), ("/quiet /norestart", 600)])
+def test_installer_without_silent_args_gets_no_idle_timeout(monkeypatch, tmp_path, args, idle):
+    from config import CONFIG
+    from modules import install
+    monkeypatch.setattr(CONFIG, "hang_timeout", 600)
+    setup = tmp_path / "setup.exe"
+    setup.write_bytes(b"MZ")
+    seen = []
+
+    async def fake_stream(argv, **kwargs):
+        seen.append(kwargs["idle_timeout"])
+        return LineSink().result(0, argv[0])
+
+    monkeypatch.setattr(install, "stream_process_async", fake_stream)
+    assert install._run_installer("Office", str(setup), args) is True
+    assert seen == [idle]
@@ -0,0 +1,87 @@
+"""modules.profiles: leitura do CSV de inventário (separador, BOM, linhas) e geração dos perfis."""
+import json
+import os
+
+import pytest
+
+from modules.profiles import generate_profiles, read_profiles_csv
+
+HEADER = ["hostname", "domain", "admin_user", "install_office", "skip_steps", "auto_reboot"]
+
+
+def _csv(tmp_path, rows, delimiter=";", encoding="utf-8", name="maquinas.csv"):
+    path = tmp_path / name
+    text = "\n".join(delimiter.join(row) for row in [HEADER] + rows) + "\n"
+    path.write_text(text, encoding=encoding)
+    return str(path)
+
+
+def _row(hostname, admin_user="suporte", office="", skip="", reboot="sim"):
+    return [hostname, "", admin_user, office, skip, reboot]
+
+
+@pytest.mark.parametrize("delimiter", [";", ",", "\t"])
+def test_delimiter_detected_from_header(tmp_path, delimiter):
+    path = _csv(tmp_path, [_row("PC-01", skip="office power")], delimiter=delimiter)
+    [(line, profile, errors)] = list(read_profiles_csv(path))
+    assert (line, errors) == (2, [])
+    assert profile["hostname"] == "PC-01"
+    assert profile["skip_steps"] == ["office", "power"]
+
+
+def test_excel_bom_is_ignored(tmp_path):
+    path = _csv(tmp_path, [_row("pc-02", office="365")], encoding="utf-8-sig")
+    with open(path, "rb") as f:
+        assert f.read(3) == b"\xef\xbb\xbf"
+    [(_, profile, errors)] = list(read_profiles_csv(path))
+    assert errors == []
+    assert (profile["hostname"], profile["install_office"]) == ("PC-02", "365")
+
+
+def test_missing_required_column(tmp_path):
+    path = tmp_path / "sem_admin.csv"
+    path.write_text("hostname;domain\nPC-01;empresa.local\n", encoding="utf-8")
+    with pytest.raises(ValueError, match="admin_user"):
+        list(read_profiles_csv(str(path)))
+
+
+def test_duplicate_hostnames_and_blank_rows(tmp_path):
+    path = _csv(tmp_path, [_row("PC-01"), [""] * 6, [], _row("pc-01"), _row("PC-03")])
+    results = list(read_profiles_csv(path))
+    # Linhas em branco não viram registro, mas contam na numeração
+    assert [line for line, _, _ in results] == [2, 5, 6]
+    assert results[0][2] == []
+    assert results[1][2] == ["hostname duplicado (também na linha 2)"]
+    assert results[2][2] == []
+
+
+def test_multiline_row_reports_starting_line(tmp_path):
+    path = tmp_path / "multilinha.csv"
+    path.write_text(";".join(HEADER) + "\n"
+                    'PC-01;;suporte;;"office\npower";sim\n'
+                    'PC-02;;suporte;;;talvez\n', encoding="utf-8")
+    results = list(read_profiles_csv(str(path)))
+    assert [line for line, _, _ in results] == [2, 4]
+    assert results[0][1]["skip_steps"] == ["office", "power"]
+    assert results[1][2] == ["auto_reboot inválido: 'talvez' (use sim/não)"]
+
+
+def test_nothing_written_on_any_error(tmp_path):
+    out_dir = tmp_path / "profiles"
+    path = _csv(tmp_path, [_row("PC-01"), _row("PC-02", office="2016"), _row("PC-03", admin_user="")])
+    assert generate_profiles(path, str(out_dir)) is False
+    assert not out_dir.exists()
+
+
+def test_profiles_written_when_all_rows_are_valid(tmp_path):
+    out_dir = tmp_path / "profiles"
+    path = _csv(tmp_path, [_row("PC-01", skip="anydesk"), _row("PC-02", reboot="não")])
+    assert generate_profiles(path, str(out_dir)) is True
+    assert sorted(os.listdir(out_dir)) == ["PC-01.json", "PC-02.json"]
+    with open(out_dir / "PC-02.json", encoding="utf-8") as f:
+        profile = json.load(f)
+    assert profile["auto_reboot"] is False and profile["skip_steps"] == []
+
+
+def test_header_only_is_not_success(tmp_path):
+    assert generate_profiles(_csv(tmp_path, []), str(tmp_path / "profiles")) is False
@@ -0,0 +1,156 @@
+"""utils.scheduler.run_steps: dependências, recursos exclusivos, tempo limite e abandono."""
+import threading
+import time
+
+import pytest
+
+from utils import scheduler
+from utils.process import StepExpired, stream_process
+from utils.scheduler import Step, run_steps
+
+
+@pytest.fixture(autouse=True)
+def fast_scheduler(monkeypatch):
+    monkeypatch.setattr(scheduler, "KILL_GRACE", 0.3)
+    monkeypatch.setattr(scheduler, "POLL_INTERVAL", 0.05)
+
+
+def test_dependencies_resources_and_order():
+    log = []
+    lock = threading.Lock()
+    active = set()
+    overlaps = []
+
+    def make(key, seconds=0.05, result=True):
+        def func():
+            with lock:
+                if "msi" in active and key in ("office", "sqlncli"):
+                    overlaps.append(key)
+                if key in ("office", "sqlncli"):
+                    active.add("msi")
+                log.append(key)
+            time.sleep(seconds)
+            with lock:
+                if key in ("office", "sqlncli"):
+                    active.discard("msi")
+            if isinstance(result, Exception):
+                raise result
+            return result
+        return func
+
+    steps = [
+        Step("office", "Office", make("office"), resources=["msi"]),
+        Step("choco", "Chocolatey", make("choco")),
+        Step("sqlncli", "SQL", make("sqlncli"), resources=["msi"]),
+        Step("shortcut", "Atalho", make("shortcut", result=RuntimeError("falhou")), depends_on=["choco"]),
+    ]
+    results = run_steps(steps, max_workers=4)
+
+    assert [r.key for r in results] == ["office", "choco", "sqlncli", "shortcut"]
+    assert log.index("shortcut") > log.index("choco")
+    assert overlaps == []
+    shortcut = results[-1]
+    assert shortcut.status is False and shortcut.error_class == "RuntimeError"
+    assert all(r.status for r in results[:3])
+
+
+def test_cycle_is_rejected():
+    steps = [Step("a", "A", lambda: True, depends_on=["b"]), Step("b", "B", lambda: True, depends_on=["a"])]
+    with pytest.raises(ValueError):
+        run_steps(steps)
+
+
+def test_step_timeout_kills_processes():
+    start = time.monotonic()
+    results = run_steps([Step("lenta", "Lenta", lambda: stream_process(["sleep", "30"]).returncode == 0,
+                              timeout=0.3)])
+    assert time.monotonic() - start < 5
+    assert results[0].timed_out and results[0].status is False
+    assert results[0].error_class == "Timeout"
+
+
+def test_expired_step_starts_no_new_processes():
+    events = []
+
+    def stubborn():
+        # Ignora o processo morto e tenta seguir com o próximo comando
+        for i in range(5):
+            try:
+                stream_process(["sleep", "30"])
+            except StepExpired:
+                events.append(("bloqueado", i))
+                raise
+            events.append(("terminou", i))
+        return True
+
+    results = run_steps([Step("teimosa", "Teimosa", stubborn, timeout=0.3)])
+    assert results[0].timed_out
+    assert events == [("terminou", 0), ("bloqueado", 1)]
+
+
+def test_command_watchdog_timeout_marks_step():
+    def step():
+        return stream_process(["sleep", "30"], timeout=0.3).returncode == 0
+
+    results = run_steps([Step("cmd", "Comando", step)])
+    assert results[0].timed_out and results[0].status is False
+
+
+def test_abandoned_step_holds_resources_until_its_thread_returns(monkeypatch):
+    # Expira em 0.2s, é abandonada em 0.7s e retorna em 0.9s — antes de B ser descartada (1.2s)
+    monkeypatch.setattr(scheduler, "KILL_GRACE", 0.5)
+    returned = {}
+
+    def hung():
+        time.sleep(0.9)  # sem processos para encerrar: só o abandono a tira da fila
+        returned["a"] = time.monotonic()
+        return True
+
+    def after():
+        returned["b"] = time.monotonic()
+        return True
+
+    results = run_steps([Step("a", "A", hung, resources=["msi"], timeout=0.2),
+                         Step("c", "C", lambda: True),
+                         Step("b", "B", after, resources=["msi"])], max_workers=2)
+    a, c, b = results
+    assert a.timed_out and a.detail == "Tempo esgotado"
+    assert c.status is True
+    assert b.status is True
+    assert returned["b"] >= returned["a"]
+
+
+def test_steps_blocked_by_abandoned_step_are_skipped():
+    release = threading.Event()
+
+    def hung():
+        release.wait(10)
+        return True
+
+    try:
+        results = run_steps([Step("a", "A", hung, resources=["msi"], timeout=0.2),
+                             Step("b", "B", lambda: True, resources=["msi"])], max_workers=2)
+    finally:
+        release.set()
+    assert results[0].timed_out
+    assert results[1].status is False
+    assert results[1].detail.startswith("Não executada")
+
+
+def test_interrupt_kills_running_steps():
+    finished = threading.Event()
+
+    def long_step():
+        try:
+            return stream_process(["sleep", "30"]).returncode == 0
+        finally:
+            finished.set()
+
+    def interrupt(step):
+        if step.key == "b":
+            time.sleep(0.2)
+            raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        run_steps([Step("a", "A", long_step), Step("b", "B", lambda: True)], max_workers=2, on_start=interrupt)
+    assert finished.wait(5)
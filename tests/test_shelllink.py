@@ -0,0 +1,160 @@
+"""utils.shelllink: layout binário do .lnk conforme MS-SHLLINK."""
+import os
+import struct
+
+from config import CONFIG, FolderCopyConfig, ShortcutConfig
+from modules import install
+from utils.shelllink import (
+    FILE_ATTRIBUTE_NORMAL, HAS_ARGUMENTS, HAS_ICON_LOCATION, HAS_LINK_INFO, HAS_NAME, HAS_WORKING_DIR,
+    IS_UNICODE, LINK_CLSID, SW_SHOWNORMAL, ShortcutSpec, build_shell_link, create_shortcuts, write_shell_link,
+)
+
+TARGET = r"C:\NextUltraDisplays\NextBP.exe"
+
+
+def _cstring(data: bytes, offset: int, unicode: bool = False) -> str:
+    if unicode:
+        end = offset
+        while data[end:end + 2] != b"\0\0":
+            end += 2
+        return data[offset:end].decode("utf-16-le")
+    return data[offset:data.index(b"\0", offset)].decode("cp1252")
+
+
+def _parse(data: bytes) -> dict:
+    """Decodifica o que build_shell_link grava: cabeçalho, LinkInfo e StringData."""
+    header = struct.unpack_from("<I16sII8s8s8sIiIHHII", data, 0)
+    flags = header[2]
+    pos = header[0]
+
+    link_info_size, = struct.unpack_from("<I", data, pos)
+    info = data[pos:pos + link_info_size]
+    fields = struct.unpack_from("<IIIIIIIII", info, 0)
+    pos += link_info_size
+
+    strings = []
+    for flag in (HAS_NAME, HAS_WORKING_DIR, HAS_ARGUMENTS, HAS_ICON_LOCATION):
+        if flags & flag:
+            count, = struct.unpack_from("<H", data, pos)
+            strings.append(data[pos + 2:pos + 2 + count * 2].decode("utf-16-le"))
+            pos += 2 + count * 2
+    return {"header": header, "flags": flags, "info": info, "info_fields": fields,
+            "strings": strings, "rest": data[pos:]}
+
+
+def test_header_layout():
+    data = build_shell_link(TARGET)
+    parsed = _parse(data)
+    header = parsed["header"]
+    assert struct.calcsize("<I16sII8s8s8sIiIHHII") == 0x4C
+    assert header[0] == 0x4C
+    assert header[1] == LINK_CLSID
+    assert parsed["flags"] == HAS_LINK_INFO | IS_UNICODE
+    assert header[3] == FILE_ATTRIBUTE_NORMAL
+    assert header[9] == SW_SHOWNORMAL
+    # Sem StringData: só o TerminalBlock depois do LinkInfo
+    assert parsed["strings"] == []
+    assert parsed["rest"] == b"\0\0\0\0"
+
+
+def test_link_info_offsets_point_to_target():
+    parsed = _parse(build_shell_link(TARGET))
+    info = parsed["info"]
+    (size, header_size, info_flags, volume_offset, base_offset, network_offset,
+     suffix_offset, base_unicode_offset, suffix_unicode_offset) = parsed["info_fields"]
+
+    assert size == len(info)
+    # Cabeçalho de 0x24 bytes: obrigatório quando há os offsets Unicode
+    assert header_size == 0x24
+    assert info_flags == 0x1  # VolumeIDAndLocalBasePath
+    assert network_offset == 0
+
+    volume_size, drive_type, _, label_offset = struct.unpack_from("<IIII", info, volume_offset)
+    assert volume_offset == header_size
+    assert volume_size == 0x11 and drive_type == 3 and label_offset == 0x10
+
+    assert _cstring(info, base_offset) == TARGET
+    assert _cstring(info, suffix_offset) == ""
+    assert _cstring(info, base_unicode_offset, unicode=True) == TARGET
+    assert info[suffix_unicode_offset:] == b"\0\0"
+
+
+def test_string_data_order_and_flags():
+    parsed = _parse(build_shell_link(TARGET, arguments="--app=https://nextbp", working_dir=r"C:\NextUltraDisplays",
+                                     description="NextBP çé", icon_location=r"C:\icone.ico"))
+    assert parsed["flags"] == (HAS_LINK_INFO | IS_UNICODE | HAS_NAME | HAS_WORKING_DIR
+                               | HAS_ARGUMENTS | HAS_ICON_LOCATION)
+    assert parsed["strings"] == ["NextBP çé", r"C:\NextUltraDisplays", "--app=https://nextbp", r"C:\icone.ico"]
+    assert parsed["rest"] == b"\0\0\0\0"
+
+
+def test_non_ansi_target_keeps_unicode_path():
+    target = r"C:\Programas\Gestão 日本\app.exe"
+    parsed = _parse(build_shell_link(target))
+    info = parsed["info"]
+    base_unicode_offset = parsed["info_fields"][7]
+    assert _cstring(info, base_unicode_offset, unicode=True) == target
+
+
+def test_write_shell_link_defaults_working_dir(tmp_path):
+    path = tmp_path / "Desktop" / "NextBP.lnk"
+    write_shell_link(ShortcutSpec(path=str(path), target=TARGET))
+    parsed = _parse(path.read_bytes())
+    assert parsed["strings"] == [r"C:\NextUltraDisplays"]
+    assert not (tmp_path / "Desktop" / "NextBP.lnk.tmp").exists()
+
+
+def test_create_shortcuts_reports_each_result(tmp_path):
+    blocker = tmp_path / "arquivo"
+    blocker.write_text("não é pasta")
+    ok_spec = ShortcutSpec(path=str(tmp_path / "ok.lnk"), target=TARGET)
+    bad_spec = ShortcutSpec(path=str(blocker / "falha.lnk"), target=TARGET)
+
+    results = create_shortcuts([bad_spec, ok_spec])
+    assert [(spec, ok) for spec, ok, _ in results] == [(bad_spec, False), (ok_spec, True)]
+    assert results[0][2] and results[1][2] == ""
+    # Uma falha não interrompe os atalhos seguintes
+    assert (tmp_path / "ok.lnk").read_bytes() == build_shell_link(TARGET, working_dir=r"C:\NextUltraDisplays")
+
+
+def _exe(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(b"MZ")
+    return path
+
+
+def test_create_all_shortcuts_in_one_pass(tmp_path, monkeypatch):
+    monkeypatch.setenv("PUBLIC", str(tmp_path / "Public"))
+    monkeypatch.setattr(CONFIG, "chrome_path", _exe(str(tmp_path / "chrome.exe")))
+    monkeypatch.setattr(CONFIG, "webapp_shortcut_location", "Desktop")
+    _exe(str(tmp_path / "Displays" / "NextSIClient.exe"))
+    monkeypatch.setattr(CONFIG, "unc_folders_to_copy", [
+        FolderCopyConfig(source=r"\\srv\client", destination=str(tmp_path / "Displays"),
+                         shortcut=ShortcutConfig(name="NextSI UltraDisplays", target_exe="NextSIClient.exe")),
+        FolderCopyConfig(source=r"\\srv\Client_Mega", destination=str(tmp_path / "Art"),
+                         shortcut=ShortcutConfig(name="NextSI UltraArt", target_exe="NextSIClient.exe")),
+        FolderCopyConfig(source=r"\\srv\docs", destination=str(tmp_path / "Docs")),
+    ])
+
+    results = install.create_all_shortcuts()
+    assert [(name, ok) for name, ok, _ in results] == [
+        (CONFIG.webapp_name, True), ("NextSI UltraDisplays", True), ("NextSI UltraArt", False)]
+    assert "não encontrado" in results[2][2]
+
+    desktop = tmp_path / "Public" / "Desktop"
+    assert sorted(os.listdir(desktop)) == sorted([f"{CONFIG.webapp_name}.lnk", "NextSI UltraDisplays.lnk"])
+    parsed = _parse((desktop / f"{CONFIG.webapp_name}.lnk").read_bytes())
+    assert f"--app={CONFIG.webapp_url}" in parsed["strings"]
+
+
+def test_webapp_only_and_folders_only(tmp_path, monkeypatch):
+    monkeypatch.setenv("PUBLIC", str(tmp_path / "Public"))
+    monkeypatch.setattr(CONFIG, "chrome_path", str(tmp_path / "sem-chrome.exe"))
+    _exe(str(tmp_path / "Displays" / "NextSIClient.exe"))
+    folders = [FolderCopyConfig(source=r"\\srv\client", destination=str(tmp_path / "Displays"),
+                                shortcut=ShortcutConfig(name="NextSI UltraDisplays", target_exe="NextSIClient.exe"))]
+
+    assert install.create_all_shortcuts(webapp=False, folders=folders) == [("NextSI UltraDisplays", True, "")]
+    assert install.create_webapp_shortcut() is False
+    assert os.listdir(tmp_path / "Public" / "Desktop") == ["NextSI UltraDisplays.lnk"]
@@ -0,0 +1,109 @@
+"""utils.staging: cópia em blocos retomável, checksum publicado e desvio para o backend de execução."""
+import hashlib
+import os
+
+import pytest
+
+from utils import staging
+from utils.executor import SimulatedExecutor, set_executor
+from utils.staging import ChecksumMismatch, stage_file
+
+CHUNK = 1024
+
+
+class Interrupted(Exception):
+    pass
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "rede" / "sqlncli_2012_x64.msi"
+    path.parent.mkdir()
+    path.write_bytes(os.urandom(CHUNK * 20 + 100))
+    return str(path)
+
+
+def _interrupt_after(chunks: int):
+    seen = [0]
+
+    def on_progress(size):
+        seen[0] += 1
+        if seen[0] > chunks:
+            raise Interrupted()
+    return on_progress
+
+
+def _publish_hash(src: str, digest: str = None):
+    digest = digest or hashlib.sha256(open(src, "rb").read()).hexdigest()
+    with open(src + ".sha256", "w", encoding="utf-8") as f:
+        f.write(f"{digest}  {os.path.basename(src)}\n")
+
+
+def test_resumes_from_last_synced_offset(source, tmp_path):
+    dst = str(tmp_path / "cache" / "sqlncli_2012_x64.msi")
+    with pytest.raises(Interrupted):
+        stage_file(source, dst, chunk_size=CHUNK, on_progress=_interrupt_after(staging.SYNC_EVERY + 2))
+    assert os.path.exists(dst + ".partial.json")
+
+    result = stage_file(source, dst, chunk_size=CHUNK)
+    # Retoma do último ponto com fsync + sidecar, não do último bloco gravado
+    assert result.resumed_bytes == staging.SYNC_EVERY * CHUNK
+    assert result.copied_bytes == os.path.getsize(source) - result.resumed_bytes
+    assert open(dst, "rb").read() == open(source, "rb").read()
+    assert not os.path.exists(dst + ".partial.json")
+    assert "retomados" in result.summary()
+
+
+def test_changed_source_or_short_destination_restarts(source, tmp_path):
+    dst = str(tmp_path / "cache" / "sqlncli_2012_x64.msi")
+    with pytest.raises(Interrupted):
+        stage_file(source, dst, chunk_size=CHUNK, on_progress=_interrupt_after(staging.SYNC_EVERY + 1))
+    with open(dst, "r+b") as f:
+        f.truncate(CHUNK)
+    assert stage_file(source, dst, chunk_size=CHUNK).resumed_bytes == 0
+
+    with pytest.raises(Interrupted):
+        stage_file(source, dst, chunk_size=CHUNK, on_progress=_interrupt_after(staging.SYNC_EVERY + 1))
+    with open(source, "ab") as f:
+        f.write(b"nova versao")
+    result = stage_file(source, dst, chunk_size=CHUNK)
+    assert result.resumed_bytes == 0
+    assert open(dst, "rb").read() == open(source, "rb").read()
+
+
+def test_published_checksum_is_verified(source, tmp_path):
+    dst = str(tmp_path / "cache" / "ok.msi")
+    _publish_hash(source)
+    assert stage_file(source, dst, chunk_size=CHUNK).verified is True
+
+
+def test_checksum_mismatch_discards_copy(source, tmp_path):
+    dst = str(tmp_path / "cache" / "corrompido.msi")
+    _publish_hash(source, "0" * 64)
+    with pytest.raises(ChecksumMismatch):
+        stage_file(source, dst, chunk_size=CHUNK)
+    assert not os.path.exists(dst)
+    assert not os.path.exists(dst + ".partial.json")
+
+    # Sem verificação, a mesma cópia é aceita
+    assert stage_file(source, dst, chunk_size=CHUNK, verify=False).verified is False
+
+
+def test_large_files_go_through_executor(source, tmp_path, monkeypatch):
+    executor = SimulatedExecutor({}, str(tmp_path / "sim"))
+    copied = []
+    original = executor.copy_file
+    monkeypatch.setattr(executor, "copy_file", lambda src, dst: copied.append(src) or original(src, dst))
+    set_executor(executor)
+    try:
+        dst = str(tmp_path / "cache" / "sim.msi")
+        _publish_hash(source)
+        result = stage_file(source, dst, chunk_size=CHUNK)
+        assert copied == [source]
+        assert result.verified and result.copied_bytes == os.path.getsize(source)
+
+        _publish_hash(source, "f" * 64)
+        with pytest.raises(ChecksumMismatch):
+            stage_file(source, dst, chunk_size=CHUNK)
+    finally:
+        set_executor(None)
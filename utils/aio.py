@@ -0,0 +1,222 @@
+"""Camada asyncio: processos, PowerShell e cópias que podem se sobrepor em um único event loop.
+
+Usada pelas sondagens do diagnóstico (em paralelo num loop), pelos
+instaladores avulsos e pela cópia das pastas da rede (uma tarefa por pasta);
+as funções síncronas do projeto continuam existindo e run_sync() é a ponte
+para as versões async. Cancelar a tarefa encerra a árvore de processos filhos
+ou interrompe a cópia no próximo arquivo.
+"""
+import asyncio
+import contextvars
+import functools
+import locale
+import threading
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from utils.executor import get_executor
+from utils.filecopy import SyncStats, sync_tree
+from utils.process import (
+    LineParser, LineSink, ProcessTree, StreamResult, TAIL_LINES, TIMEOUT_RC,
+    Watchdog, _decode, check_step, command_limits, current_step, program_name, step_thread, tracked,
+)
+from utils.trace import span
+
+
+class CopyCancelled(Exception):
+    """Cópia interrompida por cancelamento da tarefa async."""
+
+
+def run_sync(coro):
+    """Executa a corrotina em um event loop próprio (ponte para código síncrono).
+
+    Na thread principal, Ctrl+C cancela a tarefa (processos filhos são
+    encerrados) e KeyboardInterrupt chega ao chamador. Em threads de etapa o
+    loop nunca recebe o SIGINT: quem encerra os processos é o agendador
+    (utils.scheduler.run_steps expira as etapas em execução).
+    """
+    return asyncio.run(coro)
+
+
+class _AsyncPopen:
+    """O que ProcessTree usa de um Popen (pid e poll), sobre a API pública do asyncio.
+
+    No Windows o Job Object abre o processo pelo PID.
+    """
+
+    def __init__(self, process: asyncio.subprocess.Process):
+        self._process = process
+        self.pid = process.pid
+
+    def poll(self) -> Optional[int]:
+        return self._process.returncode
+
+
+async def _terminate(process: asyncio.subprocess.Process, tree: ProcessTree):
+    tree.kill()
+    await process.wait()
+
+
+async def run_process_async(argv: List[str], capture_output: bool = True, timeout: float = None,
+                            idle_timeout: float = None, input_data: bytes = None,
+                            encoding: str = None) -> Tuple[int, str, str]:
+    """Equivalente async de subprocess.run: retorna (código, stdout, stderr).
+
+    timeout / idle_timeout como em utils.process.Watchdog (código TIMEOUT_RC ao estourar).
+    """
+    check_step()
+    with span(program_name(argv), "processo") as trace_args:
+        result = await _run_process_async(argv, capture_output, timeout, idle_timeout, input_data, encoding)
+        trace_args["rc"] = result[0]
+    return result
+
+
+async def _run_process_async(argv: List[str], capture_output: bool, timeout: float, idle_timeout: float,
+                             input_data: bytes, encoding: str) -> Tuple[int, str, str]:
+    executor = get_executor()
+    if executor is not None:
+        return await executor.run_process_async(argv, input_data, timeout)
+
+    pipe = asyncio.subprocess.PIPE if capture_output else None
+    with span("spawn", "processo"):
+        process = await asyncio.create_subprocess_exec(
+            *argv,
+            stdin=asyncio.subprocess.PIPE if input_data is not None else None,
+            stdout=pipe,
+            stderr=pipe,
+            start_new_session=capture_output,
+        )
+    tree = ProcessTree(_AsyncPopen(process))
+    try:
+        with tracked(tree), Watchdog(tree, timeout, idle_timeout, watch_output=False) as watchdog:
+            try:
+                stdout, stderr = await process.communicate(input_data)
+            except asyncio.CancelledError:
+                await _terminate(process, tree)
+                raise
+    finally:
+        tree.close()
+
+    decode = (lambda b: b.decode(encoding, errors="replace") if b else "") if encoding else _decode
+    if watchdog.reason:
+        return TIMEOUT_RC, decode(stdout), f"Processo encerrado: {watchdog.describe()}"
+    return process.returncode, decode(stdout), decode(stderr)
+
+
+async def stream_process_async(argv: List[str], parsers: Iterable[LineParser] = (),
+                               on_progress: Callable[[Optional[str], Optional[float]], None] = None,
+                               keep: Callable[[str], bool] = None, tail_lines: int = TAIL_LINES,
+                               log_label: str = "", cwd: str = None, timeout: float = None,
+                               idle_timeout: float = None) -> StreamResult:
+    """Versão async de utils.process.stream_process (mesmos parâmetros e resultado)."""
+    check_step()
+    sink = LineSink(parsers, on_progress, keep, tail_lines, log_label)
+    with span(program_name(argv), "processo", argv=" ".join(argv)) as trace_args:
+        result = await _stream_process_async(argv, sink, cwd, timeout, idle_timeout)
+        trace_args.update(rc=result.returncode, lines=sink.count)
+    return result
+
+
+async def _stream_process_async(argv: List[str], sink: LineSink, cwd: str, timeout: float,
+                                idle_timeout: float) -> StreamResult:
+    executor = get_executor()
+    if executor is not None:
+        return await executor.stream_process_async(argv, sink, timeout)
+
+    with span("spawn", "processo"):
+        process = await asyncio.create_subprocess_exec(
+            *argv,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+            cwd=cwd,
+            start_new_session=True,
+        )
+    tree = ProcessTree(_AsyncPopen(process))
+    encoding = locale.getpreferredencoding(False)
+    try:
+        with tracked(tree), Watchdog(tree, timeout, idle_timeout) as watchdog:
+            try:
+                while True:
+                    raw = await process.stdout.readline()
+                    if not raw:
+                        break
+                    watchdog.touch()
+                    sink.feed(raw.decode(encoding, errors="replace"))
+                await process.wait()
+            except asyncio.CancelledError:
+                await _terminate(process, tree)
+                raise
+    finally:
+        tree.close()
+    return sink.result(process.returncode, argv[0], watchdog.reason, watchdog.describe())
+
+
+async def run_powershell_async(command: str, capture_output: bool = True,
+                               timeout: float = None) -> Tuple[int, str, str]:
+    """Versão async de run_powershell: sempre um powershell.exe próprio, cancelável.
+
+    Não usa o pool de hosts (bloqueante); serve para sobrepor comandos longos
+    no mesmo event loop.
+    """
+    from utils.powershell import POWERSHELL_ARGV
+    check_step()
+    timeout, idle_timeout = command_limits(timeout, interactive=not capture_output)
+    with span("powershell", "powershell", command=command, mode="async") as trace_args:
+        executor = get_executor()
+        if executor is not None:
+            result = await executor.run_powershell_async(command, timeout)
+        else:
+            try:
+                result = await run_process_async(POWERSHELL_ARGV + ["-Command", command], capture_output,
+                                                 timeout, idle_timeout, encoding="utf-8")
+            except FileNotFoundError:
+                result = -1, "", "PowerShell não encontrado."
+            except OSError as e:
+                result = -1, "", str(e)
+        trace_args["rc"] = result[0]
+    return result
+
+
+async def to_thread(func, *args, **kwargs):
+    """Executa uma função bloqueante no executor padrão do loop (asyncio.to_thread também no 3.8).
+
+    Como asyncio.to_thread, a thread herda os contextvars (etapa dos eventos, linha do
+    trace); herda também a etapa de utils.process, então check_step() e os processos
+    iniciados nela valem para a etapa do chamador.
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    key = current_step()
+
+    def _call():
+        with step_thread(key):
+            return func(*args, **kwargs)
+
+    return await loop.run_in_executor(None, functools.partial(context.run, _call))
+
+
+async def sync_tree_async(src: str, dst: str, **kwargs) -> SyncStats:
+    """Executa utils.filecopy.sync_tree em thread (to_thread), com cancelamento cooperativo.
+
+    Ao cancelar, nenhum arquivo novo é iniciado; os que estão em cópia terminam
+    e então CancelledError é propagado.
+    """
+    cancel = threading.Event()
+    user_discover = kwargs.pop("on_discover", None)
+
+    def on_discover(size: int):
+        if cancel.is_set():
+            raise CopyCancelled(src)
+        if user_discover:
+            user_discover(size)
+
+    task = asyncio.ensure_future(to_thread(sync_tree, src, dst, on_discover=on_discover, **kwargs))
+    try:
+        return await asyncio.shield(task)
+    except asyncio.CancelledError:
+        cancel.set()
+        await asyncio.wait([task])
+        if not task.cancelled():
+            task.exception()  # CopyCancelled esperado; evita o aviso de exceção não lida
+        raise
+
@@ -23,11 +23,14 @@ def is_admin() -> bool:
 
 
 def clear_screen():
+    from utils.logger import wait_console
+    wait_console()
     os.system('cls' if os.name == 'nt' else 'clear')
 
 
 def pause(message: str = "Pressione ENTER para continuar..."):
-    from utils.console import console
+    from utils.console import console, wait_console
+    wait_console()
     console.input(f"\n  [dim]{message}[/]")
 
 
@@ -1,10 +1,14 @@
 """Central module for Rich console and UI helpers."""
+from contextlib import contextmanager
+
 from rich.prompt import Prompt, Confirm
 from rich.console import Console
 from rich.panel import Panel
 from rich.text import Text
 from rich.theme import Theme
 
+from utils.logger import wait_console
+
 custom_theme = Theme({
     "info": "color(75)",
     "warning": "color(214)",
@@ -18,16 +22,27 @@ custom_theme = Theme({
 
 console = Console(theme=custom_theme, force_terminal=True)
 
+# Progress compartilhado enquanto etapas rodam em paralelo (o Rich só
+# permite um Live ativo por vez).
+_shared_progress = None
+
+
+# Os helpers abaixo esperam as mensagens do logger ainda na fila (renderizadas
+# em segundo plano) antes de imprimir ou perguntar: a ordem na tela é mantida.
+
 
 def ask_input(prompt: str, default: str = None) -> str:
+    wait_console()
     return Prompt.ask(f"  [primary]>[/] {prompt}", default=default)
 
 
 def confirm_action(prompt: str) -> bool:
+    wait_console()
     return Confirm.ask(f"  [primary]?[/] {prompt}")
 
 
 def print_header(title: str, subtitle: str = ""):
+    wait_console()
     console.print()
     console.print(Panel(
         Text(title, justify="center", style="bold white"),
@@ -37,22 +52,27 @@ def print_header(title: str, subtitle: str = ""):
 
 
 def print_step(message: str):
+    wait_console()
     console.print(f"[primary]>>[/] {message}")
 
 
 def print_success(message: str):
+    wait_console()
     console.print(f"  [success]✓[/] {message}")
 
 
 def print_error(message: str):
+    wait_console()
     console.print(f"  [error]✗[/] {message}")
 
 
 def print_warning(message: str):
+    wait_console()
     console.print(f"  [warning]⚠[/] {message}")
 
 
 def print_info(message: str):
+    wait_console()
     console.print(f"  [info]●[/] {message}")
 
 
@@ -64,6 +84,7 @@ def print_menu(title: str, items: list):
     table.add_column("Descrição", justify="left")
     table.add_column("Detalhe", justify="left", style="dim white")
 
+    wait_console()
     for key, desc, detail in items:
         if not key and desc:
             table.add_row("", f"[bold]{desc}[/]", "")
@@ -75,3 +96,95 @@ def print_menu(title: str, items: list):
     console.print(Panel(
         table, title=f"[bold]{title}[/]", border_style="dim white", padding=(1, 2)
     ))
+
+
+def _transfer_column():
+    """Coluna com bytes, velocidade e ETA — só preenchida em tarefas com unit="bytes"."""
+    import datetime
+    from rich import filesize
+    from rich.progress import ProgressColumn
+
+    class TransferColumn(ProgressColumn):
+        def render(self, task):
+            if task.fields.get("unit") != "bytes":
+                return Text("")
+            done = filesize.decimal(int(task.completed))
+            total = filesize.decimal(int(task.total or 0))
+            speed = f"{filesize.decimal(int(task.speed))}/s" if task.speed else "-- MB/s"
+            eta = task.time_remaining
+            eta = str(datetime.timedelta(seconds=int(eta))) if eta is not None else "-:--:--"
+            return Text(f"{done}/{total} • {speed} • ETA {eta}", style="progress.data.speed")
+
+    return TransferColumn()
+
+
+def _default_columns():
+    from rich.progress import SpinnerColumn, TextColumn, BarColumn, TimeElapsedColumn
+    return (
+        SpinnerColumn(),
+        TextColumn("[progress.description]{task.description}"),
+        BarColumn(),
+        TextColumn("[progress.percentage]{task.percentage:>3.0f}%"),
+        TimeElapsedColumn(),
+        _transfer_column(),
+    )
+
+
+@contextmanager
+def shared_progress():
+    """Abre um único Progress onde as barras e spinners das etapas são agrupados."""
+    global _shared_progress
+    from rich.progress import Progress
+
+    if _shared_progress is not None:
+        yield _shared_progress
+        return
+
+    wait_console()
+    with Progress(*_default_columns(), console=console) as progress:
+        _shared_progress = progress
+        try:
+            yield progress
+        finally:
+            _shared_progress = None
+
+
+@contextmanager
+def progress_bar(description: str, total: float = None, columns: tuple = None, **fields):
+    """Barra de progresso: usa o Progress compartilhado se houver, senão abre um próprio.
+
+    fields: campos extras da tarefa (ex: unit="bytes" exibe velocidade e ETA).
+    Retorna (progress, task_id).
+    """
+    from rich.progress import Progress
+
+    shared = _shared_progress
+    if shared is not None:
+        task = shared.add_task(description, total=total, **fields)
+        try:
+            yield shared, task
+        finally:
+            shared.remove_task(task)
+        return
+
+    wait_console()
+    with Progress(*(columns or _default_columns()), console=console) as progress:
+        task = progress.add_task(description, total=total, **fields)
+        yield progress, task
+
+
+@contextmanager
+def status(message: str):
+    """Spinner de status compatível com execução paralela de etapas."""
+    shared = _shared_progress
+    if shared is not None:
+        task = shared.add_task(message, total=None)
+        try:
+            yield
+        finally:
+            shared.remove_task(task)
+        return
+
+    wait_console()
+    with console.status(message):
+        yield
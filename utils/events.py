@@ -0,0 +1,133 @@
+"""Log de eventos estruturados (JSONL) em paralelo ao log legível.
+
+events_<HOST>_<data>.jsonl fica ao lado do log da execução; cada linha é um
+objeto com sempre as mesmas chaves (FIELDS), para ferramentas lerem em
+streaming sem interpretar as mensagens em português. Append-only: o arquivo
+fica aberto e cada evento é uma única escrita (sem fsync).
+"""
+import contextvars
+import datetime
+import json
+import os
+import threading
+import uuid
+from contextlib import contextmanager
+from typing import Optional, Union
+
+SCHEMA_VERSION = 1
+FIELDS = ("v", "ts", "run_id", "hostname", "event", "step", "package", "duration_s", "bytes", "rc",
+          "error_class", "data")
+
+# Tipos de evento
+RUN_START = "run_start"
+RUN_END = "run_end"
+STEP_START = "step_start"
+STEP_END = "step_end"
+PACKAGE = "package"
+INSTALLER = "installer"
+COPY = "copy"
+DIAGNOSTIC = "diagnostic"
+IDENTITY = "identity"
+UPDATE = "update"
+
+# Eventos também registrados no histórico SQLite (utils.history)
+HISTORY_EVENTS = (RUN_START, RUN_END, STEP_END)
+
+# Etapa corrente (definida pelo agendador): eventos emitidos dentro dela a herdam
+_step: contextvars.ContextVar = contextvars.ContextVar("event_step", default=None)
+
+
+@contextmanager
+def step_context(step: str):
+    token = _step.set(step)
+    try:
+        yield
+    finally:
+        _step.reset(token)
+
+
+def error_class(error: Union[BaseException, str, None]) -> Optional[str]:
+    """Nome da classe da exceção (ou o texto recebido)."""
+    if error is None or error == "":
+        return None
+    return error if isinstance(error, str) else type(error).__name__
+
+
+class EventLog:
+    """Arquivo JSONL de uma execução; seguro entre threads."""
+
+    def __init__(self, path: str, run_id: str = None, hostname: str = None):
+        self.path = path
+        self.run_id = run_id or uuid.uuid4().hex[:12]
+        self.hostname = hostname or os.environ.get("COMPUTERNAME", "unknown")
+        self._handle = None
+        self._lock = threading.Lock()
+
+    def emit(self, event: str, step: str = None, package: str = None, duration: float = None,
+             bytes: int = None, rc: int = None, error: Union[BaseException, str] = None, **data) -> dict:
+        """Grava um evento; campos não informados ficam null. data: detalhes específicos do tipo."""
+        record = {
+            "v": SCHEMA_VERSION,
+            "ts": datetime.datetime.now().isoformat(timespec="milliseconds"),
+            "run_id": self.run_id,
+            "hostname": self.hostname,
+            "event": event,
+            "step": step if step is not None else _step.get(),
+            "package": package,
+            "duration_s": round(duration, 3) if duration is not None else None,
+            "bytes": bytes,
+            "rc": rc,
+            "error_class": error_class(error),
+            "data": data,
+        }
+        line = json.dumps(record, ensure_ascii=False, default=str) + "\n"
+        with self._lock:
+            try:
+                if self._handle is None:
+                    self._handle = open(self.path, "a", encoding="utf-8")
+                self._handle.write(line)
+                self._handle.flush()
+            except OSError:
+                # Falha ao registrar não pode interromper o provisionamento
+                self.close_handle()
+        return record
+
+    def close_handle(self):
+        try:
+            if self._handle is not None:
+                self._handle.close()
+        except OSError:
+            pass
+        self._handle = None
+
+
+def events_path() -> str:
+    """events_<HOST>_<data>.jsonl na pasta efetiva do log (mesmo sufixo do arquivo de log)."""
+    from utils.logger import get_logger
+    logger = get_logger()
+    stem = os.path.splitext(os.path.basename(logger.get_log_path()))[0]
+    return os.path.join(str(logger.log_dir), stem.replace("provisioning_", "events_", 1) + ".jsonl")
+
+
+_events = None
+_events_lock = threading.Lock()
+
+
+def get_events() -> EventLog:
+    global _events
+    with _events_lock:
+        if _events is None:
+            _events = EventLog(events_path())
+        return _events
+
+
+def emit(event: str, **fields) -> dict:
+    """Atalho para get_events().emit(...); execuções e etapas também vão para o histórico."""
+    record = get_events().emit(event, **fields)
+    if event in HISTORY_EVENTS:
+        from utils.history import get_history
+        from utils.logger import get_logger
+        history = get_history()
+        if history is not None:
+            history.record(record, log_file=get_logger().get_log_path())
+    return record
@@ -0,0 +1,269 @@
+"""Backend de execução plugável: processos, PowerShell e cópias de arquivos.
+
+Por padrão não há backend (None) e as funções de utils.powershell, utils.process,
+utils.aio e utils.filecopy executam de verdade. set_executor() desvia todas
+elas para outro backend — ex: SimulatedExecutor, que reproduz latências,
+códigos de saída e saídas de um cenário JSON e aponta caminhos UNC e de
+drive para pastas locais (benchmarks/bench_e2e.py roda a instalação no Linux).
+"""
+import abc
+import asyncio
+import json
+import os
+import re
+import shutil
+import threading
+import time
+from dataclasses import dataclass, field, fields, is_dataclass
+from typing import List, Optional, Tuple
+
+# Sem imports do projeto no topo: utils.process e utils.powershell importam este módulo
+
+_executor = None
+_lock = threading.Lock()
+
+
+def get_executor() -> Optional["Executor"]:
+    """Backend ativo; None = execução real."""
+    return _executor
+
+
+def set_executor(executor: Optional["Executor"]):
+    global _executor
+    with _lock:
+        _executor = executor
+
+
+class Executor(abc.ABC):
+    """Interface dos backends. Os limites (timeout) chegam já resolvidos por command_limits().
+
+    Todos os métodos são abstratos: um backend incompleto falha ao ser instanciado.
+    """
+
+    name = "base"
+
+    @abc.abstractmethod
+    def run_powershell(self, command: str, capture_output: bool, timeout: float) -> Tuple[int, str, str]:
+        ...
+
+    @abc.abstractmethod
+    def run_powershell_batch(self, commands: List[Tuple[str, str]], timeout: float) -> list:
+        """Lista de utils.powershell.CommandResult, um por (rótulo, comando)."""
+
+    @abc.abstractmethod
+    def run_process(self, argv: List[str], input_data: bytes, timeout: float) -> Tuple[int, str, str]:
+        ...
+
+    @abc.abstractmethod
+    def spawn(self, argv: List[str]):
+        """Inicia um processo independente (sem esperar)."""
+
+    @abc.abstractmethod
+    def stream_process(self, argv: List[str], sink, timeout: float):
+        """Alimenta sink (utils.process.LineSink) linha a linha e retorna o StreamResult."""
+
+    @abc.abstractmethod
+    async def run_process_async(self, argv: List[str], input_data: bytes, timeout: float) -> Tuple[int, str, str]:
+        ...
+
+    @abc.abstractmethod
+    async def run_powershell_async(self, command: str, timeout: float) -> Tuple[int, str, str]:
+        ...
+
+    @abc.abstractmethod
+    async def stream_process_async(self, argv: List[str], sink, timeout: float):
+        ...
+
+    @abc.abstractmethod
+    def copy_file(self, src: str, dst: str):
+        ...
+
+
+@dataclass
+class SimRule:
+    """Resposta simulada para comandos cujo texto casa com match (re.search, sem diferenciar maiúsculas).
+
+    lines: saída (stdout) linha a linha; com foreach, item_lines se repete para
+    cada argumento posicional após o token foreach ({item}, {count} disponíveis).
+    latency_ms: duração total; item_latency_ms: acrescentado por item.
+    """
+    match: str
+    rc: int = 0
+    latency_ms: float = 0.0
+    lines: List[str] = field(default_factory=list)
+    stderr: str = ""
+    foreach: str = ""
+    item_lines: List[str] = field(default_factory=list)
+    item_latency_ms: float = 0.0
+    footer: List[str] = field(default_factory=list)
+
+    def __post_init__(self):
+        self.pattern = re.compile(self.match, re.I)
+
+    def _items(self, argv: List[str]) -> List[str]:
+        if not self.foreach or self.foreach not in argv:
+            return []
+        items = []
+        for arg in argv[argv.index(self.foreach) + 1:]:
+            if arg.startswith("-"):
+                break
+            items.append(arg)
+        return items
+
+    def render(self, argv: List[str]) -> Tuple[List[str], float]:
+        """(linhas de saída, latência em segundos) para esta chamada."""
+        items = self._items(argv)
+        values = {"count": len(items)}
+        out = [line.format(**values) for line in self.lines]
+        for item in items:
+            out.extend(line.format(item=item, **values) for line in self.item_lines)
+        out.extend(line.format(**values) for line in self.footer)
+        return out, (self.latency_ms + self.item_latency_ms * len(items)) / 1000
+
+
+class SimulatedExecutor(Executor):
+    """Reproduz um cenário JSON sem executar nada externo.
+
+    Cenário: {"rules": [SimRule...], "default": SimRule, "copy_latency_ms": n, "copy_mbps": n}.
+    A primeira regra que casar vence; sem nenhuma, usa "default" (rc 0, sem saída).
+    calls registra (tipo, comando, código, duração) de cada chamada.
+    """
+
+    name = "simulated"
+
+    def __init__(self, scenario: dict, root: str):
+        self.root = os.path.abspath(root)
+        self.rules = [SimRule(**r) for r in scenario.get("rules", [])]
+        self.default = SimRule(**scenario.get("default", {"match": ""}))
+        self.copy_latency = scenario.get("copy_latency_ms", 0) / 1000
+        mbps = scenario.get("copy_mbps", 0)
+        self.copy_bytes_per_s = mbps * 1024 * 1024 / 8 if mbps else 0
+        self.calls = []
+        self._calls_lock = threading.Lock()
+
+    @classmethod
+    def from_file(cls, path: str, root: str) -> "SimulatedExecutor":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f), root)
+
+    # --- Caminhos -----------------------------------------------------------
+
+    def map_path(self, path: str) -> str:
+        r"""\\servidor\share\x → <root>/unc/servidor/share/x; C:\x → <root>/c/x; demais inalterados."""
+        if path.startswith("\\\\"):
+            parts = [p for p in path[2:].split("\\") if p]
+            return os.path.join(self.root, "unc", *parts)
+        if re.match(r"^[A-Za-z]:\\", path):
+            parts = [p for p in path[3:].split("\\") if p]
+            return os.path.join(self.root, path[0].lower(), *parts)
+        return path
+
+    def apply_paths(self, obj):
+        """Reescreve com map_path todos os caminhos Windows de uma configuração (dataclasses aninhadas)."""
+        for f in fields(obj):
+            value = getattr(obj, f.name)
+            if isinstance(value, str):
+                setattr(obj, f.name, self.map_path(value))
+            elif is_dataclass(value):
+                self.apply_paths(value)
+            elif isinstance(value, list):
+                for item in value:
+                    if is_dataclass(item):
+                        self.apply_paths(item)
+
+    # --- Regras -------------------------------------------------------------
+
+    def _rule(self, text: str) -> SimRule:
+        return next((r for r in self.rules if r.pattern.search(text)), self.default)
+
+    def _plan(self, text: str, argv: List[str], timeout: Optional[float]):
+        """(regra, linhas de saída, duração, estourou o limite) de uma chamada."""
+        rule = self._rule(text)
+        lines, latency = rule.render(argv)
+        if timeout and latency > timeout:
+            # Só a fração das linhas que "sairia" antes do limite
+            return rule, lines[:int(len(lines) * timeout / latency)], timeout, True
+        return rule, lines, latency, False
+
+    def _finish(self, kind: str, text: str, rule: SimRule, lines: List[str], elapsed: float,
+                timed_out: bool, timeout: Optional[float]) -> Tuple[int, str, str]:
+        from utils.process import TIMEOUT_RC
+        rc = TIMEOUT_RC if timed_out else rule.rc
+        with self._calls_lock:
+            self.calls.append((kind, text, rc, elapsed))
+        out = "\n".join(lines) + ("\n" if lines else "")
+        if timed_out:
+            return rc, out, f"Processo encerrado: tempo limite de {timeout:g}s excedido"
+        return rc, out, rule.stderr
+
+    def _call(self, kind: str, text: str, argv: List[str], timeout: Optional[float]) -> Tuple[int, str, str]:
+        rule, lines, elapsed, timed_out = self._plan(text, argv, timeout)
+        time.sleep(elapsed)
+        return self._finish(kind, text, rule, lines, elapsed, timed_out, timeout)
+
+    async def _call_async(self, kind: str, text: str, argv: List[str],
+                          timeout: Optional[float]) -> Tuple[int, str, str]:
+        rule, lines, elapsed, timed_out = self._plan(text, argv, timeout)
+        await asyncio.sleep(elapsed)
+        return self._finish(kind, text, rule, lines, elapsed, timed_out, timeout)
+
+    def _stream_result(self, argv: List[str], sink, rule: SimRule, lines: List[str], elapsed: float,
+                       timed_out: bool, timeout: Optional[float]):
+        rc, _, _ = self._finish("stream", " ".join(argv), rule, lines, elapsed, timed_out, timeout)
+        if timed_out:
+            return sink.result(rc, argv[0], "timeout", f"tempo limite de {timeout:g}s excedido")
+        return sink.result(rc, argv[0])
+
+    # --- Executor -----------------------------------------------------------
+
+    def run_powershell(self, command, capture_output, timeout):
+        return self._call("powershell", command, command.split(), timeout)
+
+    async def run_powershell_async(self, command, timeout):
+        return await self._call_async("powershell", command, command.split(), timeout)
+
+    def run_powershell_batch(self, commands, timeout):
+        from utils.powershell import CommandResult
+        results = []
+        for label, command in commands:
+            start = time.time()
+            rc, out, err = self.run_powershell(command, True, timeout)
+            results.append(CommandResult(label, command, rc, out, err, time.time() - start))
+        return results
+
+    def run_process(self, argv, input_data, timeout):
+        return self._call("process", " ".join(argv), argv, timeout)
+
+    async def run_process_async(self, argv, input_data, timeout):
+        return await self._call_async("process", " ".join(argv), argv, timeout)
+
+    def spawn(self, argv):
+        with self._calls_lock:
+            self.calls.append(("spawn", " ".join(argv), 0, 0.0))
+
+    def stream_process(self, argv, sink, timeout):
+        rule, lines, elapsed, timed_out = self._plan(" ".join(argv), argv, timeout)
+        step = elapsed / max(1, len(lines))
+        if not lines:
+            time.sleep(elapsed)
+        for line in lines:
+            time.sleep(step)
+            sink.feed(line)
+        return self._stream_result(argv, sink, rule, lines, elapsed, timed_out, timeout)
+
+    async def stream_process_async(self, argv, sink, timeout):
+        rule, lines, elapsed, timed_out = self._plan(" ".join(argv), argv, timeout)
+        step = elapsed / max(1, len(lines))
+        if not lines:
+            await asyncio.sleep(elapsed)
+        for line in lines:
+            await asyncio.sleep(step)
+            sink.feed(line)
+        return self._stream_result(argv, sink, rule, lines, elapsed, timed_out, timeout)
+
+    def copy_file(self, src, dst):
+        delay = self.copy_latency
+        if self.copy_bytes_per_s:
+            delay += os.path.getsize(src) / self.copy_bytes_per_s
+        time.sleep(delay)
+        return shutil.copy2(src, dst)
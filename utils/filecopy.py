@@ -0,0 +1,309 @@
+"""Cópia incremental de árvores de diretórios (rede → disco local)."""
+import hashlib
+import heapq
+import math
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Tuple
+
+from utils.executor import get_executor
+from utils.trace import get_tracer
+
+# Tolerância de mtime: SMB/FAT arredondam timestamps em até 2s
+MTIME_TOLERANCE = 2.0
+
+# Quantos arquivos mais lentos guardar nas métricas
+SLOWEST_FILES = 5
+
+MB = 1024 * 1024
+
+# Arquivos por span de "lote de cópia" no trace (por thread de cópia)
+TRACE_BATCH_FILES = 100
+
+
+def _nearest_rank(ordered: List[float], pct: float) -> float:
+    if not ordered:
+        return 0.0
+    rank = max(1, math.ceil(len(ordered) * pct / 100))
+    return ordered[rank - 1]
+
+
+@dataclass
+class SyncStats:
+    files_copied: int = 0
+    bytes_copied: int = 0
+    files_skipped: int = 0
+    bytes_skipped: int = 0
+    files_removed: int = 0
+    bytes_removed: int = 0
+    dirs: int = 0
+    elapsed: float = 0.0
+    # Latência por arquivo (s): comparação + cópia, como visto pela thread que o processou
+    latencies: List[float] = field(default_factory=list, repr=False)
+    # Heap mínimo (latência, caminho, tamanho) com os SLOWEST_FILES mais lentos
+    slowest: List[Tuple[float, str, int]] = field(default_factory=list, repr=False)
+
+    def summary(self) -> str:
+        return (f"{self.files_copied} copiados ({self.bytes_copied / MB:.1f} MB), "
+                f"{self.files_skipped} inalterados ({self.bytes_skipped / MB:.1f} MB), "
+                f"{self.files_removed} removidos ({self.bytes_removed / MB:.1f} MB)")
+
+    def record_latency(self, path: str, size: int, latency: float):
+        self.latencies.append(latency)
+        entry = (latency, path, size)
+        if len(self.slowest) < SLOWEST_FILES:
+            heapq.heappush(self.slowest, entry)
+        elif latency > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, entry)
+
+    @property
+    def files(self) -> int:
+        return self.files_copied + self.files_skipped
+
+    @property
+    def files_per_sec(self) -> float:
+        return self.files / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def mb_per_sec(self) -> float:
+        """Vazão dos bytes efetivamente copiados (inalterados não contam)."""
+        return self.bytes_copied / MB / self.elapsed if self.elapsed > 0 else 0.0
+
+    def percentile(self, pct: float) -> float:
+        """Latência por arquivo (s) no percentil pct; 0 sem arquivos."""
+        return _nearest_rank(sorted(self.latencies), pct)
+
+    def metrics(self) -> dict:
+        """Métricas em formato serializável (JSON), latências em milissegundos."""
+        ordered = sorted(self.latencies)
+
+        def _ms(pct: float) -> float:
+            return round(_nearest_rank(ordered, pct) * 1000, 1)
+
+        return {
+            "files": self.files,
+            "files_copied": self.files_copied,
+            "files_skipped": self.files_skipped,
+            "files_removed": self.files_removed,
+            "bytes": self.bytes_copied + self.bytes_skipped,
+            "bytes_copied": self.bytes_copied,
+            "dirs": self.dirs,
+            "elapsed_s": round(self.elapsed, 2),
+            "files_per_s": round(self.files_per_sec, 1),
+            "mb_per_s": round(self.mb_per_sec, 2),
+            "latency_ms": {"p50": _ms(50), "p90": _ms(90), "p95": _ms(95), "p99": _ms(99),
+                           "max": _ms(100)},
+            "slowest": [{"path": path, "ms": round(latency * 1000, 1), "bytes": size}
+                        for latency, path, size in sorted(self.slowest, reverse=True)],
+        }
+
+
+class CopyError(Exception):
+    """Um ou mais arquivos falharam; errors = [(caminho, mensagem), ...].
+
+    stats: o que foi feito até a falha (sync_tree), com o tempo total preenchido.
+    """
+
+    def __init__(self, errors: List[Tuple[str, str]], stats: Optional[SyncStats] = None):
+        self.errors = errors
+        self.stats = stats
+        path, msg = errors[0]
+        super().__init__(f"{len(errors)} arquivo(s) com erro (ex: {path}: {msg})")
+
+    def report(self, limit: int = 10) -> str:
+        lines = [f"  {path}: {msg}" for path, msg in self.errors[:limit]]
+        if len(self.errors) > limit:
+            lines.append(f"  ... e mais {len(self.errors) - limit}")
+        return "\n".join(lines)
+
+
+def default_copy_file(src: str, dst: str):
+    """Cópia padrão de um arquivo (shutil.copy2, ou o backend de utils.executor se houver)."""
+    executor = get_executor()
+    if executor is not None:
+        return executor.copy_file(src, dst)
+    return shutil.copy2(src, dst)
+
+
+def file_hash(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 do conteúdo de um arquivo."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def is_unchanged(src: str, dst: str, src_stat: os.stat_result = None, compare_hash: bool = False) -> bool:
+    """True se dst já é uma cópia de src (mesmo tamanho e mtime, opcionalmente mesmo hash)."""
+    try:
+        dst_stat = os.stat(dst)
+    except OSError:
+        return False
+    src_stat = src_stat or os.stat(src)
+
+    if dst_stat.st_size != src_stat.st_size:
+        return False
+    if compare_hash:
+        return file_hash(src) == file_hash(dst)
+    return abs(dst_stat.st_mtime - src_stat.st_mtime) <= MTIME_TOLERANCE
+
+
+def _remove_extras(dst: str, seen: set, stats: SyncStats):
+    """Remove do destino tudo que não apareceu na varredura da origem.
+
+    seen: caminhos de destino (normcase) de arquivos e diretórios vistos na origem.
+    A varredura é local — nenhuma consulta extra à rede.
+    """
+    for root, dirs, files in os.walk(dst, topdown=True):
+        for name in files:
+            path = os.path.join(root, name)
+            if os.path.normcase(path) not in seen:
+                stats.bytes_removed += os.path.getsize(path)
+                stats.files_removed += 1
+                os.remove(path)
+
+        for name in list(dirs):
+            path = os.path.join(root, name)
+            if os.path.normcase(path) not in seen:
+                for sub_root, _, sub_files in os.walk(path):
+                    stats.files_removed += len(sub_files)
+                    stats.bytes_removed += sum(os.path.getsize(os.path.join(sub_root, f)) for f in sub_files)
+                shutil.rmtree(path)
+                dirs.remove(name)
+
+
+def _scan(src: str, dst: str, errors: list):
+    """Percorre src em uma única passada com os.scandir, criando os diretórios do destino.
+
+    Gera (origem, destino, stat) usando o stat em cache da entrada (no Windows
+    vem junto da listagem, sem ida extra ao servidor). Falhas vão para errors.
+    """
+    stack = [(src, dst)]
+    while stack:
+        src_dir, dst_dir = stack.pop()
+        try:
+            os.makedirs(dst_dir, exist_ok=True)
+            with os.scandir(src_dir) as entries:
+                entries = list(entries)
+        except OSError as e:
+            errors.append((src_dir, str(e)))
+            continue
+
+        for entry in entries:
+            target = os.path.join(dst_dir, entry.name)
+            try:
+                if entry.is_dir():
+                    stack.append((entry.path, target))
+                    yield entry.path, target, None
+                else:
+                    yield entry.path, target, entry.stat()
+            except OSError as e:
+                errors.append((entry.path, str(e)))
+
+
+def sync_tree(src: str, dst: str, compare_hash: bool = False, delete_extra: bool = True,
+              on_file: Optional[Callable[[str, int, bool], None]] = None,
+              on_discover: Optional[Callable[[int], None]] = None,
+              workers: int = 1, copy_file: Callable[[str, str], object] = None) -> SyncStats:
+    """Sincroniza dst com src copiando apenas arquivos novos ou alterados.
+
+    Enumeração e cópia acontecem na mesma passada: os arquivos entram na fila de
+    cópia assim que são listados, sem contagem prévia da árvore.
+
+    compare_hash: além de tamanho/mtime, compara o conteúdo (lê os dois lados).
+    delete_extra: apaga do destino arquivos que não existem mais na origem.
+    on_discover(size): chamado ao listar cada arquivo (o total cresce durante a cópia).
+    on_file(path, size, copied): chamado ao concluir cada arquivo (pode vir de threads).
+    workers: cópias simultâneas — em SMB a latência por arquivo domina, não a banda.
+    copy_file(src, dst): função de cópia de cada arquivo (deve preservar o mtime; padrão: default_copy_file).
+
+    Erros por arquivo não interrompem a cópia: ao final, levanta CopyError com todos
+    (e com o SyncStats parcial).
+    O SyncStats retornado inclui diretórios, tempo total e latência por arquivo.
+    """
+    started = time.perf_counter()
+    stats = SyncStats()
+    copy_file = copy_file or default_copy_file
+    lock = threading.Lock()
+    errors = []
+    seen = set()
+    tracer = get_tracer()
+    # Lote aberto por thread: [início, fim, arquivos, copiados, bytes]
+    batches = {}
+
+    def _trace_batch(thread: str, batch: list):
+        tracer.complete("lote de cópia", "copia", batch[0], batch[1], lane=thread, source=src,
+                        files=batch[2], copied=batch[3], bytes=batch[4])
+
+    def _sync_file(s: str, d: str, st: os.stat_result):
+        file_start = time.perf_counter()
+        try:
+            copied = not is_unchanged(s, d, st, compare_hash)
+            if copied:
+                copy_file(s, d)
+        except Exception as e:
+            with lock:
+                errors.append((s, str(e)))
+            return
+
+        file_end = time.perf_counter()
+        thread = threading.current_thread().name
+        with lock:
+            if copied:
+                stats.files_copied += 1
+                stats.bytes_copied += st.st_size
+            else:
+                stats.files_skipped += 1
+                stats.bytes_skipped += st.st_size
+            stats.record_latency(s, st.st_size, file_end - file_start)
+            batch = batches.setdefault(thread, [file_start, file_end, 0, 0, 0])
+            batch[1] = file_end
+            batch[2] += 1
+            batch[3] += int(copied)
+            batch[4] += st.st_size if copied else 0
+            full = batches.pop(thread) if batch[2] >= TRACE_BATCH_FILES else None
+        if full:
+            _trace_batch(thread, full)
+        if on_file:
+            on_file(s, st.st_size, copied)
+
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="copia") if workers > 1 else None
+    # Limita quantos arquivos listados aguardam cópia (memória constante em árvores enormes)
+    in_flight = threading.BoundedSemaphore(workers * 4)
+
+    def _submit(s: str, d: str, st: os.stat_result):
+        in_flight.acquire()
+        future = executor.submit(_sync_file, s, d, st)
+        future.add_done_callback(lambda _: in_flight.release())
+
+    try:
+        for s, d, st in _scan(src, dst, errors):
+            seen.add(os.path.normcase(d))
+            if st is None:
+                stats.dirs += 1
+                continue
+            if on_discover:
+                on_discover(st.st_size)
+            if executor:
+                _submit(s, d, st)
+            else:
+                _sync_file(s, d, st)
+    finally:
+        if executor:
+            executor.shutdown(wait=True)
+        for thread, batch in batches.items():
+            _trace_batch(thread, batch)
+
+    # Com falha de listagem, o conjunto "seen" está incompleto: não apaga nada
+    if delete_extra and not errors:
+        _remove_extras(dst, seen, stats)
+
+    stats.elapsed = time.perf_counter() - started
+    if errors:
+        raise CopyError(errors, stats)
+    return stats
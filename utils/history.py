@@ -0,0 +1,231 @@
+"""Histórico de execuções em SQLite (history.db em CONFIG.log_dir).
+
+Alimentado pelos eventos estruturados (utils.events) à medida que acontecem:
+run_start/run_end viram linhas de runs e step_end, de steps. Um processo
+(run_id dos eventos) pode ter várias execuções (ex: diagnóstico e instalação
+pelo menu); etapas e fim pertencem à última execução aberta do processo. O banner e o
+diagnóstico consultam a última execução por índice, sem varrer a pasta de
+logs. Na primeira abertura, os provisioning_*.log existentes são importados
+uma única vez (menos o log da execução corrente, que já entra pelos eventos).
+"""
+import datetime
+import os
+import re
+import sqlite3
+import threading
+from typing import Iterable, List, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id      TEXT NOT NULL,
+    hostname    TEXT,
+    kind        TEXT NOT NULL,
+    started_at  TEXT NOT NULL,
+    ended_at    TEXT,
+    duration_s  REAL,
+    status      TEXT,
+    ok          INTEGER,
+    failed      INTEGER,
+    skipped     INTEGER,
+    log_file    TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_kind_started ON runs (kind, started_at);
+CREATE INDEX IF NOT EXISTS runs_started ON runs (started_at);
+CREATE INDEX IF NOT EXISTS runs_run_id ON runs (run_id);
+CREATE TABLE IF NOT EXISTS steps (
+    run         INTEGER NOT NULL REFERENCES runs (id),
+    step        TEXT NOT NULL,
+    ended_at    TEXT NOT NULL,
+    duration_s  REAL,
+    status      TEXT,
+    error_class TEXT,
+    PRIMARY KEY (run, step)
+);
+CREATE INDEX IF NOT EXISTS steps_step_ended ON steps (step, ended_at);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# provisioning_<HOST>_<AAAAMMDD>_<HHMMSS>.log
+_LOG_NAME_RE = re.compile(r"^provisioning_(?P<host>.+)_(?P<stamp>\d{8}_\d{6})\.log$")
+# Trechos que identificam o tipo de execução num log antigo, em ordem de prioridade
+_LOG_KINDS = (
+    ("Etapa 2 concluída", "install"),
+    ("Configurando identidade", "identity"),
+    ("Diagnóstico", "diagnostics"),
+)
+
+
+def _status(ok: Optional[bool]) -> str:
+    if ok is None:
+        return "skip"
+    return "ok" if ok is True else "fail"
+
+
+class RunHistory:
+    """Banco SQLite de execuções e etapas; seguro entre threads (uma conexão sob lock)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._conn:
+            self._conn.executescript(SCHEMA)
+        try:
+            # WAL: gravações curtas sem bloquear leituras (ex: outra instância no banner)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        except sqlite3.Error:
+            pass
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # --- Gravação -----------------------------------------------------------
+
+    def record(self, event: dict, log_file: str = None):
+        """Registra um evento de utils.events (run_start, run_end e step_end; os demais são ignorados)."""
+        kind = event["event"]
+        data = event.get("data") or {}
+        try:
+            with self._lock, self._conn:
+                if kind == "run_start":
+                    self._conn.execute(
+                        "INSERT INTO runs (run_id, hostname, kind, started_at, log_file) VALUES (?, ?, ?, ?, ?)",
+                        (event["run_id"], event["hostname"], data.get("kind", "run"), event["ts"], log_file))
+                elif kind == "run_end":
+                    failed = data.get("failed")
+                    if failed is None and "passed" in data:
+                        failed = data["total"] - data["passed"]
+                    self._conn.execute(
+                        "UPDATE runs SET ended_at = ?, duration_s = ?, status = ?, ok = ?, failed = ?, skipped = ? "
+                        "WHERE id = (SELECT MAX(id) FROM runs WHERE run_id = ? AND kind = ? AND ended_at IS NULL)",
+                        (event["ts"], event["duration_s"], "fail" if failed else "ok",
+                         data.get("ok", data.get("passed")), failed, data.get("skipped"),
+                         event["run_id"], data.get("kind", "run")))
+                elif kind == "step_end":
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO steps (run, step, ended_at, duration_s, status, error_class) "
+                        "SELECT MAX(id), ?, ?, ?, ?, ? FROM runs WHERE run_id = ? AND ended_at IS NULL "
+                        "HAVING MAX(id) IS NOT NULL",
+                        (event["step"], event["ts"], event["duration_s"], _status(data.get("status")),
+                         event["error_class"], event["run_id"]))
+        except sqlite3.Error:
+            # Falha no histórico não pode interromper o provisionamento
+            pass
+
+    # --- Consultas ----------------------------------------------------------
+
+    def last_run(self, kind: str = None) -> Optional[dict]:
+        """Execução mais recente (do tipo kind, se informado) ou None."""
+        query = "SELECT * FROM runs"
+        args = ()
+        if kind:
+            query += " WHERE kind = ?"
+            args = (kind,)
+        query += " ORDER BY started_at DESC, id DESC LIMIT 1"
+        try:
+            with self._lock:
+                row = self._conn.execute(query, args).fetchone()
+        except sqlite3.Error:
+            return None
+        return dict(row) if row else None
+
+    def steps(self, run: int) -> List[dict]:
+        """Etapas da execução (id de last_run) em ordem de término."""
+        try:
+            with self._lock:
+                rows = self._conn.execute("SELECT * FROM steps WHERE run = ? ORDER BY ended_at", (run,)).fetchall()
+        except sqlite3.Error:
+            return []
+        return [dict(row) for row in rows]
+
+    # --- Importação dos logs antigos ---------------------------------------
+
+    def _meta(self, key: str) -> Optional[str]:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def import_logs(self, log_dir: str, exclude: Iterable[str] = ()) -> int:
+        """Importa os provisioning_*.log de log_dir (uma vez por banco). Retorna quantos entraram.
+
+        exclude: logs a ignorar (ex: o da execução corrente, registrada pelos eventos).
+        """
+        with self._lock:
+            if self._meta("logs_imported"):
+                return 0
+        skip = {os.path.normcase(os.path.abspath(path)) for path in exclude}
+        rows = []
+        try:
+            names = os.listdir(log_dir)
+        except OSError:
+            names = []
+        for name in names:
+            match = _LOG_NAME_RE.match(name)
+            if not match:
+                continue
+            path = os.path.join(log_dir, name)
+            if os.path.normcase(os.path.abspath(path)) in skip:
+                continue
+            try:
+                started = datetime.datetime.strptime(match["stamp"], "%Y%m%d_%H%M%S")
+                ended = datetime.datetime.fromtimestamp(os.path.getmtime(path))
+            except (OSError, ValueError):
+                continue
+            rows.append((f"log:{name}", match["host"], _log_kind(path),
+                         started.isoformat(timespec="milliseconds"), ended.isoformat(timespec="milliseconds"),
+                         round(max(0.0, (ended - started).total_seconds()), 3), path))
+        try:
+            with self._lock, self._conn:
+                self._conn.executemany(
+                    "INSERT INTO runs (run_id, hostname, kind, started_at, ended_at, duration_s, log_file) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+                self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('logs_imported', ?)",
+                                   (datetime.datetime.now().isoformat(timespec="seconds"),))
+        except sqlite3.Error:
+            return 0
+        return len(rows)
+
+
+def _log_kind(path: str) -> str:
+    """Tipo de execução de um log antigo pelo conteúdo ("log" se não identificado)."""
+    found = set()
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                found.update(kind for marker, kind in _LOG_KINDS if marker in line)
+    except OSError:
+        pass
+    return next((kind for _, kind in _LOG_KINDS if kind in found), "log")
+
+
+def history_path(log_dir: str = None) -> str:
+    if log_dir is None:
+        # Mesma pasta efetiva do logger (que cai para %TEMP% se log_dir for inacessível)
+        from utils.logger import get_logger
+        log_dir = str(get_logger().log_dir)
+    return os.path.join(log_dir, "history.db")
+
+
+_history = None
+_history_lock = threading.Lock()
+
+
+def get_history() -> Optional[RunHistory]:
+    """Histórico da pasta de logs (importa os logs antigos na primeira abertura); None se indisponível."""
+    global _history
+    with _history_lock:
+        if _history is None:
+            from utils.logger import get_logger
+            path = history_path()
+            try:
+                _history = RunHistory(path)
+            except sqlite3.Error:
+                return None
+            _history.import_logs(os.path.dirname(path), exclude=[get_logger().get_log_path()])
+        return _history
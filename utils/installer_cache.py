@@ -0,0 +1,213 @@
+"""Cache local de instaladores, endereçado pelo hash do conteúdo, com limite de tamanho (LRU)."""
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from typing import Optional, Tuple
+
+from utils.filecopy import default_copy_file, file_hash, sync_tree
+
+
+def _tree_files(root: str):
+    """(caminho relativo, caminho absoluto) de todos os arquivos da árvore, ordenados."""
+    items = []
+    for dirpath, _, files in os.walk(root):
+        for name in files:
+            path = os.path.join(dirpath, name)
+            items.append((os.path.relpath(path, root).replace("\\", "/"), path))
+    return sorted(items)
+
+
+def source_signature(path: str, tree: bool = False) -> str:
+    """Assinatura barata da origem (só metadados: nomes, tamanhos, datas) para validar o cache."""
+    if not tree:
+        st = os.stat(path)
+        return f"{st.st_size}:{int(st.st_mtime)}"
+    h = hashlib.sha256()
+    for rel, abs_path in _tree_files(path):
+        st = os.stat(abs_path)
+        h.update(f"{rel}\0{st.st_size}\0{int(st.st_mtime)}\n".encode("utf-8"))
+    return h.hexdigest()
+
+
+def content_hash(path: str, tree: bool = False) -> str:
+    """SHA-256 do conteúdo; para árvores, hash dos pares (caminho relativo, hash do arquivo)."""
+    if not tree:
+        return file_hash(path)
+    h = hashlib.sha256()
+    for rel, abs_path in _tree_files(path):
+        h.update(f"{rel}\0{file_hash(abs_path)}\n".encode("utf-8"))
+    return h.hexdigest()
+
+
+def _size_of(path: str) -> int:
+    return sum(os.path.getsize(p) for _, p in _tree_files(path))
+
+
+class InstallerCache:
+    """Cache em disco local (ou pendrive do técnico) para instaladores da rede.
+
+    Layout:
+        <root>/objects/<sha256>/<nome>   instalador único (mantém o nome: .exe/.msi importam)
+        <root>/objects/<sha256>/...      árvore completa (ex: pasta do setup do Office)
+        <root>/index.json                objetos (tamanho, último uso) e origens (assinatura → hash)
+    """
+
+    def __init__(self, root: str, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.objects_dir = os.path.join(root, "objects")
+        self.tmp_dir = os.path.join(root, "tmp")
+        self.index_path = os.path.join(root, "index.json")
+        self._lock = threading.Lock()
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self.index = self._load_index()
+
+    def _load_index(self) -> dict:
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            index = {}
+        index.setdefault("objects", {})
+        index.setdefault("sources", {})
+        return index
+
+    def _save_index(self):
+        tmp = self.index_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.index, f, indent=2)
+        os.replace(tmp, self.index_path)
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.objects_dir, digest)
+
+    def _entry_path(self, digest: str) -> str:
+        """Caminho utilizável do objeto: o diretório (árvore) ou o arquivo dentro dele."""
+        obj = self.index["objects"][digest]
+        if obj.get("tree"):
+            return self._object_path(digest)
+        return os.path.join(self._object_path(digest), obj["name"])
+
+    def total_bytes(self) -> int:
+        return sum(obj["size"] for obj in self.index["objects"].values())
+
+    def lookup(self, source: str, tree: bool = False) -> Optional[str]:
+        """Hash do objeto em cache se a origem não mudou e a cópia local está íntegra."""
+        entry = self.index["sources"].get(os.path.normcase(source))
+        if not entry:
+            return None
+        try:
+            if entry["signature"] != source_signature(source, tree):
+                return None
+        except OSError:
+            # Origem inacessível (rede fora): a última versão em cache ainda serve
+            pass
+
+        digest = entry["hash"]
+        if digest not in self.index["objects"]:
+            return None
+        path = self._entry_path(digest)
+        if not os.path.exists(path):
+            return None
+        if content_hash(path, tree) != digest:
+            self._evict(digest)
+            return None
+        return digest
+
+    def fetch(self, source: str, tree: bool = False, copy_file=None) -> Tuple[str, bool]:
+        """Garante a origem no cache e retorna (caminho local, veio do cache sem transferir).
+
+        tree: armazena o diretório inteiro de source (source deve ser um diretório).
+        copy_file(src, dst): função de cópia de cada arquivo (padrão: utils.filecopy.default_copy_file).
+        """
+        with self._lock:
+            digest = self.lookup(source, tree)
+            hit = digest is not None
+            if not hit:
+                digest = self._pull(source, tree, copy_file or default_copy_file)
+            self.index["objects"][digest]["last_used"] = time.time()
+            self._evict_lru(keep=digest)
+            self._save_index()
+            return self._entry_path(digest), hit
+
+    def _pull(self, source: str, tree: bool, copy_file) -> str:
+        signature = source_signature(source, tree)
+        name = os.path.basename(source.rstrip("\\/"))
+        # Área de preparo fixa por origem: uma cópia interrompida é retomada na próxima vez
+        tmp = os.path.join(self.tmp_dir, hashlib.sha1(os.path.normcase(source).encode("utf-8")).hexdigest())
+        os.makedirs(tmp, exist_ok=True)
+
+        if tree:
+            sync_tree(source, tmp, workers=8, copy_file=copy_file)
+            digest = content_hash(tmp, tree=True)
+        else:
+            copy_file(source, os.path.join(tmp, name))
+            digest = content_hash(os.path.join(tmp, name))
+
+        if os.path.exists(self._object_path(digest)):
+            # Mesmo conteúdo vindo de outra origem: reaproveita o objeto existente
+            self._remove(tmp)
+        else:
+            os.replace(tmp, self._object_path(digest))
+
+        obj = self.index["objects"].setdefault(digest, {"name": name, "tree": tree})
+        obj["size"] = _size_of(self._object_path(digest))
+        self.index["sources"][os.path.normcase(source)] = {"signature": signature, "hash": digest}
+        return digest
+
+    @staticmethod
+    def _remove(path: str):
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+        elif os.path.exists(path):
+            os.remove(path)
+
+    def _evict(self, digest: str):
+        self._remove(self._object_path(digest))
+        self.index["objects"].pop(digest, None)
+        self.index["sources"] = {
+            src: entry for src, entry in self.index["sources"].items() if entry["hash"] != digest
+        }
+
+    def _evict_lru(self, keep: str = None):
+        """Remove os objetos menos usados recentemente até caber em max_bytes."""
+        by_age = sorted(self.index["objects"].items(), key=lambda item: item[1]["last_used"])
+        total = self.total_bytes()
+        for digest, obj in by_age:
+            if total <= self.max_bytes:
+                break
+            if digest == keep:
+                continue
+            total -= obj["size"]
+            self._evict(digest)
+
+
+_cache = None
+# Pasta do cache inacessível nesta execução (ex: pendrive ausente): não tenta de novo
+_cache_failed = False
+_cache_lock = threading.Lock()
+
+
+def get_installer_cache() -> Optional[InstallerCache]:
+    """Cache global conforme CONFIG.installer_cache_dir (vazio desativa).
+
+    Pasta inacessível (letra de pendrive ausente, sem permissão) também vale
+    como cache desativado: um aviso e os instaladores rodam da rede.
+    """
+    global _cache, _cache_failed
+    with _cache_lock:
+        if _cache is None and not _cache_failed:
+            from config import CONFIG
+            root = getattr(CONFIG, "installer_cache_dir", "")
+            if not root:
+                return None
+            try:
+                _cache = InstallerCache(root, CONFIG.installer_cache_max_mb * 1024 * 1024)
+            except OSError as e:
+                from utils.logger import get_logger
+                get_logger().warning(f"Cache de instaladores indisponível em {root} ({e}) — usando a rede.")
+                _cache_failed = True
+        return _cache
@@ -0,0 +1,150 @@
+"""Índice do que já está instalado (Chocolatey + registro de desinstalação)."""
+import json
+import os
+import re
+import threading
+from typing import Dict, Optional, Tuple
+
+_NUSPEC_VERSION = re.compile(rb"<version>\s*([^<\s]+)\s*</version>")
+
+_UNINSTALL_KEY = r"SOFTWARE\Microsoft\Windows\CurrentVersion\Uninstall"
+
+
+class WindowsBackend:
+    """Lê a pasta lib do Chocolatey e as chaves Uninstall do registro (64/32 bits + usuário)."""
+
+    def __init__(self, choco_lib: str = None):
+        self.choco_lib = choco_lib or os.path.join(
+            os.environ.get("PROGRAMDATA", r"C:\ProgramData"), "chocolatey", "lib"
+        )
+
+    def choco_packages(self) -> Dict[str, str]:
+        packages = {}
+        try:
+            entries = list(os.scandir(self.choco_lib))
+        except OSError:
+            return packages
+
+        for entry in entries:
+            if not entry.is_dir():
+                continue
+            nuspec = os.path.join(entry.path, f"{entry.name}.nuspec")
+            try:
+                with open(nuspec, "rb") as f:
+                    match = _NUSPEC_VERSION.search(f.read(4096))
+            except OSError:
+                continue
+            if match:
+                packages[entry.name.lower()] = match.group(1).decode("utf-8", errors="replace")
+        return packages
+
+    def programs(self) -> Dict[str, str]:
+        try:
+            import winreg
+        except ImportError:
+            return {}
+
+        views = [
+            (winreg.HKEY_LOCAL_MACHINE, winreg.KEY_WOW64_64KEY),
+            (winreg.HKEY_LOCAL_MACHINE, winreg.KEY_WOW64_32KEY),
+            (winreg.HKEY_CURRENT_USER, 0),
+        ]
+        programs = {}
+        for hive, view in views:
+            try:
+                root = winreg.OpenKey(hive, _UNINSTALL_KEY, 0, winreg.KEY_READ | view)
+            except OSError:
+                continue
+            with root:
+                for i in range(winreg.QueryInfoKey(root)[0]):
+                    try:
+                        with winreg.OpenKey(root, winreg.EnumKey(root, i)) as sub:
+                            name = winreg.QueryValueEx(sub, "DisplayName")[0]
+                            try:
+                                version = winreg.QueryValueEx(sub, "DisplayVersion")[0]
+                            except OSError:
+                                version = ""
+                    except OSError:
+                        continue
+                    if name:
+                        programs[name] = str(version)
+        return programs
+
+
+class SnapshotBackend:
+    """Lê um snapshot JSON: {"choco": {id: versão}, "programs": {DisplayName: versão}}.
+
+    Permite testar a detecção no Linux com um arquivo de fixture.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "r", encoding="utf-8") as f:
+            self.data = json.load(f)
+
+    def choco_packages(self) -> Dict[str, str]:
+        return {k.lower(): v for k, v in self.data.get("choco", {}).items()}
+
+    def programs(self) -> Dict[str, str]:
+        return dict(self.data.get("programs", {}))
+
+
+class InstalledIndex:
+    """Consulta em memória do que está instalado; construída uma única vez por execução."""
+
+    def __init__(self, choco: Dict[str, str], programs: Dict[str, str]):
+        self.choco = choco
+        self.programs = programs
+        self._programs_lower = [(name.lower(), name, version) for name, version in programs.items()]
+
+    @classmethod
+    def from_backend(cls, backend) -> "InstalledIndex":
+        return cls(backend.choco_packages(), backend.programs())
+
+    def choco_version(self, package_id: str) -> Optional[str]:
+        return self.choco.get(package_id.lower())
+
+    def find_program(self, pattern: str) -> Optional[Tuple[str, str]]:
+        """Primeiro programa cujo DisplayName contém algum dos trechos (separados por '|')."""
+        needles = [p.strip().lower() for p in pattern.split("|") if p.strip()]
+        for lower, name, version in self._programs_lower:
+            if any(n in lower for n in needles):
+                return name, version
+        return None
+
+
+_backend = None
+_index: Optional[InstalledIndex] = None
+_lock = threading.Lock()
+
+
+def set_inventory_backend(backend):
+    """Substitui a fonte de dados (ex: SnapshotBackend em testes) e descarta o índice atual."""
+    global _backend, _index
+    with _lock:
+        _backend = backend
+        _index = None
+
+
+def _default_backend():
+    from config import CONFIG
+    snapshot = getattr(CONFIG, "inventory_snapshot", "")
+    return SnapshotBackend(snapshot) if snapshot else WindowsBackend()
+
+
+def get_installed_index() -> InstalledIndex:
+    """Índice em cache; a primeira chamada lê o disco/registro uma única vez."""
+    global _backend, _index
+    with _lock:
+        if _index is None:
+            if _backend is None:
+                _backend = _default_backend()
+            _index = InstalledIndex.from_backend(_backend)
+        return _index
+
+
+def invalidate_installed_index():
+    """Força uma nova leitura na próxima consulta (após instalar algo)."""
+    global _index
+    with _lock:
+        _index = None
@@ -0,0 +1,136 @@
+"""Diário (journal) append-only das etapas da Instalação Completa, para retomar após queda ou reboot."""
+import datetime
+import json
+import os
+import uuid
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+
+@dataclass
+class JournalSession:
+    """Estado de uma instalação (execução original + retomadas) reconstruído a partir do diário."""
+    session: str
+    started: str
+    options: dict = field(default_factory=dict)
+    results: Dict[str, dict] = field(default_factory=dict)
+    interrupted: List[str] = field(default_factory=list)
+    finished: bool = False
+
+    def completed(self, key: str) -> bool:
+        result = self.results.get(key)
+        return bool(result) and result.get("status") is True
+
+
+class InstallJournal:
+    """Arquivo JSONL por máquina em CONFIG.log_dir; cada registro é gravado com fsync.
+
+    Eventos: session (nova instalação), run (início de execução/retomada),
+    start / finish (etapas) e end (execução concluída).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.session_id = None
+        self.run_id = None
+
+    def _append(self, event: str, **data):
+        record = {"ts": datetime.datetime.now().isoformat(timespec="seconds"), "event": event,
+                  "session": self.session_id, "run": self.run_id, **data}
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+        except OSError:
+            # Falha ao registrar não pode interromper a instalação
+            pass
+
+    def _records(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                lines = f.readlines()
+        except OSError:
+            return
+        for line in lines:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                # Última linha truncada por queda de energia: ignorada
+                continue
+
+    def last_session(self) -> Optional[JournalSession]:
+        """Reconstrói a instalação mais recente; None se o diário estiver vazio."""
+        state = None
+        running = set()
+        for record in self._records():
+            event = record.get("event")
+            if event == "session":
+                state = JournalSession(record["session"], record["ts"], record.get("options", {}))
+                running = set()
+            elif state is None or record.get("session") != state.session:
+                continue
+            elif event == "run":
+                # Etapas iniciadas e não finalizadas na execução anterior foram interrompidas
+                state.interrupted.extend(k for k in sorted(running) if k not in state.interrupted)
+                running = set()
+                state.finished = False
+            elif event == "start":
+                running.add(record["step"])
+            elif event == "finish":
+                running.discard(record["step"])
+                state.results[record["step"]] = record
+            elif event == "end":
+                state.finished = True
+        if state is not None:
+            state.interrupted.extend(k for k in sorted(running) if k not in state.interrupted)
+            state.interrupted = [k for k in state.interrupted if not state.completed(k)]
+        return state
+
+    def _terminate_partial_line(self):
+        """Fecha uma última linha truncada (queda no meio da escrita) para não corromper a próxima."""
+        try:
+            with open(self.path, "rb+") as f:
+                f.seek(0, os.SEEK_END)
+                if f.tell() == 0:
+                    return
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    f.write(b"\n")
+        except OSError:
+            pass
+
+    def begin(self, options: dict, resume: JournalSession = None):
+        """Inicia uma execução: nova instalação, ou retomada da sessão informada."""
+        self._terminate_partial_line()
+        self.run_id = uuid.uuid4().hex[:8]
+        if resume is None:
+            self.session_id = self.run_id
+            self._append("session", options=options)
+        else:
+            self.session_id = resume.session
+        self._append("run", resumed=resume is not None)
+
+    def step_started(self, step):
+        self._append("start", step=step.key, label=step.label)
+
+    def step_finished(self, step, result):
+        self._append("finish", step=step.key, label=result.label, status=result.status,
+                     detail=result.detail, elapsed=round(result.elapsed, 1), timed_out=result.timed_out)
+
+    def end(self):
+        self._append("end")
+
+
+def journal_path(log_dir: str = None, hostname: str = None) -> str:
+    if log_dir is None:
+        # Mesma pasta efetiva do logger (que cai para %TEMP% se log_dir for inacessível)
+        from utils.logger import get_logger
+        log_dir = str(get_logger().log_dir)
+    hostname = hostname or os.environ.get("COMPUTERNAME", "unknown")
+    return os.path.join(log_dir, f"journal_{hostname}.jsonl")
+
+
+def get_journal() -> InstallJournal:
+    return InstallJournal(journal_path())
@@ -1,13 +1,42 @@
-"""Logger com saída colorida no console."""
+"""Logger com saída colorida no console.
+
+Gravação em segundo plano: as chamadas só enfileiram a linha do arquivo; uma
+thread mantém o arquivo aberto e grava em lotes a cada FLUSH_INTERVAL ou
+FLUSH_BYTES. O console tem fila e thread próprias, então uma etapa verbosa não
+espera o terminal nem o disco. Os helpers de utils.console chamam wait_console()
+antes de imprimir ou perguntar, mantendo a ordem na tela (sem mensagens pendentes
+não há espera). flush() espera as duas filas; close() (registrado no atexit) grava o resto.
+"""
+import atexit
 import os
 import datetime
+import json
+import queue
+import threading
+import time
 from pathlib import Path
 
+# Lote do arquivo é gravado ao atingir este tempo (s) ou tamanho (bytes), o que vier primeiro
+FLUSH_INTERVAL = 0.5
+FLUSH_BYTES = 64 * 1024
+# Quanto flush()/close() esperam pela thread de gravação (s)
+FLUSH_TIMEOUT = 5.0
+
+_CONSOLE_HELPERS = {
+    "INFO": "print_info",
+    "SUCCESS": "print_success",
+    "WARNING": "print_warning",
+    "ERROR": "print_error",
+}
+
 
 class Logger:
-    """Logging de ações do provisionamento com visual premium."""
+    """Logging de ações do provisionamento com visual premium.
 
-    def __init__(self, log_dir: str = None):
+    buffered=False grava e imprime na própria chamada (abre/anexa/fecha por linha).
+    """
+
+    def __init__(self, log_dir: str = None, buffered: bool = True):
         if log_dir is None:
             from config import CONFIG
             log_dir = CONFIG.log_dir
@@ -17,6 +46,21 @@ class Logger:
         self._ensure_log_dir()
         self._create_log_file()
 
+        self._queue = queue.SimpleQueue()
+        self._handle = None
+        self._writer = None
+        # Mensagens de console enfileiradas e ainda não renderizadas (wait_console)
+        self._console_queue = queue.SimpleQueue()
+        self._renderer = None
+        self._pending_console = 0
+        self._console_done = threading.Condition()
+        if buffered:
+            self._writer = threading.Thread(target=self._run, name="logger", daemon=True)
+            self._writer.start()
+            self._renderer = threading.Thread(target=self._render_loop, name="logger-console", daemon=True)
+            self._renderer.start()
+            atexit.register(self.close)
+
     def _ensure_log_dir(self):
         try:
             self.log_dir.mkdir(parents=True, exist_ok=True)
@@ -28,35 +72,174 @@ class Logger:
         hostname = os.environ.get('COMPUTERNAME', 'unknown')
         self.log_file = self.log_dir / f"provisioning_{hostname}_{timestamp}.log"
 
+    @property
+    def buffered(self) -> bool:
+        return self._writer is not None and self._writer.is_alive()
+
     def _write(self, level: str, message: str):
         timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         entry = f"[{timestamp}] [{level}] {message}\n"
 
+        if self.buffered:
+            self._queue.put(("line", entry))
+            return
         try:
             with open(self.log_file, 'a', encoding='utf-8') as f:
                 f.write(entry)
         except Exception:
             pass
 
+    @property
+    def _rendering(self) -> bool:
+        return self._renderer is not None and self._renderer.is_alive()
+
+    def _console(self, level: str, message: str):
+        if not self._rendering:
+            self._render(level, message)
+            return
+        with self._console_done:
+            self._pending_console += 1
+        self._console_queue.put((level, message))
+
+    def _render(self, level: str, message: str):
+        from utils import console
+        try:
+            getattr(console, _CONSOLE_HELPERS[level])(message)
+        except Exception:
+            pass
+
+    # --- Thread de gravação -------------------------------------------------
+
+    def _flush_file(self, lines: list):
+        if not lines:
+            return
+        try:
+            if self._handle is None:
+                self._handle = open(self.log_file, 'a', encoding='utf-8')
+            self._handle.write("".join(lines))
+            self._handle.flush()
+        except Exception:
+            # Disco cheio/arquivo bloqueado: descarta o lote (como antes) e reabre na próxima vez
+            self._close_handle()
+
+    def _close_handle(self):
+        try:
+            if self._handle is not None:
+                self._handle.close()
+        except Exception:
+            pass
+        self._handle = None
+
+    def _run(self):
+        lines, size = [], 0
+        last_flush = time.monotonic()
+        while True:
+            wait = max(0.0, FLUSH_INTERVAL - (time.monotonic() - last_flush)) if lines else None
+            try:
+                kind, payload = self._queue.get(timeout=wait)
+            except queue.Empty:
+                kind, payload = None, None
+
+            if kind == "line":
+                lines.append(payload)
+                size += len(payload)
+
+            if kind in ("flush", "stop") or size >= FLUSH_BYTES or (
+                    lines and time.monotonic() - last_flush >= FLUSH_INTERVAL):
+                self._flush_file(lines)
+                lines, size = [], 0
+                last_flush = time.monotonic()
+            if kind in ("flush", "stop"):
+                if kind == "stop":
+                    self._close_handle()
+                payload.set()
+                if kind == "stop":
+                    return
+
+    def _render_loop(self):
+        while True:
+            item = self._console_queue.get()
+            if item is None:
+                return
+            self._render(*item)
+            with self._console_done:
+                self._pending_console -= 1
+                self._console_done.notify_all()
+
+    # --- Controle -----------------------------------------------------------
+
+    def _request(self, kind: str) -> bool:
+        if not self.buffered or threading.current_thread() is self._writer:
+            return False
+        done = threading.Event()
+        self._queue.put((kind, done))
+        return done.wait(FLUSH_TIMEOUT)
+
+    def flush(self) -> bool:
+        """Espera tudo que já foi registrado chegar ao arquivo e ao console."""
+        self.wait_console()
+        return self._request("flush")
+
+    def wait_console(self):
+        """Espera as mensagens de console pendentes (mantém a ordem com prints diretos)."""
+        if not self._rendering or threading.current_thread() is self._renderer:
+            return
+        with self._console_done:
+            self._console_done.wait_for(lambda: self._pending_console <= 0, FLUSH_TIMEOUT)
+
+    def close(self):
+        """Grava o que falta e encerra as threads; depois disso gravação e console voltam a ser diretos."""
+        if self._rendering and threading.current_thread() is not self._renderer:
+            self._console_queue.put(None)
+            self._renderer.join(FLUSH_TIMEOUT)
+            # Mensagens enfileiradas enquanto a thread encerrava
+            while True:
+                try:
+                    item = self._console_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not None:
+                    self._render(*item)
+            with self._console_done:
+                self._pending_console = 0
+                self._console_done.notify_all()
+        if self._request("stop"):
+            self._writer.join(FLUSH_TIMEOUT)
+            # Registros enfileirados enquanto a thread encerrava
+            while True:
+                try:
+                    kind, payload = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if kind == "line":
+                    self._flush_file([payload])
+            self._close_handle()
+
+    # --- Níveis -------------------------------------------------------------
+
     def info(self, message: str):
-        from utils.console import print_info
         self._write("INFO", message)
-        print_info(message)
+        self._console("INFO", message)
 
     def success(self, message: str):
-        from utils.console import print_success
         self._write("SUCCESS", message)
-        print_success(message)
+        self._console("SUCCESS", message)
 
     def warning(self, message: str):
-        from utils.console import print_warning
         self._write("WARNING", message)
-        print_warning(message)
+        self._console("WARNING", message)
 
     def error(self, message: str):
-        from utils.console import print_error
         self._write("ERROR", message)
-        print_error(message)
+        self._console("ERROR", message)
+
+    def output(self, message: str):
+        """Saída bruta de processos externos: só no arquivo, nunca no console."""
+        self._write("OUTPUT", message)
+
+    def metrics(self, name: str, data: dict):
+        """Bloco legível por máquina (uma linha JSON): só no arquivo, nunca no console."""
+        self._write("METRICS", f"{name} {json.dumps(data, ensure_ascii=False, sort_keys=True)}")
 
     def get_log_path(self) -> str:
         return str(self.log_file)
@@ -71,3 +254,8 @@ def get_logger() -> Logger:
         _logger = Logger()
     return _logger
 
+
+def wait_console():
+    """Para utils.console: espera as mensagens do logger antes de imprimir direto (se houver logger)."""
+    if _logger is not None:
+        _logger.wait_console()
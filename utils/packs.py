@@ -0,0 +1,395 @@
+"""Pacotes compactados de pastas da rede: um arquivo sequencial no lugar de milhares de arquivos pequenos.
+
+O publicador (modules/folder_packs.py) grava em pack_dir, para cada pasta:
+    <nome>.manifest.json          versão atual (hash do conteúdo + assinaturas de stat da origem)
+    <nome>-<hash12>.tar.gz        arquivo compactado (ou .tar.xz / .zip)
+onde <nome> é a última pasta da origem mais um hash curto do caminho completo
+(pack_name), para que origens com o mesmo nome final não dividam o pacote.
+
+No cliente, fresh_pack confere só a assinatura rasa da origem (raiz e primeiro
+nível de pastas, SHALLOW_DEPTH) contra a do manifesto: poucas listagens na
+rede em vez da árvore inteira. Se não bater, a cópia volta a ser arquivo por
+arquivo. Arquivos alterados mais fundo (sem mudar as pastas acima) só são
+percebidos quando o publicador roda de novo. A extração grava em LOCAL_MARKER
+o índice (tamanho, mtime) dos arquivos; verify_extracted confere a pasta
+local contra ele antes de pular a extração.
+"""
+import datetime
+import hashlib
+import json
+import os
+import shutil
+import tarfile
+import time
+import zipfile
+from dataclasses import dataclass
+from typing import Callable, Iterator, Optional, Tuple
+
+from utils.filecopy import MTIME_TOLERANCE, SyncStats, file_hash
+
+MANIFEST_SUFFIX = ".manifest.json"
+# Marca gravada no destino após a extração: evita reextrair a mesma versão
+LOCAL_MARKER = ".provisioning-pack.json"
+FORMATS = {"tar.xz": "w:xz", "tar.gz": "w:gz", "zip": None}
+# Leitura sequencial do compartilhamento em blocos grandes
+READ_BUFFER = 4 * 1024 * 1024
+# Níveis de pasta listados pela assinatura rasa (0 = só a raiz)
+SHALLOW_DEPTH = 1
+
+
+class PackError(Exception):
+    """Pacote ausente, corrompido ou com conteúdo inseguro."""
+
+
+@dataclass
+class PackManifest:
+    name: str
+    archive: str
+    format: str
+    content_hash: str
+    signature: str
+    files: int
+    bytes: int
+    dirs: int
+    created: str = ""
+    # Assinatura rasa (shallow_signature); vazia em manifestos antigos
+    shallow: str = ""
+
+    @classmethod
+    def load(cls, path: str) -> "PackManifest":
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return cls(**{k: data[k] for k in cls.__dataclass_fields__ if k in data})
+        except (OSError, ValueError, TypeError, KeyError) as e:
+            raise PackError(f"Manifesto inválido ({path}): {e}")
+
+    def save(self, path: str):
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(self.__dict__, f, indent=2, ensure_ascii=False)
+        os.replace(path + ".tmp", path)
+
+
+def _legacy_pack_name(source: str) -> str:
+    """Nome usado pelas versões anteriores: só o último componente do caminho."""
+    return os.path.basename(source.rstrip("\\/")) or "pasta"
+
+
+def pack_name(source: str) -> str:
+    """Nome base do pacote: último componente da origem + hash curto do caminho completo.
+
+    O caminho é normalizado (barras e maiúsculas, como no Windows/UNC) antes do hash.
+    """
+    normalized = source.replace("/", "\\").rstrip("\\").lower()
+    return f"{_legacy_pack_name(source)}-{hashlib.sha1(normalized.encode('utf-8')).hexdigest()[:8]}"
+
+
+def manifest_path(pack_dir: str, source: str) -> str:
+    return os.path.join(pack_dir, pack_name(source) + MANIFEST_SUFFIX)
+
+
+def _walk(root: str) -> Iterator[Tuple[str, str, Optional[os.stat_result]]]:
+    """(caminho relativo com '/', caminho completo, stat ou None para diretório), em ordem estável."""
+    stack = [""]
+    while stack:
+        rel_dir = stack.pop()
+        with os.scandir(os.path.join(root, rel_dir) if rel_dir else root) as entries:
+            entries = sorted(entries, key=lambda e: e.name)
+        for entry in entries:
+            rel = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+            if entry.is_dir():
+                yield rel, entry.path, None
+                stack.append(rel)
+            else:
+                yield rel, entry.path, entry.stat()
+
+
+def stat_signature(root: str) -> str:
+    """Hash de (caminho, tamanho, mtime em segundos) de toda a árvore — só listagens, nenhum arquivo aberto."""
+    h = hashlib.sha256()
+    for rel, _, st in _walk(root):
+        if st is None:
+            h.update(f"D {rel}\n".encode("utf-8"))
+        else:
+            h.update(f"F {rel} {st.st_size} {int(st.st_mtime)}\n".encode("utf-8"))
+    return h.hexdigest()
+
+
+def shallow_signature(root: str, depth: int = SHALLOW_DEPTH) -> str:
+    """Hash de (caminho, tamanho, mtime) das entradas da raiz e de até depth níveis de pastas.
+
+    O mtime de uma pasta muda quando algo é criado, removido ou renomeado
+    nela, então arquivos novos ou apagados um nível abaixo também aparecem.
+    """
+    h = hashlib.sha256()
+    stack = [("", 0)]
+    while stack:
+        rel_dir, level = stack.pop()
+        with os.scandir(os.path.join(root, rel_dir) if rel_dir else root) as entries:
+            entries = sorted(entries, key=lambda e: e.name)
+        for entry in entries:
+            rel = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+            st = entry.stat()
+            kind = "D" if entry.is_dir() else "F"
+            h.update(f"{kind} {rel} {0 if kind == 'D' else st.st_size} {int(st.st_mtime)}\n".encode("utf-8"))
+            if kind == "D" and level < depth:
+                stack.append((rel, level + 1))
+    return h.hexdigest()
+
+
+def content_hash(root: str) -> str:
+    """Hash de (caminho, SHA-256 do conteúdo) de toda a árvore: muda só quando o conteúdo muda."""
+    h = hashlib.sha256()
+    for rel, path, st in _walk(root):
+        h.update((f"D {rel}\n" if st is None else f"F {rel} {file_hash(path)}\n").encode("utf-8"))
+    return h.hexdigest()
+
+
+def build_pack(source: str, pack_dir: str, fmt: str = "tar.gz") -> Tuple[PackManifest, bool]:
+    """Cria ou atualiza o pacote de source em pack_dir. Retorna (manifesto, reconstruído).
+
+    Incremental: se a assinatura de stat não mudou, nada é lido; se só as datas
+    mudaram (mesmo conteúdo), atualiza apenas o manifesto.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Formato de pacote inválido: {fmt}")
+    name = pack_name(source)
+    path = manifest_path(pack_dir, source)
+    previous = PackManifest.load(path) if os.path.exists(path) else None
+    archive_exists = previous is not None and os.path.exists(os.path.join(pack_dir, previous.archive))
+
+    signature = stat_signature(source)
+    shallow = shallow_signature(source)
+    if previous and archive_exists and previous.signature == signature and previous.format == fmt:
+        if previous.shallow != shallow:
+            previous.shallow = shallow
+            previous.save(path)
+        return previous, False
+
+    digest = content_hash(source)
+    if previous and archive_exists and previous.content_hash == digest and previous.format == fmt:
+        previous.signature = signature
+        previous.shallow = shallow
+        previous.save(path)
+        return previous, False
+
+    archive = f"{name}-{digest[:12]}.{fmt}"
+    target = os.path.join(pack_dir, archive)
+    files = size = dirs = 0
+    os.makedirs(pack_dir, exist_ok=True)
+    if fmt == "zip":
+        with zipfile.ZipFile(target + ".tmp", "w", zipfile.ZIP_DEFLATED, allowZip64=True) as z:
+            for rel, full, st in _walk(source):
+                z.write(full, rel + "/" if st is None else rel)
+                files, size, dirs = (files, size, dirs + 1) if st is None else (files + 1, size + st.st_size, dirs)
+    else:
+        with tarfile.open(target + ".tmp", FORMATS[fmt], format=tarfile.PAX_FORMAT, dereference=True) as tar:
+            for rel, full, st in _walk(source):
+                tar.add(full, arcname=rel, recursive=False)
+                files, size, dirs = (files, size, dirs + 1) if st is None else (files + 1, size + st.st_size, dirs)
+    os.replace(target + ".tmp", target)
+
+    manifest = PackManifest(name, archive, fmt, digest, signature, files, size, dirs,
+                            datetime.datetime.now().isoformat(timespec="seconds"), shallow)
+    manifest.save(path)
+
+    # Versão anterior só é removida depois que o manifesto novo já aponta para o arquivo novo
+    if previous and previous.archive != archive:
+        try:
+            os.remove(os.path.join(pack_dir, previous.archive))
+        except OSError:
+            pass
+    return manifest, True
+
+
+def fresh_pack(source: str, pack_dir: str) -> Tuple[Optional[PackManifest], str]:
+    """Manifesto publicado para source, ou (None, motivo) se não houver pacote atualizado.
+
+    A origem é conferida pela assinatura rasa (raiz + SHALLOW_DEPTH níveis); em
+    UNC, varrer a árvore inteira custava quase tanto quanto a própria cópia.
+    Manifestos antigos, sem assinatura rasa, usam a assinatura completa.
+    """
+    path = manifest_path(pack_dir, source)
+    if not os.path.exists(path):
+        # Pacote publicado antes do hash no nome: a assinatura abaixo confirma que é desta origem
+        path = os.path.join(pack_dir, _legacy_pack_name(source) + MANIFEST_SUFFIX)
+    if not os.path.exists(path):
+        return None, "nenhum pacote publicado"
+    try:
+        manifest = PackManifest.load(path)
+    except PackError as e:
+        return None, str(e)
+    if not os.path.exists(os.path.join(pack_dir, manifest.archive)):
+        return None, f"arquivo {manifest.archive} ausente"
+    try:
+        if manifest.shallow:
+            fresh = shallow_signature(source) == manifest.shallow
+        else:
+            fresh = stat_signature(source) == manifest.signature
+    except OSError as e:
+        return None, f"origem inacessível: {e}"
+    if not fresh:
+        return None, "pacote desatualizado em relação à origem"
+    return manifest, ""
+
+
+def verify_extracted(dst: str, manifest: PackManifest) -> Tuple[bool, str]:
+    """True se dst contém exatamente esta versão do pacote, conferindo tamanho e mtime de cada arquivo.
+
+    (False, "") quando dst não veio deste pacote; (False, motivo) quando veio
+    mas os arquivos locais foram alterados, removidos ou acrescentados.
+    Só lê a pasta local.
+    """
+    try:
+        with open(os.path.join(dst, LOCAL_MARKER), "r", encoding="utf-8") as f:
+            marker = json.load(f)
+    except (OSError, ValueError):
+        return False, ""
+    if marker.get("content_hash") != manifest.content_hash:
+        return False, ""
+    index = marker.get("files")
+    if not isinstance(index, dict):
+        return False, "marca de extração sem índice de arquivos"
+
+    seen = 0
+    try:
+        for rel, _, st in _walk(dst):
+            if st is None or rel == LOCAL_MARKER:
+                continue
+            expected = index.get(rel)
+            if expected is None:
+                return False, f"arquivo local a mais: {rel}"
+            size, mtime = expected
+            if st.st_size != size or abs(st.st_mtime - mtime) > MTIME_TOLERANCE:
+                return False, f"arquivo local alterado: {rel}"
+            seen += 1
+    except OSError as e:
+        return False, f"pasta local ilegível: {e}"
+    if seen != len(index):
+        return False, f"{len(index) - seen} arquivo(s) local(is) ausente(s)"
+    return True, ""
+
+
+def _safe_target(root: str, name: str) -> str:
+    """Caminho de extração dentro de root; rejeita caminhos absolutos e '..'."""
+    parts = name.replace("\\", "/").split("/")
+    if name.startswith(("/", "\\")) or ".." in parts or ":" in parts[0]:
+        raise PackError(f"Caminho inseguro no pacote: {name}")
+    return os.path.join(root, *[p for p in parts if p])
+
+
+class _ProgressReader:
+    """Arquivo somente leitura que informa os bytes lidos (download sequencial do pacote)."""
+
+    def __init__(self, f, on_read: Optional[Callable[[int], None]]):
+        self._f = f
+        self._on_read = on_read
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._f.read(size)
+        if data and self._on_read:
+            self._on_read(len(data))
+        return data
+
+
+def _extract_tar_stream(archive: str, root: str, stats: SyncStats, index: dict, on_read):
+    # "r|*": leitura estritamente sequencial — extrai enquanto o arquivo ainda está sendo baixado
+    with open(archive, "rb", buffering=READ_BUFFER) as raw, \
+            tarfile.open(fileobj=_ProgressReader(raw, on_read), mode="r|*") as tar:
+        for member in tar:
+            target = _safe_target(root, member.name)
+            if member.isdir():
+                os.makedirs(target, exist_ok=True)
+                stats.dirs += 1
+                continue
+            if not member.isfile():
+                raise PackError(f"Tipo de entrada não suportado no pacote: {member.name}")
+            start = time.perf_counter()
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            source = tar.extractfile(member)
+            with open(target, "wb") as out:
+                shutil.copyfileobj(source, out, READ_BUFFER)
+            os.utime(target, (member.mtime, member.mtime))
+            index[member.name.replace("\\", "/").strip("/")] = [member.size, member.mtime]
+            stats.files_copied += 1
+            stats.bytes_copied += member.size
+            stats.record_latency(member.name, member.size, time.perf_counter() - start)
+
+
+def _extract_zip(archive: str, root: str, stats: SyncStats, index: dict, on_read):
+    # Zip tem o índice no fim: copia sequencialmente para o disco local e extrai de lá
+    local = os.path.join(root, ".pack.zip")
+    with open(archive, "rb", buffering=READ_BUFFER) as src, open(local, "wb") as out:
+        shutil.copyfileobj(_ProgressReader(src, on_read), out, READ_BUFFER)
+    try:
+        with zipfile.ZipFile(local) as z:
+            for info in z.infolist():
+                target = _safe_target(root, info.filename)
+                if info.is_dir():
+                    os.makedirs(target, exist_ok=True)
+                    stats.dirs += 1
+                    continue
+                start = time.perf_counter()
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                with z.open(info) as source, open(target, "wb") as out:
+                    shutil.copyfileobj(source, out, READ_BUFFER)
+                mtime = time.mktime(info.date_time + (0, 0, -1))
+                os.utime(target, (mtime, mtime))
+                index[info.filename.replace("\\", "/").strip("/")] = [info.file_size, mtime]
+                stats.files_copied += 1
+                stats.bytes_copied += info.file_size
+                stats.record_latency(info.filename, info.file_size, time.perf_counter() - start)
+    finally:
+        os.remove(local)
+
+
+def extract_pack(manifest: PackManifest, pack_dir: str, dst: str,
+                 on_read: Optional[Callable[[int], None]] = None) -> SyncStats:
+    """Extrai o pacote em uma pasta temporária ao lado de dst e troca as pastas ao final.
+
+    on_read(n): bytes do pacote lidos do compartilhamento (para a barra de progresso).
+    Falha no meio não deixa dst pela metade: a pasta anterior só sai após a extração completa.
+    """
+    started = time.perf_counter()
+    archive = os.path.join(pack_dir, manifest.archive)
+    staging = dst.rstrip("\\/") + ".pack-tmp"
+    if os.path.exists(staging):
+        shutil.rmtree(staging)
+    os.makedirs(staging)
+
+    stats = SyncStats()
+    # Índice local (caminho relativo → [tamanho, mtime]) conferido por verify_extracted
+    index = {}
+    try:
+        if manifest.format == "zip":
+            _extract_zip(archive, staging, stats, index, on_read)
+        else:
+            _extract_tar_stream(archive, staging, stats, index, on_read)
+        if stats.files_copied != manifest.files:
+            raise PackError(f"Pacote incompleto: {stats.files_copied} de {manifest.files} arquivos")
+        with open(os.path.join(staging, LOCAL_MARKER), "w", encoding="utf-8") as f:
+            json.dump({"content_hash": manifest.content_hash, "archive": manifest.archive, "files": index}, f)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    # os.replace não substitui pasta não vazia no Windows: tira a antiga do caminho primeiro
+    old = dst.rstrip("\\/") + ".pack-old"
+    try:
+        if os.path.exists(old):
+            shutil.rmtree(old)
+        if os.path.exists(dst):
+            os.rename(dst, old)
+        try:
+            os.rename(staging, dst)
+        except OSError:
+            # Troca falhou (ex: arquivo aberto no destino): a versão anterior volta ao lugar
+            if os.path.exists(old) and not os.path.exists(dst):
+                os.rename(old, dst)
+            raise
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    shutil.rmtree(old, ignore_errors=True)
+
+    stats.elapsed = time.perf_counter() - started
+    return stats
@@ -1,35 +1,451 @@
 """Wrapper para execução de comandos PowerShell."""
+import atexit
+import base64
 import subprocess
-from typing import Tuple
-
-
-def run_powershell(command: str, capture_output: bool = True) -> Tuple[int, str, str]:
-    """Executa um comando PowerShell e retorna (return_code, stdout, stderr)."""
-    full_command = [
-        "powershell.exe",
-        "-NoProfile",
-        "-ExecutionPolicy", "Bypass",
-        "-Command", command
-    ]
-    
+import threading
+import time
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from utils.executor import get_executor
+from utils.process import ProcessTree, Watchdog, TIMEOUT_RC, check_step, command_limits, tracked
+from utils.trace import span
+
+# Executável + flags comuns. Substituível (ex: host falso em benchmarks no Linux).
+POWERSHELL_ARGV = ["powershell.exe", "-NoProfile", "-ExecutionPolicy", "Bypass"]
+
+FRAME_MARKER = "<<<PS-FRAME>>>"
+
+# Tempo máximo (s) para um host novo anunciar que está pronto
+START_TIMEOUT = 30.0
+# Falhas seguidas ao iniciar hosts até o pool ser desligado (modo avulso pelo resto da execução)
+MAX_START_FAILURES = 3
+
+# Executa um comando (base64/UTF-8) e escreve uma única linha de resposta:
+# "<<<PS-FRAME>>> rc stdout_b64 stderr_b64 elapsed_ms".
+FRAMED_FUNCTION = r"""
+[Console]::OutputEncoding = [System.Text.Encoding]::UTF8
+$utf8 = [System.Text.Encoding]::UTF8
+function Invoke-Framed([string]$b64) {
+    $cmd = $utf8.GetString([Convert]::FromBase64String($b64))
+    $sw = [System.Diagnostics.Stopwatch]::StartNew()
+    $global:LASTEXITCODE = 0
+    $ok = $true
+    $out = New-Object System.Text.StringBuilder
+    $err = New-Object System.Text.StringBuilder
+    try {
+        & ([scriptblock]::Create($cmd)) *>&1 | ForEach-Object {
+            if ($_ -is [System.Management.Automation.ErrorRecord]) {
+                if ($_.FullyQualifiedErrorId -notlike 'NativeCommandError*') { $ok = $false }
+                [void]$err.AppendLine($_.ToString())
+            } elseif ($_ -is [string]) {
+                [void]$out.AppendLine($_)
+            } else {
+                [void]$out.Append(($_ | Out-String))
+            }
+        }
+    } catch {
+        $ok = $false
+        [void]$err.AppendLine($_.ToString())
+    }
+    $rc = if ($LASTEXITCODE) { $LASTEXITCODE } elseif (-not $ok) { 1 } else { 0 }
+    $o = [Convert]::ToBase64String($utf8.GetBytes($out.ToString()))
+    $e = [Convert]::ToBase64String($utf8.GetBytes($err.ToString()))
+    [Console]::Out.WriteLine("<<<PS-FRAME>>> $rc $o $e $($sw.ElapsedMilliseconds)")
+    [Console]::Out.Flush()
+}
+"""
+
+# Loop do host persistente: anuncia que está pronto com um frame vazio e
+# executa um comando por linha lida do stdin.
+HOST_SCRIPT = FRAMED_FUNCTION + r"""
+[Console]::Out.WriteLine("<<<PS-FRAME>>> 0")
+[Console]::Out.Flush()
+while ($true) {
+    $line = [Console]::In.ReadLine()
+    if ($null -eq $line) { break }
+    if ($line -eq '') { continue }
+    Invoke-Framed $line
+}
+"""
+
+
+@dataclass
+class CommandResult:
+    label: str
+    command: str
+    returncode: int
+    stdout: str
+    stderr: str
+    elapsed: float
+
+    @property
+    def ok(self) -> bool:
+        return self.returncode == 0
+
+
+class HostUnavailable(Exception):
+    """O host persistente não pôde receber o comando (nada foi executado)."""
+
+
+class HostStartFailed(HostUnavailable):
+    """O host não iniciou: powershell.exe ausente, encerrou ou não ficou pronto em START_TIMEOUT."""
+
+
+def _b64encode(text: str) -> str:
+    return base64.b64encode(text.encode("utf-8")).decode("ascii")
+
+
+def _b64decode(data: str) -> str:
+    return base64.b64decode(data).decode("utf-8", errors="replace")
+
+
+def _frame_fields(line: str) -> List[str]:
+    # Campos separados por um único espaço: base64 de saída vazia é um campo vazio
+    return line[len(FRAME_MARKER):].strip("\r\n").split(" ")[1:]
+
+
+def parse_frame(line: str) -> Optional[Tuple[int, str, str]]:
+    """Decodifica uma linha de resposta do host; None se não for um frame."""
+    if not line.startswith(FRAME_MARKER):
+        return None
+    parts = _frame_fields(line)
+    rc = int(parts[0])
+    out = _b64decode(parts[1]) if len(parts) > 1 else ""
+    err = _b64decode(parts[2]) if len(parts) > 2 else ""
+    return rc, out, err
+
+
+def _frame_elapsed(line: str) -> Optional[float]:
+    """Tempo de execução (s) informado no frame, se presente."""
+    parts = _frame_fields(line)
+    return int(parts[3]) / 1000 if len(parts) > 3 and parts[3] else None
+
+
+class PowerShellHost:
+    """Um processo powershell.exe de longa duração que executa comandos via stdin/stdout."""
+
+    def __init__(self, argv: List[str] = None):
+        self.argv = argv or POWERSHELL_ARGV + ["-NonInteractive", "-Command", HOST_SCRIPT]
+        self.process = None
+        self.tree = None
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def start(self):
+        with span("iniciar host PowerShell", "powershell"):
+            self._start()
+
+    def _start(self):
+        self.close()
+        try:
+            self.process = subprocess.Popen(
+                self.argv,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                text=True,
+                encoding="utf-8",
+                errors="replace",
+                bufsize=1,
+                start_new_session=True,
+            )
+        except OSError as e:
+            self.process = None
+            raise HostStartFailed(str(e))
+        self.tree = ProcessTree(self.process)
+
+        # Aguarda o frame de prontidão: garante que o loop subiu antes de enviar comandos.
+        # Um powershell.exe travado na inicialização é encerrado (EOF) após START_TIMEOUT.
+        watchdog = threading.Timer(START_TIMEOUT, self.tree.kill)
+        watchdog.daemon = True
+        watchdog.start()
+        try:
+            for line in self.process.stdout:
+                if parse_frame(line) is not None:
+                    return
+        finally:
+            watchdog.cancel()
+        self.close()
+        raise HostStartFailed("Host PowerShell encerrou ou não ficou pronto durante a inicialização")
+
+    def _send(self, command: str):
+        self.process.stdin.write(_b64encode(command) + "\n")
+        self.process.stdin.flush()
+
+    def execute(self, command: str, timeout: float = None, idle_timeout: float = None) -> Tuple[int, str, str]:
+        """Executa um comando no host. Reinicia o host se ele tiver morrido.
+
+        Se o comando estourar timeout (ou ficar idle_timeout sem CPU), o host e
+        seus filhos são encerrados e o retorno é TIMEOUT_RC.
+        """
+        if not self.alive:
+            self.start()
+
+        try:
+            self._send(command)
+        except OSError:
+            # Host morreu entre a verificação e a escrita: nada foi executado, reinicia e reenvia
+            self.start()
+            try:
+                self._send(command)
+            except OSError as e:
+                self.close()
+                raise HostUnavailable(str(e))
+
+        # Linhas fora do frame (escritas direto no console) também são saída do comando
+        stray = []
+        with tracked(self.tree), Watchdog(self.tree, timeout, idle_timeout, watch_output=False) as watchdog:
+            for line in self.process.stdout:
+                frame = parse_frame(line)
+                if frame is not None:
+                    rc, out, err = frame
+                    return rc, "".join(stray) + out, err
+                stray.append(line)
+
+            # EOF: o comando encerrou o host (ex: `exit 1`) — o código de saída é o dele
+            rc = self.process.wait()
+        self._discard()
+        if watchdog.reason:
+            return TIMEOUT_RC, "".join(stray), f"Processo encerrado: {watchdog.describe()}"
+        return rc, "".join(stray), ""
+
+    def _discard(self):
+        if self.tree is not None:
+            self.tree.close()
+        self.process = self.tree = None
+
+    def close(self):
+        if self.process is None:
+            return
+        try:
+            self.process.stdin.close()
+            self.process.wait(timeout=5)
+        except Exception:
+            self.tree.kill()
+            self.process.wait()
+        self._discard()
+
+
+class PowerShellPool:
+    """Pool de hosts PowerShell persistentes, seguro para uso entre threads."""
+
+    def __init__(self, size: int = 1, host_argv: List[str] = None):
+        self.size = max(1, size)
+        self.host_argv = host_argv
+        self._idle: List[PowerShellHost] = []
+        self._created = 0
+        self._cond = threading.Condition()
+        self._start_failures = 0
+        self.disabled = False
+
+    def _acquire(self) -> PowerShellHost:
+        with self._cond:
+            while not self._idle and self._created >= self.size:
+                self._cond.wait()
+            if self._idle:
+                return self._idle.pop()
+            self._created += 1
+        return PowerShellHost(self.host_argv)
+
+    def _release(self, host: PowerShellHost):
+        with self._cond:
+            self._idle.append(host)
+            self._cond.notify()
+
+    def _started(self, ok: bool):
+        """Conta falhas seguidas de inicialização; desliga o pool após MAX_START_FAILURES."""
+        with self._cond:
+            if ok:
+                self._start_failures = 0
+                return
+            self._start_failures += 1
+            if self._start_failures >= MAX_START_FAILURES:
+                # Host não sobe (ex: sem powershell.exe): modo avulso pelo resto da execução
+                self.disabled = True
+
+    def run(self, command: str, timeout: float = None, idle_timeout: float = None) -> Tuple[int, str, str]:
+        """Executa no host; HostUnavailable se nada foi executado (o chamador usa o modo avulso)."""
+        host = self._acquire()
+        try:
+            result = host.execute(command, timeout, idle_timeout)
+            self._started(True)
+            return result
+        except HostStartFailed:
+            self._started(False)
+            raise
+        finally:
+            self._release(host)
+
+    def run_many(self, commands: List[Tuple[str, str]], timeout: float = None,
+                 idle_timeout: float = None) -> List[CommandResult]:
+        """Executa vários comandos em sequência no mesmo host (timeout vale para cada um)."""
+        host = self._acquire()
+        results = []
+        try:
+            for label, command in commands:
+                start = time.time()
+                with span(label, "powershell", command=command) as trace_args:
+                    rc, out, err = host.execute(command, timeout, idle_timeout)
+                    trace_args["rc"] = rc
+                results.append(CommandResult(label, command, rc, out, err, time.time() - start))
+            self._started(True)
+            return results
+        except HostUnavailable as e:
+            if isinstance(e, HostStartFailed):
+                self._started(False)
+            if not results:
+                raise
+            # Host caiu no meio do lote: o restante segue em modo avulso
+            rest = commands[len(results):]
+            return results + _run_batch_oneshot(rest, timeout, idle_timeout)
+        finally:
+            self._release(host)
+
+    def close(self):
+        with self._cond:
+            hosts, self._idle = self._idle, []
+        for host in hosts:
+            host.close()
+
+
+_pool: Optional[PowerShellPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> Optional[PowerShellPool]:
+    """Pool global conforme CONFIG.powershell_pool_size (0 desativa)."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            from config import CONFIG
+            size = getattr(CONFIG, "powershell_pool_size", 0)
+            if size <= 0:
+                return None
+            _pool = PowerShellPool(size)
+            atexit.register(_pool.close)
+        return None if _pool.disabled else _pool
+
+
+def _run_oneshot(command: str, capture_output: bool = True, timeout: float = None,
+                 idle_timeout: float = None) -> Tuple[int, str, str]:
+    """Executa o comando em um powershell.exe novo."""
+    full_command = POWERSHELL_ARGV + ["-Command", command]
+    pipe = subprocess.PIPE if capture_output else None
+
     try:
-        if capture_output:
-            result = subprocess.run(
+        with span("spawn powershell.exe", "powershell"):
+            process = subprocess.Popen(
                 full_command,
-                capture_output=True,
+                stdout=pipe,
+                stderr=pipe,
                 text=True,
                 encoding='utf-8',
-                errors='replace'
+                errors='replace',
+                start_new_session=capture_output,
             )
-            return result.returncode, result.stdout, result.stderr
-        else:
-            result = subprocess.run(full_command)
-            return result.returncode, "", ""
     except FileNotFoundError:
         return -1, "", "PowerShell não encontrado."
     except Exception as e:
         return -1, "", str(e)
 
+    tree = ProcessTree(process)
+    try:
+        with tracked(tree), Watchdog(tree, timeout, idle_timeout, watch_output=False) as watchdog:
+            stdout, stderr = process.communicate()
+    finally:
+        tree.close()
+    if watchdog.reason:
+        return TIMEOUT_RC, stdout or "", f"Processo encerrado: {watchdog.describe()}"
+    return process.returncode, stdout or "", stderr or ""
+
+
+def run_powershell(command: str, capture_output: bool = True, timeout: float = None) -> Tuple[int, str, str]:
+    """Executa um comando PowerShell e retorna (return_code, stdout, stderr).
+
+    Com saída capturada, usa o host persistente do pool quando disponível;
+    sem captura (janelas interativas, credenciais) sempre abre um processo novo.
+    timeout (s): padrão CONFIG.command_timeout; ao estourar (ou, com saída
+    capturada, travar por CONFIG.hang_timeout) a árvore do processo é encerrada
+    e o código é TIMEOUT_RC. Sem captura não há detecção de travamento: o
+    processo pode estar esperando o técnico.
+    """
+    check_step()
+    timeout, idle_timeout = command_limits(timeout, interactive=not capture_output)
+    with span("powershell", "powershell", command=command) as trace_args:
+        result = _dispatch(command, capture_output, timeout, idle_timeout, trace_args)
+        trace_args["rc"] = result[0]
+    return result
+
+
+def _dispatch(command: str, capture_output: bool, timeout: float, idle_timeout: float,
+              trace_args: dict) -> Tuple[int, str, str]:
+    """Escolhe backend, host persistente ou processo avulso (anotado no span)."""
+    executor = get_executor()
+    if executor is not None:
+        trace_args["mode"] = executor.name
+        return executor.run_powershell(command, capture_output, timeout)
+    if capture_output:
+        pool = get_pool()
+        if pool is not None:
+            try:
+                trace_args["mode"] = "host"
+                return pool.run(command, timeout, idle_timeout)
+            except HostUnavailable:
+                pass
+
+    trace_args["mode"] = "avulso"
+    return _run_oneshot(command, capture_output, timeout, idle_timeout)
+
+
+def _run_batch_oneshot(commands: List[Tuple[str, str]], timeout: float = None,
+                       idle_timeout: float = None) -> List[CommandResult]:
+    """Executa o lote em um único powershell.exe novo, um frame por comando."""
+    script = FRAMED_FUNCTION + "\n".join(f"Invoke-Framed '{_b64encode(cmd)}'" for _, cmd in commands)
+    total = timeout * len(commands) if timeout else None
+    rc, out, err = _run_oneshot(script, True, total, idle_timeout)
+
+    frames = [line for line in out.splitlines() if line.startswith(FRAME_MARKER)]
+    results = []
+    for (label, command), line in zip(commands, frames):
+        frame_rc, frame_out, frame_err = parse_frame(line)
+        results.append(CommandResult(label, command, frame_rc, frame_out, frame_err, _frame_elapsed(line) or 0.0))
+
+    # O processo terminou antes do fim do lote (ex: `exit` em um comando ou PowerShell ausente)
+    for label, command in commands[len(results):]:
+        results.append(CommandResult(label, command, rc if rc != 0 else -1, "", err or "Não executado.", 0.0))
+    return results
+
+
+def run_powershell_batch(commands: List[Tuple[str, str]], timeout: float = None) -> List[CommandResult]:
+    """Executa uma lista de (rótulo, comando) em um único processo PowerShell.
+
+    Cada comando tem seu próprio resultado (código, saídas e tempo); a falha de
+    um não impede os seguintes. timeout vale para cada comando (ver run_powershell).
+    """
+    if not commands:
+        return []
+
+    check_step()
+    timeout, idle_timeout = command_limits(timeout)
+    with span("powershell (lote)", "powershell", commands=len(commands)) as trace_args:
+        executor = get_executor()
+        if executor is not None:
+            trace_args["mode"] = executor.name
+            return executor.run_powershell_batch(commands, timeout)
+        pool = get_pool()
+        if pool is not None:
+            try:
+                trace_args["mode"] = "host"
+                return pool.run_many(commands, timeout, idle_timeout)
+            except HostUnavailable:
+                pass
+
+        trace_args["mode"] = "avulso"
+        return _run_batch_oneshot(commands, timeout, idle_timeout)
+
 
 def run_powershell_script(script_path: str) -> Tuple[int, str, str]:
     """Executa um arquivo de script PowerShell (.ps1)."""
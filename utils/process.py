@@ -0,0 +1,572 @@
+"""Execução de processos com leitura da saída linha a linha (log em tempo real, memória limitada)."""
+import collections
+import ctypes
+import locale
+import os
+import re
+import signal
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from utils.executor import get_executor
+from utils.logger import get_logger
+from utils.trace import span
+
+# Linhas mantidas em memória para diagnóstico quando o processo falha
+TAIL_LINES = 200
+
+# (descrição, percentual 0-100); qualquer um dos dois pode ser None
+ProgressUpdate = Tuple[Optional[str], Optional[float]]
+LineParser = Callable[[str], Optional[ProgressUpdate]]
+
+_CHOCO_PACKAGE_PROGRESS = re.compile(r"^Progress:\s+Downloading\s+(\S+)\s+\S+\s+(\d{1,3})%")
+_CHOCO_PROGRESS = re.compile(r"^Progress:\s+(\d{1,3})%")
+_CHOCO_DOWNLOADING = re.compile(r"^Downloading\s+(?!package\b)(\S+)")
+_CHOCO_INSTALLING = re.compile(r"^Installing\s+(\S+?)\.\.\.$")
+
+
+# Código de retorno usado quando o processo foi encerrado por tempo esgotado
+TIMEOUT_RC = -2
+
+
+def _decode(data: bytes) -> str:
+    """Saída binária de processo na codificação do console (caracteres inválidos substituídos)."""
+    return data.decode(locale.getpreferredencoding(False), errors="replace") if data else ""
+
+
+class _JobAccounting(ctypes.Structure):
+    # JOBOBJECT_BASIC_ACCOUNTING_INFORMATION (tempos em unidades de 100 ns)
+    _fields_ = [
+        ("TotalUserTime", ctypes.c_int64),
+        ("TotalKernelTime", ctypes.c_int64),
+        ("ThisPeriodTotalUserTime", ctypes.c_int64),
+        ("ThisPeriodTotalKernelTime", ctypes.c_int64),
+        ("TotalPageFaultCount", ctypes.c_uint32),
+        ("TotalProcesses", ctypes.c_uint32),
+        ("ActiveProcesses", ctypes.c_uint32),
+        ("TotalTerminatedProcesses", ctypes.c_uint32),
+    ]
+
+
+PROCESS_TERMINATE = 0x0001
+PROCESS_SET_QUOTA = 0x0100
+
+
+class _WindowsJob:
+    """Job Object: os filhos do processo entram no job, o que permite medir a CPU da árvore.
+
+    process: Popen ou qualquer objeto com pid (o processo é aberto pelo PID).
+    """
+
+    def __init__(self, process: subprocess.Popen):
+        from ctypes import wintypes
+        self._k32 = ctypes.WinDLL("kernel32", use_last_error=True)
+        self._k32.CreateJobObjectW.restype = wintypes.HANDLE
+        self._k32.AssignProcessToJobObject.argtypes = [wintypes.HANDLE, wintypes.HANDLE]
+        self._k32.QueryInformationJobObject.argtypes = [
+            wintypes.HANDLE, ctypes.c_int, ctypes.c_void_p, wintypes.DWORD, ctypes.c_void_p]
+        self._k32.TerminateJobObject.argtypes = [wintypes.HANDLE, wintypes.UINT]
+        self._k32.CloseHandle.argtypes = [wintypes.HANDLE]
+
+        self.handle = self._k32.CreateJobObjectW(None, None)
+        if not self.handle:
+            raise OSError(ctypes.get_last_error(), "CreateJobObjectW")
+        process_handle = getattr(process, "_handle", None)
+        opened = None
+        if process_handle is None:
+            self._k32.OpenProcess.restype = wintypes.HANDLE
+            self._k32.OpenProcess.argtypes = [wintypes.DWORD, wintypes.BOOL, wintypes.DWORD]
+            opened = process_handle = self._k32.OpenProcess(PROCESS_SET_QUOTA | PROCESS_TERMINATE, False,
+                                                            process.pid)
+            if not opened:
+                self.close()
+                raise OSError(ctypes.get_last_error(), "OpenProcess")
+        try:
+            if not self._k32.AssignProcessToJobObject(self.handle, int(process_handle)):
+                self.close()
+                raise OSError(ctypes.get_last_error(), "AssignProcessToJobObject")
+        finally:
+            if opened:
+                self._k32.CloseHandle(opened)
+
+    def cpu_time(self) -> float:
+        info = _JobAccounting()
+        self._k32.QueryInformationJobObject(self.handle, 1, ctypes.byref(info), ctypes.sizeof(info), None)
+        return (info.TotalUserTime + info.TotalKernelTime) / 1e7
+
+    def terminate(self):
+        self._k32.TerminateJobObject(self.handle, 1)
+
+    def close(self):
+        if self.handle:
+            self._k32.CloseHandle(self.handle)
+            self.handle = None
+
+
+def _proc_tree_cpu(root_pid: int) -> Optional[float]:
+    """CPU (s) do processo e descendentes lida de /proc; None fora do Linux."""
+    try:
+        pids = [int(p) for p in os.listdir("/proc") if p.isdigit()]
+    except OSError:
+        return None
+
+    stats = {}
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/stat", "rb") as f:
+                data = f.read().decode("ascii", errors="replace")
+        except OSError:
+            continue
+        # O nome do processo (campo 2) pode conter espaços: o resto começa após o último ')'
+        fields = data[data.rfind(")") + 2:].split()
+        stats[pid] = (int(fields[1]), int(fields[11]) + int(fields[12]))
+
+    children = collections.defaultdict(list)
+    for pid, (ppid, _) in stats.items():
+        children[ppid].append(pid)
+
+    total, stack = 0, [root_pid]
+    while stack:
+        pid = stack.pop()
+        if pid in stats:
+            total += stats[pid][1]
+            stack.extend(children[pid])
+    return total / os.sysconf("SC_CLK_TCK")
+
+
+def kill_tree(pid: int):
+    """Encerra o processo pid e todos os descendentes (taskkill /T no Windows, grupo no POSIX)."""
+    if os.name == "nt":
+        subprocess.run(["taskkill", "/T", "/F", "/PID", str(pid)],
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        return
+    try:
+        # Processos iniciados com start_new_session=True lideram o próprio grupo
+        if os.getpgid(pid) == pid:
+            os.killpg(pid, signal.SIGKILL)
+        else:
+            os.kill(pid, signal.SIGKILL)
+    except OSError:
+        pass
+
+
+class ProcessTree:
+    """Um processo filho e seus descendentes: medição de CPU e encerramento da árvore inteira."""
+
+    def __init__(self, process: subprocess.Popen):
+        self.process = process
+        self.job = None
+        if os.name == "nt":
+            try:
+                self.job = _WindowsJob(process)
+            except OSError:
+                self.job = None
+
+    def cpu_time(self) -> Optional[float]:
+        if self.job is not None:
+            return self.job.cpu_time()
+        if os.name == "nt":
+            return None
+        return _proc_tree_cpu(self.process.pid)
+
+    def kill(self):
+        """Encerra o processo e todos os descendentes."""
+        if self.job is not None:
+            self.job.terminate()
+        elif self.process.poll() is None:
+            kill_tree(self.process.pid)
+
+    def close(self):
+        if self.job is not None:
+            self.job.close()
+            self.job = None
+
+
+# Processos iniciados por cada etapa em execução (para o agendador encerrar ao estourar o tempo)
+_tracking = threading.local()
+_tracked: Dict[str, List[ProcessTree]] = {}
+_expired = set()
+_tracked_lock = threading.Lock()
+
+
+class StepExpired(Exception):
+    """A etapa corrente foi encerrada (tempo esgotado ou Ctrl+C): nenhum processo novo é iniciado por ela."""
+
+
+def current_step() -> Optional[str]:
+    return getattr(_tracking, "key", None)
+
+
+def check_step():
+    """Levanta StepExpired se a etapa desta thread já foi encerrada."""
+    key = current_step()
+    if key is not None:
+        with _tracked_lock:
+            expired = key in _expired
+        if expired:
+            raise StepExpired(f"Etapa '{key}' foi encerrada — comando não iniciado")
+
+
+@contextmanager
+def track_processes(key: str):
+    """Associa à etapa key os processos iniciados nesta thread."""
+    _tracking.key = key
+    try:
+        yield
+    finally:
+        _tracking.key = None
+        with _tracked_lock:
+            _tracked.pop(key, None)
+
+
+@contextmanager
+def step_thread(key: Optional[str]):
+    """Associa uma thread auxiliar à etapa key (check_step/tracked valem para ela).
+
+    Diferente de track_processes, não encerra o rastreio da etapa ao sair.
+    """
+    previous = current_step()
+    _tracking.key = key
+    try:
+        yield
+    finally:
+        _tracking.key = previous
+
+
+@contextmanager
+def tracked(tree: ProcessTree):
+    """Registra a árvore na etapa corrente enquanto o bloco executa.
+
+    Se a etapa já expirou (processo iniciado durante o encerramento), a árvore
+    é encerrada na hora e StepExpired é levantada.
+    """
+    key = current_step()
+    if key is None:
+        yield
+        return
+    with _tracked_lock:
+        expired = key in _expired
+        if not expired:
+            _tracked.setdefault(key, []).append(tree)
+    if expired:
+        tree.kill()
+        raise StepExpired(f"Etapa '{key}' foi encerrada — processo encerrado ao iniciar")
+    try:
+        yield
+    finally:
+        with _tracked_lock:
+            if tree in _tracked.get(key, []):
+                _tracked[key].remove(tree)
+
+
+def expire_step(key: str) -> int:
+    """Marca a etapa como expirada e encerra as árvores de processos dela. Retorna quantas.
+
+    A marca vale até consume_expired() (chamado quando a função da etapa retorna):
+    enquanto isso, qualquer processo que a etapa tente iniciar levanta StepExpired.
+    """
+    with _tracked_lock:
+        _expired.add(key)
+        trees = list(_tracked.get(key, []))
+    for tree in trees:
+        tree.kill()
+    return len(trees)
+
+
+def consume_expired(key: str) -> bool:
+    """True (uma única vez) se a etapa teve algum processo encerrado por tempo; remove a marca."""
+    with _tracked_lock:
+        if key in _expired:
+            _expired.discard(key)
+            return True
+        return False
+
+
+class Watchdog:
+    """Encerra a árvore se passar de timeout, ou se ficar idle_timeout sem saída e sem CPU.
+
+    touch() registra atividade (ex: uma linha de saída). Após disparar, reason é
+    "timeout" ou "hang" e a etapa corrente fica expirada (não inicia outros
+    processos). watch_output=False: a saída não é observada (ex: host
+    PowerShell, que só responde no fim) e o travamento é julgado só pela CPU.
+    """
+
+    def __init__(self, tree: ProcessTree, timeout: float = None, idle_timeout: float = None,
+                 watch_output: bool = True):
+        self.tree = tree
+        self.watch_output = watch_output
+        self.timeout = timeout or None
+        self.idle_timeout = idle_timeout or None
+        self.reason = ""
+        self.step = current_step()
+        self._start = self._last_activity = time.time()
+        self._last_cpu = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def touch(self):
+        self._last_activity = time.time()
+
+    def __enter__(self):
+        if self.timeout or self.idle_timeout:
+            self._thread = threading.Thread(target=self._run, name="watchdog", daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        limits = [t for t in (self.timeout, self.idle_timeout) if t]
+        poll = max(0.05, min(5.0, min(limits) / 4))
+        while not self._stop.wait(poll):
+            now = time.time()
+            if self.timeout and now - self._start > self.timeout:
+                self._fire("timeout")
+                return
+            if self.idle_timeout:
+                cpu = self.tree.cpu_time()
+                if cpu is None and not self.watch_output:
+                    continue
+                if cpu is not None and cpu != self._last_cpu:
+                    self._last_cpu = cpu
+                    self._last_activity = now
+                elif now - self._last_activity > self.idle_timeout:
+                    self._fire("hang")
+                    return
+
+    def _fire(self, reason: str):
+        self.reason = reason
+        if self.step is not None:
+            with _tracked_lock:
+                _expired.add(self.step)
+        self.tree.kill()
+
+    def describe(self) -> str:
+        if self.reason == "timeout":
+            return f"tempo limite de {self.timeout:g}s excedido"
+        if self.reason == "hang":
+            return f"sem saída e sem uso de CPU por {self.idle_timeout:g}s"
+        return ""
+
+
+def command_limits(timeout: float = None, interactive: bool = False) -> Tuple[Optional[float], Optional[float]]:
+    """(timeout, idle_timeout) de um comando: o informado ou CONFIG.command_timeout / hang_timeout.
+
+    interactive: o processo espera o usuário (janela de credenciais, assistente
+    de instalação) — parado sem CPU é normal, então não há idle_timeout.
+    """
+    from config import CONFIG
+    if timeout is None:
+        timeout = getattr(CONFIG, "command_timeout", 0)
+    if interactive:
+        return timeout or None, None
+    return timeout or None, getattr(CONFIG, "hang_timeout", 0) or None
+
+
+@dataclass
+class StreamResult:
+    returncode: int
+    tail: List[str]
+    kept: List[str]
+    line_count: int
+    elapsed: float
+    timed_out: str = ""
+
+    @property
+    def output(self) -> str:
+        """Linhas retidas por keep + cauda final, para os parsers de resultado."""
+        return "\n".join(self.kept + self.tail)
+
+
+def choco_progress(line: str) -> Optional[ProgressUpdate]:
+    """Interpreta as linhas de andamento do choco (download/instalação/percentual).
+
+    "Progress: Downloading pacote 1.0... N%" repete a mesma descrição a cada
+    percentual; LineSink só grava no log a primeira de cada pacote.
+    """
+    match = _CHOCO_PACKAGE_PROGRESS.match(line)
+    if match:
+        return f"Baixando {match.group(1)}", float(match.group(2))
+    match = _CHOCO_PROGRESS.match(line)
+    if match:
+        return None, float(match.group(1))
+    match = _CHOCO_DOWNLOADING.match(line)
+    if match:
+        return f"Baixando {match.group(1)}", 0.0
+    match = _CHOCO_INSTALLING.match(line)
+    if match:
+        return f"Instalando {match.group(1)}", None
+    return None
+
+
+def program_name(argv: List[str]) -> str:
+    """Nome curto do executável (rótulo de spans e logs)."""
+    return os.path.basename(argv[0].replace("\\", "/")) if argv else "?"
+
+
+def last_line(line: str) -> Optional[ProgressUpdate]:
+    """Parser genérico: a linha mais recente vira a descrição."""
+    text = line.strip()
+    return (text[:60], None) if text else None
+
+
+class LineSink:
+    """Destino das linhas de um processo: log em tempo real, cauda limitada e parsers de progresso.
+
+    Linhas de progresso não vão para o log quando só trazem percentual, nem
+    quando repetem a descrição da última linha de progresso gravada (ticks de
+    download); linhas não reconhecidas ou só com descrição sempre são gravadas.
+    """
+
+    def __init__(self, parsers: Iterable[LineParser] = (), on_progress=None,
+                 keep: Callable[[str], bool] = None, tail_lines: int = TAIL_LINES, log_label: str = ""):
+        self.logger = get_logger()
+        self.parsers = list(parsers)
+        self.on_progress = on_progress
+        self.keep = keep
+        self.log_label = log_label
+        self.tail = collections.deque(maxlen=tail_lines)
+        self.kept = []
+        self.count = 0
+        self.start = time.time()
+        # Descrição da última linha com percentual gravada no log
+        self._logged_progress = None
+
+    def feed(self, raw: str):
+        line = raw.rstrip("\r\n")
+        if not line.strip():
+            return
+        self.count += 1
+        self.tail.append(line)
+        if self.keep and self.keep(line):
+            self.kept.append(line)
+
+        update = None
+        for parser in self.parsers:
+            update = parser(line)
+            if update:
+                break
+
+        if self._should_log(update):
+            self.logger.output(f"{self.log_label}: {line}" if self.log_label else line)
+        if update and self.on_progress:
+            self.on_progress(*update)
+
+    def _should_log(self, update: Optional[ProgressUpdate]) -> bool:
+        if update is None:
+            return True
+        description, percent = update
+        if description is None:
+            return False
+        if percent is None:
+            return True
+        if description == self._logged_progress:
+            return False
+        self._logged_progress = description
+        return True
+
+    def result(self, returncode: int, program: str, reason: str = "", description: str = "") -> StreamResult:
+        """reason/description: motivo do encerramento forçado (Watchdog.reason / describe())."""
+        elapsed = time.time() - self.start
+        if reason:
+            self.logger.warning(f"{self.log_label or program}: processo encerrado — {description}")
+            return StreamResult(TIMEOUT_RC, list(self.tail), self.kept, self.count, elapsed, reason)
+        return StreamResult(returncode, list(self.tail), self.kept, self.count, elapsed)
+
+
+def stream_process(argv: List[str], parsers: Iterable[LineParser] = (),
+                   on_progress: Callable[[Optional[str], Optional[float]], None] = None,
+                   keep: Callable[[str], bool] = None, tail_lines: int = TAIL_LINES,
+                   log_label: str = "", cwd: str = None, timeout: float = None,
+                   idle_timeout: float = None) -> StreamResult:
+    """Executa argv lendo stdout+stderr linha a linha.
+
+    Cada linha vai para o arquivo de log assim que chega (linhas só de percentual
+    e ticks repetidos de progresso são omitidos, ver LineSink); só as últimas tail_lines ficam em memória, além das que
+    keep(linha) marcar. O primeiro parser que reconhecer a linha chama
+    on_progress(descrição, percentual).
+
+    timeout / idle_timeout (s): encerra a árvore do processo ao exceder o tempo
+    total ou ao ficar sem saída e sem CPU; o resultado traz timed_out e
+    returncode TIMEOUT_RC. Numa etapa já expirada levanta StepExpired sem iniciar nada.
+    """
+    check_step()
+    sink = LineSink(parsers, on_progress, keep, tail_lines, log_label)
+    with span(program_name(argv), "processo", argv=" ".join(argv)) as trace_args:
+        executor = get_executor()
+        if executor is not None:
+            result = executor.stream_process(argv, sink, timeout)
+        else:
+            with span("spawn", "processo"):
+                process = subprocess.Popen(
+                    argv,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.STDOUT,
+                    stdin=subprocess.DEVNULL,
+                    text=True,
+                    errors="replace",
+                    bufsize=1,
+                    cwd=cwd,
+                    start_new_session=True,
+                )
+            tree = ProcessTree(process)
+            with process, tracked(tree), Watchdog(tree, timeout, idle_timeout) as watchdog:
+                for raw in process.stdout:
+                    watchdog.touch()
+                    sink.feed(raw)
+                process.wait()
+            tree.close()
+            result = sink.result(process.returncode, argv[0], watchdog.reason, watchdog.describe())
+        trace_args.update(rc=result.returncode, lines=sink.count)
+    return result
+
+
+def run_process(argv: List[str], input_data: bytes = None, timeout: float = None) -> Tuple[int, str, str]:
+    """Executa argv até o fim (stdin opcional): retorna (código, stdout, stderr).
+
+    Ao exceder timeout (s) a árvore do processo é encerrada e o código é TIMEOUT_RC.
+    Numa etapa já expirada levanta StepExpired sem iniciar nada.
+    """
+    check_step()
+    with span(program_name(argv), "processo") as trace_args:
+        result = _run_process(argv, input_data, timeout)
+        trace_args["rc"] = result[0]
+    return result
+
+
+def _run_process(argv: List[str], input_data: bytes, timeout: float) -> Tuple[int, str, str]:
+    executor = get_executor()
+    if executor is not None:
+        return executor.run_process(argv, input_data, timeout)
+
+    with span("spawn", "processo"):
+        process = subprocess.Popen(argv, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    tree = ProcessTree(process)
+    try:
+        with tracked(tree):
+            try:
+                stdout, stderr = process.communicate(input=input_data, timeout=timeout)
+            except subprocess.TimeoutExpired:
+                tree.kill()
+                stdout, stderr = process.communicate()
+                return TIMEOUT_RC, _decode(stdout), f"Processo encerrado: tempo limite de {timeout:g}s excedido"
+    finally:
+        tree.close()
+    return process.returncode, _decode(stdout), _decode(stderr)
+
+
+def spawn(argv: List[str], **popen_kwargs):
+    """Inicia um processo independente, sem esperar (ex: interface gráfica)."""
+    check_step()
+    with span(f"spawn {program_name(argv)}", "processo"):
+        executor = get_executor()
+        if executor is not None:
+            return executor.spawn(argv)
+        return subprocess.Popen(argv, **popen_kwargs)
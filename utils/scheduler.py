@@ -0,0 +1,228 @@
+"""Agendador de etapas com dependências e execução paralela."""
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from utils.events import step_context
+from utils.process import consume_expired, expire_step, track_processes
+from utils.trace import span
+
+# Após encerrar os processos de uma etapa expirada, quanto esperar a função retornar
+KILL_GRACE = 30.0
+# Espera máxima (s) por etapa a cada volta: no Windows a espera sem limite não é interrompida por Ctrl+C
+POLL_INTERVAL = 1.0
+
+
+@dataclass
+class Step:
+    """Etapa agendável.
+
+    depends_on: chaves que precisam terminar antes desta etapa começar.
+    resources: recursos exclusivos (ex: "msi") — etapas que compartilham um
+    recurso nunca rodam ao mesmo tempo.
+    timeout: segundos até a etapa ser encerrada (processos filhos incluídos); None = sem limite.
+    """
+    key: str
+    label: str
+    func: Callable[[], Any]
+    detail: str = ""
+    depends_on: List[str] = field(default_factory=list)
+    resources: List[str] = field(default_factory=list)
+    timeout: Optional[float] = None
+
+
+@dataclass
+class StepResult:
+    key: str
+    label: str
+    status: Optional[bool]
+    detail: str = ""
+    elapsed: float = 0.0
+    timed_out: bool = False
+    # Classe da exceção que encerrou a etapa ("Timeout" se expirou)
+    error_class: str = ""
+
+
+def _validate(steps: List[Step]) -> Dict[str, List[str]]:
+    """Retorna as dependências efetivas de cada etapa e rejeita ciclos."""
+    keys = {s.key for s in steps}
+    if len(keys) != len(steps):
+        raise ValueError("Chaves de etapa duplicadas")
+
+    # Dependências de etapas puladas (fora da lista) são ignoradas
+    deps = {s.key: [d for d in s.depends_on if d in keys] for s in steps}
+
+    visiting, done = set(), set()
+
+    def _visit(key: str):
+        if key in done:
+            return
+        if key in visiting:
+            raise ValueError(f"Dependência circular envolvendo '{key}'")
+        visiting.add(key)
+        for dep in deps[key]:
+            _visit(dep)
+        visiting.discard(key)
+        done.add(key)
+
+    for s in steps:
+        _visit(s.key)
+    return deps
+
+
+def run_steps(steps: List[Step], max_workers: int = 1,
+              on_start: Callable[[Step], None] = None,
+              on_finish: Callable[[Step, StepResult], None] = None) -> List[StepResult]:
+    """Executa as etapas respeitando dependências e recursos exclusivos.
+
+    Até max_workers etapas rodam simultaneamente. Exceções viram status False.
+    Etapas que excedem step.timeout (ou cujo processo foi encerrado pelo watchdog)
+    terminam com timed_out=True; a partir daí a etapa não inicia novos processos
+    (StepExpired). Se a função não retornar em KILL_GRACE após o encerramento
+    dos processos, a etapa é abandonada e as demais seguem, mas os recursos
+    dela só são liberados quando a thread de fato retornar; etapas que ainda
+    dependem deles após mais KILL_GRACE sem nada em execução não são executadas.
+    Ctrl+C (ou outro erro no agendador) encerra as árvores de processos das
+    etapas em execução antes de propagar.
+    Retorna os resultados na mesma ordem da lista de entrada.
+    """
+    deps = _validate(steps)
+    max_workers = max(1, max_workers)
+
+    pending = list(steps)
+    finished: Dict[str, StepResult] = {}
+    running = {}
+    busy = set()
+    deadlines = {}
+    # Etapas abandonadas cuja thread ainda não retornou: seguram os recursos
+    abandoned = {}
+
+    def _execute(step: Step) -> StepResult:
+        start = time.time()
+        error = ""
+        with step_context(step.key), span(step.label, "etapa", key=step.key) as trace_args, \
+                track_processes(step.key):
+            try:
+                status, detail = step.func(), step.detail
+            except Exception as e:
+                from utils.logger import get_logger
+                get_logger().error(f"Erro em {step.label}: {e}")
+                status, detail, error = False, f"Erro: {e}", type(e).__name__
+            trace_args["status"] = status
+        if consume_expired(step.key):
+            return StepResult(step.key, step.label, False, "Tempo esgotado", time.time() - start, True, "Timeout")
+        return StepResult(step.key, step.label, status, detail, time.time() - start, error_class=error)
+
+    def _finish(step: Step, result: StepResult, release: bool = True):
+        if release:
+            busy.difference_update(step.resources)
+        finished[step.key] = result
+        if on_finish:
+            on_finish(step, result)
+
+    def _check_deadlines():
+        """Encerra etapas vencidas; abandona as que não retornaram após KILL_GRACE."""
+        from utils.logger import get_logger
+        now = time.time()
+        for future, step in list(running.items()):
+            deadline, started, killed = deadlines.get(future, (None, None, None))
+            if deadline is None or now < deadline:
+                continue
+            if killed is None:
+                get_logger().warning(f"{step.label}: tempo limite de {step.timeout:.0f}s excedido — encerrando.")
+                expire_step(step.key)
+                deadlines[future] = (deadline, started, now)
+            elif now - killed >= KILL_GRACE:
+                get_logger().error(f"{step.label}: não respondeu após o encerramento — etapa abandonada.")
+                running.pop(future)
+                deadlines.pop(future, None)
+                # A marca de expirada fica até a thread retornar (_execute): ela não inicia novos processos
+                abandoned[future] = step
+                _finish(step, StepResult(step.key, step.label, False, "Tempo esgotado", now - started, True,
+                                         "Timeout"), release=False)
+
+    def _reap_abandoned(done):
+        from utils.logger import get_logger
+        for future in done:
+            step = abandoned.pop(future, None)
+            if step is not None:
+                busy.difference_update(step.resources)
+                get_logger().info(f"{step.label}: etapa abandonada terminou — recursos liberados.")
+
+    def _skip_blocked():
+        """Etapas que esperam recursos presos por etapas abandonadas não são executadas."""
+        held = set()
+        for step in abandoned.values():
+            held.update(step.resources)
+        for step in list(pending):
+            if held.intersection(step.resources):
+                pending.remove(step)
+                _finish(step, StepResult(step.key, step.label, False,
+                                         "Não executada: recurso preso por etapa abandonada"), release=False)
+
+    def _next_wakeup() -> float:
+        times = [killed + KILL_GRACE if killed else deadline
+                 for future, (deadline, _, killed) in deadlines.items()
+                 if future in running and deadline is not None]
+        return min(POLL_INTERVAL, max(0.0, min(times) - time.time())) if times else POLL_INTERVAL
+
+    def _is_ready(step: Step) -> bool:
+        return (all(d in finished for d in deps[step.key])
+                and not busy.intersection(step.resources))
+
+    # Threads extras para etapas com timeout: uma etapa abandonada não ocupa a vaga das demais
+    spare = sum(1 for s in steps if s.timeout)
+    executor = ThreadPoolExecutor(max_workers=max_workers + spare, thread_name_prefix="etapa")
+    waiting_since = None
+    try:
+        while pending or running:
+            for step in list(pending):
+                if len(running) >= max_workers:
+                    break
+                if not _is_ready(step):
+                    continue
+                pending.remove(step)
+                busy.update(step.resources)
+                if on_start:
+                    on_start(step)
+                future = executor.submit(_execute, step)
+                running[future] = step
+                if step.timeout:
+                    now = time.time()
+                    deadlines[future] = (now + step.timeout, now, None)
+
+            if not running:
+                if not abandoned:
+                    # Nada rodando e nada pronto: só acontece com dependências inválidas
+                    raise RuntimeError("Nenhuma etapa pronta para executar")
+                # O que resta espera recursos de etapas abandonadas
+                if waiting_since is None:
+                    waiting_since = time.time()
+                done, _ = wait(list(abandoned), timeout=POLL_INTERVAL, return_when=FIRST_COMPLETED)
+                _reap_abandoned(done)
+                if done:
+                    waiting_since = None
+                elif time.time() - waiting_since >= KILL_GRACE:
+                    _skip_blocked()
+                    waiting_since = None
+                continue
+            waiting_since = None
+
+            done, _ = wait(list(running) + list(abandoned), timeout=_next_wakeup(), return_when=FIRST_COMPLETED)
+            _reap_abandoned(done)
+            for future in done:
+                if future in running:
+                    step = running.pop(future)
+                    deadlines.pop(future, None)
+                    _finish(step, future.result())
+            _check_deadlines()
+    except BaseException:
+        # Ctrl+C no menu: sem isto os instaladores seguiriam rodando nas threads das etapas
+        for step in list(running.values()) + list(abandoned.values()):
+            expire_step(step.key)
+        raise
+    finally:
+        executor.shutdown(wait=not running and not abandoned)
+
+    return [finished[s.key] for s in steps if s.key in finished]
@@ -0,0 +1,125 @@
+"""Gravação nativa de atalhos do Windows (.lnk, formato MS-SHLLINK) sem VBScript."""
+import ntpath
+import os
+import struct
+from dataclasses import dataclass
+from typing import List, Tuple
+
+# {00021401-0000-0000-C000-000000000046}
+LINK_CLSID = bytes.fromhex("0114020000000000c000000000000046")
+
+HAS_LINK_INFO = 0x02
+HAS_NAME = 0x04
+HAS_WORKING_DIR = 0x10
+HAS_ARGUMENTS = 0x20
+HAS_ICON_LOCATION = 0x40
+IS_UNICODE = 0x80
+
+FILE_ATTRIBUTE_NORMAL = 0x80
+SW_SHOWNORMAL = 1
+DRIVE_FIXED = 3
+
+
+@dataclass
+class ShortcutSpec:
+    path: str
+    target: str
+    arguments: str = ""
+    working_dir: str = ""
+    description: str = ""
+    icon_location: str = ""
+
+
+def _ansi(text: str) -> bytes:
+    return text.encode("cp1252", errors="replace") + b"\0"
+
+
+def _utf16(text: str) -> bytes:
+    return text.encode("utf-16-le") + b"\0\0"
+
+
+def _string_data(text: str) -> bytes:
+    """StringData: contagem de caracteres UTF-16 + texto sem terminador."""
+    encoded = text.encode("utf-16-le")
+    return struct.pack("<H", len(encoded) // 2) + encoded
+
+
+def _link_info(target: str) -> bytes:
+    """LinkInfo com VolumeID (disco fixo) e LocalBasePath em ANSI e Unicode."""
+    header_size = 0x24
+    volume_id = struct.pack("<IIII", 0x11, DRIVE_FIXED, 0, 0x10) + b"\0"
+    base_ansi = _ansi(target)
+    suffix_ansi = b"\0"
+    base_unicode = _utf16(target)
+    suffix_unicode = b"\0\0"
+
+    volume_offset = header_size
+    base_offset = volume_offset + len(volume_id)
+    suffix_offset = base_offset + len(base_ansi)
+    base_unicode_offset = suffix_offset + len(suffix_ansi)
+    suffix_unicode_offset = base_unicode_offset + len(base_unicode)
+    total = suffix_unicode_offset + len(suffix_unicode)
+
+    header = struct.pack(
+        "<IIIIIIIII",
+        total, header_size, 0x1,  # VolumeIDAndLocalBasePath
+        volume_offset, base_offset, 0, suffix_offset,
+        base_unicode_offset, suffix_unicode_offset,
+    )
+    return header + volume_id + base_ansi + suffix_ansi + base_unicode + suffix_unicode
+
+
+def build_shell_link(target: str, arguments: str = "", working_dir: str = "",
+                     description: str = "", icon_location: str = "", icon_index: int = 0) -> bytes:
+    """Conteúdo binário de um .lnk apontando para target (caminho local absoluto)."""
+    flags = HAS_LINK_INFO | IS_UNICODE
+    strings = b""
+    # Ordem fixa da especificação: NAME, RELATIVE_PATH, WORKING_DIR, ARGUMENTS, ICON_LOCATION
+    if description:
+        flags |= HAS_NAME
+        strings += _string_data(description)
+    if working_dir:
+        flags |= HAS_WORKING_DIR
+        strings += _string_data(working_dir)
+    if arguments:
+        flags |= HAS_ARGUMENTS
+        strings += _string_data(arguments)
+    if icon_location:
+        flags |= HAS_ICON_LOCATION
+        strings += _string_data(icon_location)
+
+    header = struct.pack(
+        "<I16sII8s8s8sIiIHHII",
+        0x4C, LINK_CLSID, flags, FILE_ATTRIBUTE_NORMAL,
+        b"\0" * 8, b"\0" * 8, b"\0" * 8,  # criação, acesso, escrita
+        0, icon_index, SW_SHOWNORMAL, 0, 0, 0, 0,
+    )
+    return header + _link_info(target) + strings + struct.pack("<I", 0)  # TerminalBlock
+
+
+def write_shell_link(spec: ShortcutSpec):
+    """Grava o atalho de forma atômica (arquivo temporário + replace)."""
+    data = build_shell_link(
+        spec.target,
+        arguments=spec.arguments,
+        working_dir=spec.working_dir or ntpath.dirname(spec.target),
+        description=spec.description,
+        icon_location=spec.icon_location,
+    )
+    os.makedirs(os.path.dirname(spec.path) or ".", exist_ok=True)
+    tmp = spec.path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, spec.path)
+
+
+def create_shortcuts(specs: List[ShortcutSpec]) -> List[Tuple[ShortcutSpec, bool, str]]:
+    """Cria vários atalhos em uma passada. Retorna (spec, sucesso, erro) para cada um."""
+    results = []
+    for spec in specs:
+        try:
+            write_shell_link(spec)
+            results.append((spec, True, ""))
+        except Exception as e:
+            results.append((spec, False, str(e)))
+    return results
@@ -0,0 +1,172 @@
+"""Cópia retomável em blocos de arquivos grandes, com verificação de checksum."""
+import json
+import os
+import shutil
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from utils.executor import get_executor
+from utils.filecopy import file_hash
+
+CHUNK_SIZE = 8 * 1024 * 1024
+# fsync + atualização do sidecar a cada N blocos: o sidecar nunca aponta além do que está no disco
+SYNC_EVERY = 8
+
+
+class ChecksumMismatch(Exception):
+    """O arquivo copiado não confere com o hash publicado ao lado da origem."""
+
+
+@dataclass
+class StageResult:
+    path: str
+    size: int
+    resumed_bytes: int
+    copied_bytes: int
+    elapsed: float
+    verified: bool
+
+    @property
+    def throughput(self) -> float:
+        """Bytes por segundo efetivamente transferidos nesta execução."""
+        return self.copied_bytes / self.elapsed if self.elapsed > 0 else 0.0
+
+    def summary(self) -> str:
+        mb = 1024 * 1024
+        text = f"{self.copied_bytes / mb:.1f} MB copiados a {self.throughput / mb:.1f} MB/s"
+        if self.resumed_bytes:
+            text += f", {self.resumed_bytes / mb:.1f} MB retomados"
+        if self.verified:
+            text += ", checksum OK"
+        return text
+
+
+def published_hash(src: str) -> Optional[str]:
+    """Lê o SHA-256 publicado em '<src>.sha256' (formato sha256sum ou só o hex)."""
+    try:
+        with open(src + ".sha256", "r", encoding="utf-8") as f:
+            content = f.read().split()
+    except OSError:
+        return None
+    return content[0].lower() if content else None
+
+
+def _sidecar_path(dst: str) -> str:
+    return dst + ".partial.json"
+
+
+def _load_sidecar(dst: str, src_stat: os.stat_result) -> int:
+    """Offset já confirmado no destino para esta versão da origem (0 se não houver)."""
+    try:
+        with open(_sidecar_path(dst), "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return 0
+
+    # Origem mudou desde a tentativa anterior: recomeça
+    if state.get("size") != src_stat.st_size or state.get("mtime") != int(src_stat.st_mtime):
+        return 0
+
+    # Faixas concluídas são contíguas a partir de 0 na cópia sequencial; retoma após a primeira
+    ranges = sorted(state.get("ranges", []))
+    offset = 0
+    for start, end in ranges:
+        if start > offset:
+            break
+        offset = max(offset, end)
+
+    try:
+        if os.path.getsize(dst) < offset:
+            return 0
+    except OSError:
+        return 0
+    return offset
+
+
+def _save_sidecar(dst: str, src: str, src_stat: os.stat_result, offset: int):
+    state = {
+        "source": src,
+        "size": src_stat.st_size,
+        "mtime": int(src_stat.st_mtime),
+        "ranges": [[0, offset]],
+    }
+    tmp = _sidecar_path(dst) + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp, _sidecar_path(dst))
+
+
+def stage_file(src: str, dst: str, chunk_size: int = CHUNK_SIZE, verify: bool = True,
+               on_progress: Optional[Callable[[int], None]] = None) -> StageResult:
+    """Copia src para dst em blocos, retomando de onde uma tentativa anterior parou.
+
+    As faixas concluídas ficam em '<dst>.partial.json'. Ao final, se houver
+    '<src>.sha256', o destino é conferido; divergência apaga a cópia e levanta
+    ChecksumMismatch.
+    Com um backend em utils.executor, a transferência é dele (executor.copy_file,
+    sem retomada); a conferência do checksum continua valendo.
+    on_progress(bytes): chamado a cada bloco gravado (inclusive o trecho retomado).
+    """
+    start = time.time()
+    src_stat = os.stat(src)
+    os.makedirs(os.path.dirname(dst) or ".", exist_ok=True)
+
+    executor = get_executor()
+    if executor is not None:
+        _discard_sidecar(dst)
+        executor.copy_file(src, dst)
+        if on_progress:
+            on_progress(src_stat.st_size)
+        verified = _verify(src, dst, verify)
+        return StageResult(dst, src_stat.st_size, 0, src_stat.st_size, time.time() - start, verified)
+
+    offset = _load_sidecar(dst, src_stat)
+    resumed = offset
+    if on_progress and resumed:
+        on_progress(resumed)
+
+    with open(src, "rb") as fin, open(dst, "r+b" if offset else "wb") as fout:
+        fin.seek(offset)
+        fout.seek(offset)
+        fout.truncate()
+        chunks = 0
+        while True:
+            chunk = fin.read(chunk_size)
+            if not chunk:
+                break
+            fout.write(chunk)
+            offset += len(chunk)
+            chunks += 1
+            if chunks % SYNC_EVERY == 0:
+                fout.flush()
+                os.fsync(fout.fileno())
+                _save_sidecar(dst, src, src_stat, offset)
+            if on_progress:
+                on_progress(len(chunk))
+        fout.flush()
+        os.fsync(fout.fileno())
+
+    verified = _verify(src, dst, verify)
+    _discard_sidecar(dst)
+    shutil.copystat(src, dst)
+    return StageResult(dst, src_stat.st_size, resumed, offset - resumed, time.time() - start, verified)
+
+
+def _verify(src: str, dst: str, verify: bool) -> bool:
+    """Confere dst com '<src>.sha256'. True se conferiu; divergência apaga a cópia e levanta ChecksumMismatch."""
+    expected = published_hash(src) if verify else None
+    if not expected:
+        return False
+    if file_hash(dst) != expected:
+        os.remove(dst)
+        _discard_sidecar(dst)
+        raise ChecksumMismatch(f"{os.path.basename(src)}: checksum não confere com {src}.sha256")
+    return True
+
+
+def _discard_sidecar(dst: str):
+    try:
+        os.remove(_sidecar_path(dst))
+    except OSError:
+        pass
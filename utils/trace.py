@@ -0,0 +1,149 @@
+"""Spans aninhados de cada execução, exportados no formato Chrome trace-event.
+
+O arquivo trace_<HOST>_<data>.json fica em CONFIG.log_dir ao lado do log da
+execução e abre em chrome://tracing ou https://ui.perfetto.dev. Cada thread
+vira uma linha do tempo; código assíncrono usa "lanes" (linhas virtuais),
+já que várias corrotinas dividem a mesma thread.
+
+A gravação é explícita (save() ao fim da instalação/diagnóstico e no atexit
+do main.py): benchmarks que usam as mesmas funções não geram arquivos.
+"""
+import contextvars
+import datetime
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+# Acima disto os eventos são descartados (e contados): memória limitada em execuções longas
+MAX_EVENTS = 200000
+# Argumentos de texto longos (ex: comandos PowerShell) são truncados
+MAX_ARG_CHARS = 300
+
+_lane: contextvars.ContextVar = contextvars.ContextVar("trace_lane", default=None)
+
+
+def _clip(value):
+    if isinstance(value, str) and len(value) > MAX_ARG_CHARS:
+        return value[:MAX_ARG_CHARS] + "…"
+    return value
+
+
+class Tracer:
+    """Coleta eventos "X" (completos) e os grava em JSON; seguro entre threads."""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.origin = time.perf_counter()
+        self.started_at = datetime.datetime.now()
+        self.dropped = 0
+        self._events = []
+        self._tids: Dict[object, int] = {}
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def now(self) -> float:
+        """Relógio dos spans (time.perf_counter)."""
+        return time.perf_counter()
+
+    def _tid(self, lane: Optional[str]) -> int:
+        """Id da linha do tempo: a lane, se houver, ou o nome da thread atual (metadado thread_name)."""
+        # Pelo nome: spans de uma thread podem ser gravados por outra (complete(lane=nome))
+        key = lane if lane is not None else threading.current_thread().name
+        tid = self._tids.get(key)
+        if tid is None:
+            tid = len(self._tids) + 1
+            self._tids[key] = tid
+            self._events.append({"ph": "M", "name": "thread_name", "pid": self._pid, "tid": tid,
+                                 "args": {"name": key}})
+        return tid
+
+    def complete(self, name: str, cat: str, start: float, end: float, lane: str = None, **args):
+        """Registra um span já medido (start/end de now())."""
+        if not self.enabled:
+            return
+        event = {"ph": "X", "name": name, "cat": cat or "geral", "pid": self._pid,
+                 "ts": round((start - self.origin) * 1e6, 1), "dur": round(max(0.0, end - start) * 1e6, 1)}
+        if args:
+            event["args"] = {k: _clip(v) for k, v in args.items()}
+        with self._lock:
+            if len(self._events) >= MAX_EVENTS:
+                self.dropped += 1
+                return
+            event["tid"] = self._tid(lane if lane is not None else _lane.get())
+            self._events.append(event)
+
+    @contextmanager
+    def span(self, name: str, cat: str = "", lane: str = None, **args):
+        """Mede o bloco; o dict retornado aceita argumentos extras (ex: código de saída).
+
+        lane: linha do tempo própria para o bloco e tudo que rodar dentro dele no
+        mesmo contexto (corrotinas concorrentes na mesma thread).
+        """
+        if not self.enabled:
+            yield args
+            return
+        token = _lane.set(lane) if lane is not None else None
+        start = time.perf_counter()
+        try:
+            yield args
+        except BaseException as e:
+            args.setdefault("error", type(e).__name__)
+            raise
+        finally:
+            end = time.perf_counter()
+            if token is not None:
+                _lane.reset(token)
+            self.complete(name, cat, start, end, lane, **args)
+
+    def path(self) -> str:
+        """trace_<HOST>_<data>.json na pasta efetiva do log (mesmo sufixo do arquivo de log)."""
+        from utils.logger import get_logger
+        log_file = os.path.basename(get_logger().get_log_path())
+        stem = os.path.splitext(log_file)[0].replace("provisioning_", "trace_", 1)
+        return os.path.join(str(get_logger().log_dir), stem + ".json")
+
+    def save(self) -> Optional[str]:
+        """Grava (sobrescreve) o trace com todos os eventos até agora. None se vazio ou em erro."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            events = list(self._events)
+            dropped = self.dropped
+        if not any(e["ph"] == "X" for e in events):
+            return None
+        data = {
+            "traceEvents": events,
+            "displayTimeUnit": "ms",
+            "otherData": {"started_at": self.started_at.isoformat(timespec="seconds"),
+                          "hostname": os.environ.get("COMPUTERNAME", "unknown"),
+                          "dropped_events": dropped},
+        }
+        try:
+            path = self.path()
+            with open(path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(path + ".tmp", path)
+            return path
+        except Exception:
+            return None
+
+
+_tracer = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    global _tracer
+    with _tracer_lock:
+        if _tracer is None:
+            from config import CONFIG
+            _tracer = Tracer(getattr(CONFIG, "trace_enabled", True))
+        return _tracer
+
+
+def span(name: str, cat: str = "", lane: str = None, **args):
+    """Atalho para get_tracer().span(...)."""
+    return get_tracer().span(name, cat, lane, **args)